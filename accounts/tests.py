@@ -405,11 +405,12 @@ class UtilsTests(TestCase):
             password='testpass123'
         )
 
-    @patch('accounts.utils.send_mail')
-    @patch('accounts.utils.render_to_string')
+    @patch('core.outbox.send_mail')
+    @patch('core.mail.render_email')
     def test_send_email_notification_success(self, mock_render, mock_send_mail):
         """Test successful email notification sending."""
-        mock_render.return_value = '<html>Test email</html>'
+        mock_render.return_value = (
+            'Subject', 'Test email', '<html>Test email</html>')
         mock_send_mail.return_value = True
         
         result = send_email_notification(
@@ -421,7 +422,7 @@ class UtilsTests(TestCase):
         mock_render.assert_called_once()
         mock_send_mail.assert_called_once()
 
-    @patch('accounts.utils.send_mail')
+    @patch('core.outbox.send_mail')
     def test_send_email_notification_failure(self, mock_send_mail):
         """Test email notification sending failure."""
         mock_send_mail.side_effect = Exception("SMTP Error")
@@ -1,9 +1,41 @@
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.conf import settings
-from django.utils.html import strip_tags
 from django.urls import reverse
 from django.core.signing import Signer, TimestampSigner
+from core.mail import register_email_type, get_email_type, send_email
+
+
+register_email_type(
+    'welcome_subscriber',
+    subject='Bienvenido a Fernando Da Silva - Completa tu perfil',
+    template='accounts/emails/welcome_subscriber.html',
+)
+register_email_type(
+    'welcome_member',
+    subject='Bienvenido como miembro - Fernando Da Silva',
+    template='accounts/emails/welcome_member.html',
+)
+register_email_type(
+    'account_deactivation',
+    subject='Cuenta desactivada - Fernando Da Silva',
+    template='accounts/emails/account_deactivation.html',
+)
+register_email_type(
+    'password_reset',
+    subject='Recuperación de contraseña - Fernando Da Silva',
+    template='accounts/emails/password_reset.html',
+)
+register_email_type(
+    'book_download',
+    subject='¡Tu Capítulo 1 está listo! - Camino, Verdad y Vida',
+    template='public/emails/book_download.html',
+)
+
+# Email types whose action link carries a signed user id: (url name, signer)
+SIGNED_URL_TYPES = {
+    'welcome_subscriber': ('accounts:complete_profile', Signer),
+    # TimestampSigner for password reset (expires in 3 hours)
+    'password_reset': ('accounts:password_reset_confirm', TimestampSigner),
+    'book_download': ('accounts:complete_profile', Signer),
+}
 
 
 def send_email_notification(email_type, recipient_email, context=None, request=None):
@@ -23,88 +55,17 @@ def send_email_notification(email_type, recipient_email, context=None, request=N
     if context is None:
         context = {}
 
-    # Email configurations
-    email_configs = {
-        'welcome_subscriber': {
-            'subject': 'Bienvenido a Fernando Da Silva - Completa tu perfil',
-            'template': 'accounts/emails/welcome_subscriber.html',
-            'requires_signed_url': True,
-        },
-        'welcome_member': {
-            'subject': 'Bienvenido como miembro - Fernando Da Silva',
-            'template': 'accounts/emails/welcome_member.html',
-            'requires_signed_url': False,
-        },
-        'account_deactivation': {
-            'subject': 'Cuenta desactivada - Fernando Da Silva',
-            'template': 'accounts/emails/account_deactivation.html',
-            'requires_signed_url': False,
-        },
-        'password_reset': {
-            'subject': 'Recuperación de contraseña - Fernando Da Silva',
-            'template': 'accounts/emails/password_reset.html',
-            'requires_signed_url': True,
-        },
-        'book_download': {
-            'subject': '¡Tu Capítulo 1 está listo! - Camino, Verdad y Vida',
-            'template': 'public/emails/book_download.html',
-            'requires_signed_url': True,
-        }
-    }
-
-    config = email_configs.get(email_type)
-    if not config:
-        raise ValueError(f"Email type '{email_type}' not supported")
+    get_email_type(email_type)
 
     # Generate signed URL if required
-    if config['requires_signed_url'] and 'user_id' in context and request:
-        if email_type == 'password_reset':
-            # Use TimestampSigner for password reset (expires in 3 hours)
-            signer = TimestampSigner()
-        else:
-            # Use regular Signer for other types
-            signer = Signer()
-
-        signed_user_id = signer.sign(context['user_id'])
-
-        if email_type == 'welcome_subscriber':
-            url_path = reverse('accounts:complete_profile',
-                               kwargs={'signed_user_id': signed_user_id})
-        elif email_type == 'password_reset':
-            url_path = reverse('accounts:password_reset_confirm',
-                               kwargs={'signed_user_id': signed_user_id})
-        elif email_type == 'book_download':
-            url_path = reverse('accounts:complete_profile',
-                               kwargs={'signed_user_id': signed_user_id})
-
+    if email_type in SIGNED_URL_TYPES and 'user_id' in context and request:
+        url_name, signer_class = SIGNED_URL_TYPES[email_type]
+        signed_user_id = signer_class().sign(context['user_id'])
+        url_path = reverse(
+            url_name, kwargs={'signed_user_id': signed_user_id})
         context['action_url'] = request.build_absolute_uri(url_path)
 
-    # Add common context
-    context.update({
-        'site_name': 'Fernando Da Silva',
-        'recipient_email': recipient_email,
-    })
-
-    try:
-        # Render email content
-        html_message = render_to_string(config['template'], context)
-        plain_message = strip_tags(html_message)
-
-        # Send email
-        send_mail(
-            subject=config['subject'],
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[recipient_email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        return True
-
-    except Exception as e:
-        # Log error in production
-        print(f"Error sending email: {e}")
-        return False
+    return send_email(email_type, recipient_email, context)
 
 
 def send_welcome_subscriber_email(recipient_email, user_id, request):
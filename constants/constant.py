@@ -126,6 +126,35 @@ def student_assigned_to_program_required(view_func):
     return wrapper
 
 
+# Outbox Message Status
+OUTBOX_STATUS_CHOICES = [
+    ('pending', 'Pendiente'),
+    ('sending', 'Enviando'),
+    ('sent', 'Enviado'),
+    ('failed', 'Fallido'),
+]
+
+# Export Job
+EXPORT_JOB_STATUS_CHOICES = [
+    ('pending', 'En cola'),
+    ('running', 'En proceso'),
+    ('completed', 'Completada'),
+    ('failed', 'Fallida'),
+]
+
+EXPORT_JOB_KIND_CHOICES = [
+    ('survey_results', 'Resultados de encuesta'),
+    ('event_registrations', 'Inscripciones a eventos'),
+    ('newsletter_subscribers', 'Suscriptores del newsletter'),
+]
+
+EXPORT_FORMAT_CHOICES = [
+    ('csv', 'CSV'),
+    ('wide', 'CSV por participante'),
+    ('excel', 'Excel'),
+    ('pdf', 'PDF'),
+]
+
 # Newsletter Status
 NEWSLETTER_STATUS_CHOICES = [
     ('draft', 'Borrador'),
@@ -133,6 +162,14 @@ NEWSLETTER_STATUS_CHOICES = [
     ('sent', 'Enviado'),
 ]
 
+# Newsletter Delivery Status
+NEWSLETTER_DELIVERY_STATUS_CHOICES = [
+    ('queued', 'En cola'),
+    ('sent', 'Enviado'),
+    ('failed', 'Fallido'),
+    ('bounced', 'Rebotado'),
+]
+
 # Event Status
 EVENT_STATUS_CHOICES = [
     ('draft', 'Borrador'),
@@ -168,6 +205,9 @@ REGISTRATION_STATUS_CHOICES = [
     ('waitlist', 'En Lista de Espera'),
 ]
 
+# Registration statuses that take a seat in the event
+ACTIVE_REGISTRATION_STATUSES = ['accepted', 'pending']
+
 # Payment Status
 PAYMENT_STATUS_CHOICES = [
     ('pending', 'Pendiente'),
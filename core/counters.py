@@ -0,0 +1,26 @@
+"""
+Atomic updates of denormalized counters stored in unsigned columns.
+"""
+from django.db.models import F
+
+
+def adjust_counter(queryset, field, delta):
+    """
+    Add delta to the counter field of every row of the queryset in SQL,
+    clamping at zero.
+
+    Decrements are guarded in the WHERE clause rather than with
+    GREATEST(): on MySQL, subtracting below zero on an UNSIGNED column
+    fails with "out of range" before GREATEST gets to clamp the result.
+
+    Returns:
+        int: Number of rows updated
+    """
+    if delta >= 0:
+        return queryset.update(**{field: F(field) + delta})
+
+    # Rows that would go negative are zeroed first, so the decrement
+    # below does not match them again
+    clamped = queryset.filter(**{f'{field}__lt': -delta}).update(**{field: 0})
+    return clamped + queryset.filter(**{f'{field}__gte': -delta}).update(
+        **{field: F(field) + delta})
@@ -0,0 +1,196 @@
+"""
+Mail service shared by all apps.
+
+Every kind of email is registered once as an email type (subject pattern,
+HTML template and optional plain-text template). Compiled templates are
+cached per type and the plain-text alternative is either rendered from the
+type's text template or derived once from the HTML.
+
+send_email() sends one email, through the outbox by default, so request
+handlers never wait on SMTP. send_bulk() is meant for workers: it streams
+any number of recipients over a single pooled connection.
+"""
+import logging
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import get_template
+from django.utils.html import strip_tags
+from core import outbox
+
+logger = logging.getLogger(__name__)
+
+SITE_NAME = 'Fernando Da Silva'
+
+EMAIL_TYPES = {}
+
+_compiled_templates = {}
+
+
+class EmailType:
+    """
+    Definition of a kind of email.
+
+    The subject is a str.format() pattern evaluated against the email
+    context, e.g. 'Recordatorio: {event.title}'.
+    """
+
+    def __init__(self, name, subject, template, text_template=None):
+        self.name = name
+        self.subject = subject
+        self.template = template
+        self.text_template = text_template
+
+    def render(self, context):
+        """Return (subject, plain_text, html) for the given context."""
+        html = get_compiled_template(self.template).render(context)
+        if self.text_template:
+            text = get_compiled_template(self.text_template).render(context)
+        else:
+            text = strip_tags(html)
+        return self.subject.format(**context), text, html
+
+
+def register_email_type(name, subject, template, text_template=None):
+    """Register an email type so it can be sent by name."""
+    EMAIL_TYPES[name] = EmailType(name, subject, template, text_template)
+    return EMAIL_TYPES[name]
+
+
+def get_email_type(email_type):
+    """Return a registered email type or raise ValueError."""
+    try:
+        return EMAIL_TYPES[email_type]
+    except KeyError:
+        raise ValueError(f"Email type '{email_type}' not supported")
+
+
+def get_compiled_template(template_name):
+    """
+    Return a compiled template, compiling it only once per process.
+    In DEBUG the loader is always asked, so template edits show up.
+    """
+    if settings.DEBUG:
+        return get_template(template_name)
+    if template_name not in _compiled_templates:
+        _compiled_templates[template_name] = get_template(template_name)
+    return _compiled_templates[template_name]
+
+
+def get_base_context(recipient_email, context=None):
+    """Return the context shared by every email."""
+    base_context = dict(context or {})
+    base_context.setdefault('site_name', SITE_NAME)
+    base_context.setdefault('recipient_email', recipient_email)
+    return base_context
+
+
+def render_email(email_type, context):
+    """
+    Render a registered email type.
+
+    Returns:
+        tuple: (subject, plain_text, html)
+    """
+    return get_email_type(email_type).render(context)
+
+
+def send_email(email_type, recipient_email, context=None, bcc=None, queue=True):
+    """
+    Render and send one email of a registered type.
+
+    Args:
+        email_type (str): Registered email type name
+        recipient_email (str): Email address of the recipient
+        context (dict): Template context
+        bcc (list): Optional blind copy recipients
+        queue (bool): Deliver through the outbox (True) or send right away
+
+    Returns:
+        bool: True if the email was queued or sent, False otherwise
+    """
+    get_email_type(email_type)
+    context = get_base_context(recipient_email, context)
+
+    try:
+        subject, text, html = render_email(email_type, context)
+
+        if queue:
+            outbox.send_mail(
+                subject=subject,
+                message=text,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                recipient_list=[recipient_email],
+                html_message=html,
+                bcc=bcc,
+            )
+        else:
+            build_email(subject, text, html, recipient_email, bcc=bcc).send()
+        return True
+
+    except Exception as e:
+        logger.error(
+            f"Error sending '{email_type}' email to {recipient_email}: {str(e)}")
+        return False
+
+
+def build_email(subject, text, html, recipient_email, bcc=None, connection=None):
+    """Build a multipart email with a plain-text body and HTML alternative."""
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=text,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[recipient_email],
+        bcc=bcc or [],
+        connection=connection
+    )
+    email.attach_alternative(html, 'text/html')
+    return email
+
+
+def send_bulk(email_type, recipients):
+    """
+    Send an email type to many recipients over one SMTP connection.
+
+    The iterable is consumed lazily, so callers can stream querysets with
+    .iterator(). When consecutive recipients share the same HTML, the
+    plain-text alternative is derived only once.
+
+    Args:
+        email_type (str): Registered email type name
+        recipients: Iterable of (recipient_email, context) pairs
+
+    Returns:
+        tuple: (sent_count, failed_recipient_emails)
+    """
+    config = get_email_type(email_type)
+    sent_count = 0
+    failed = []
+    last_html = last_text = None
+
+    with get_connection() as connection:
+        for recipient_email, context in recipients:
+            try:
+                context = get_base_context(recipient_email, context)
+                html = get_compiled_template(config.template).render(context)
+                if config.text_template:
+                    text = get_compiled_template(
+                        config.text_template).render(context)
+                elif html == last_html:
+                    text = last_text
+                else:
+                    text = strip_tags(html)
+                last_html, last_text = html, text
+
+                build_email(config.subject.format(**context), text, html,
+                            recipient_email, connection=connection).send()
+                sent_count += 1
+
+            except Exception as e:
+                logger.error(
+                    f"Error sending '{email_type}' email to {recipient_email}: {str(e)}")
+                failed.append(recipient_email)
+                # The SMTP session may be unusable after an error
+                connection.close()
+                connection.open()
+
+    return sent_count, failed
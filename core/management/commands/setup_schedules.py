@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django_q.models import Schedule
+
+# Periodic Django-Q jobs of the project, keyed by schedule name
+SCHEDULES = {
+    'Despachar correos pendientes': {
+        'func': 'core.tasks.dispatch_outbox',
+        'schedule_type': Schedule.MINUTES,
+        'minutes': 1,
+    },
+    'Recalcular métricas del dashboard': {
+        'func': 'dashboard.tasks.recompute_dashboard_metrics',
+        'schedule_type': Schedule.MINUTES,
+        'minutes': 15,
+    },
+    'Enviar recordatorios de encuestas': {
+        'func': 'events.tasks.schedule_survey_reminders',
+        'schedule_type': Schedule.MINUTES,
+        'minutes': 15,
+    },
+    'Reanudar boletines detenidos': {
+        'func': 'newsletter.tasks.resume_stalled_newsletters',
+        'schedule_type': Schedule.MINUTES,
+        'minutes': 15,
+    },
+    'Expirar encuestas vencidas': {
+        'func': 'events.tasks.cleanup_expired_surveys',
+        'schedule_type': Schedule.HOURLY,
+    },
+}
+
+
+class Command(BaseCommand):
+    help = 'Create or update the periodic Django-Q schedules of the project.'
+
+    def handle(self, *args, **options):
+        for name, defaults in SCHEDULES.items():
+            _, created = Schedule.objects.update_or_create(
+                name=name, defaults=defaults)
+            action = 'Created' if created else 'Updated'
+            self.stdout.write(f'{action} schedule "{name}"')
+
+        self.stdout.write(self.style.SUCCESS('Schedules are up to date.'))
@@ -0,0 +1,63 @@
+"""
+Models shared by every app of the project.
+"""
+from django.db import models
+from django.core.mail import EmailMultiAlternatives
+from django.utils import timezone
+from constants.constant import OUTBOX_STATUS_CHOICES
+
+
+class OutboxMessage(models.Model):
+    """
+    An email waiting to be delivered by the outbox dispatcher.
+    Request handlers only insert rows; Django-Q workers send them.
+    """
+    subject = models.CharField(max_length=255, verbose_name='Subject')
+    body = models.TextField(verbose_name='Plain text body')
+    html_body = models.TextField(blank=True, verbose_name='HTML body')
+    from_email = models.CharField(max_length=254, verbose_name='From')
+    to = models.JSONField(default=list, verbose_name='To')
+    bcc = models.JSONField(default=list, blank=True, verbose_name='Bcc')
+    status = models.CharField(
+        max_length=10,
+        choices=OUTBOX_STATUS_CHOICES,
+        default='pending',
+        verbose_name='Status'
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Attempts')
+    last_error = models.TextField(blank=True, verbose_name='Last Error')
+    available_at = models.DateTimeField(
+        default=timezone.now, verbose_name='Available At')
+    claim_token = models.CharField(
+        max_length=32, blank=True, db_index=True, verbose_name='Claim Token')
+    claimed_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Claimed At')
+    sent_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Sent At')
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name='Created At')
+
+    class Meta:
+        verbose_name = 'Outbox Message'
+        verbose_name_plural = 'Outbox Messages'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+    def to_email_message(self, connection=None):
+        """Build the Django email message for this row."""
+        email = EmailMultiAlternatives(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email,
+            to=self.to,
+            bcc=self.bcc,
+            connection=connection
+        )
+        if self.html_body:
+            email.attach_alternative(self.html_body, 'text/html')
+        return email
@@ -0,0 +1,56 @@
+"""
+Transactional email outbox.
+
+send_mail() has the same signature as django.core.mail.send_mail, but it
+stores the message in the OutboxMessage table and returns immediately.
+The dispatcher in core.tasks delivers queued messages in batches from a
+Django-Q worker, so request latency never depends on the mail server.
+"""
+import logging
+from django.conf import settings
+from django.db import transaction
+from django_q.tasks import async_task
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def send_mail(subject, message, from_email, recipient_list, fail_silently=False,
+              html_message=None, bcc=None):
+    """
+    Queue an email in the outbox.
+
+    The row is written inside the caller's transaction, so a rolled back
+    request never sends its emails. The dispatcher is woken up once the
+    transaction commits.
+
+    Returns:
+        int: Number of messages queued (1, or 0 on a silenced failure)
+    """
+    try:
+        OutboxMessage.objects.create(
+            subject=subject,
+            body=message,
+            html_body=html_message or '',
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            to=list(recipient_list),
+            bcc=list(bcc or []),
+        )
+    except Exception:
+        if fail_silently:
+            return 0
+        raise
+
+    transaction.on_commit(wake_dispatcher)
+    return 1
+
+
+def wake_dispatcher():
+    """
+    Enqueue a dispatcher run. A broker outage must not break the request:
+    the message is already stored and the periodic dispatcher sends it.
+    """
+    try:
+        async_task('core.tasks.dispatch_outbox')
+    except Exception as e:
+        logger.warning(f"Could not enqueue outbox dispatcher: {str(e)}")
@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'core.apps.CoreConfig',
     'public.apps.PublicConfig',
     'accounts.apps.AccountsConfig',
     'blog.apps.BlogConfig',
@@ -149,3 +150,33 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Authentication settings
 LOGIN_URL = '/accounts/iniciar-sesion/'
 LOGOUT_REDIRECT_URL = '/'
+
+# Newsletter delivery
+# Subscribers per batch, parallel Django-Q lanes per newsletter and global
+# sending rate in emails per second (0 disables throttling). When throttled,
+# the batch size is capped so a batch spends at most the given share of the
+# Django-Q task timeout sleeping: timeout * rate / lanes * headroom emails.
+NEWSLETTER_BATCH_SIZE = env.int('NEWSLETTER_BATCH_SIZE', default=200)
+NEWSLETTER_CONCURRENCY = env.int('NEWSLETTER_CONCURRENCY', default=2)
+NEWSLETTER_RATE_LIMIT = env.float('NEWSLETTER_RATE_LIMIT', default=10)
+NEWSLETTER_TIMEOUT_HEADROOM = env.float(
+    'NEWSLETTER_TIMEOUT_HEADROOM', default=0.5)
+# Seconds without progress after which a newsletter still in sending is
+# resumed by the periodic sweep. Must be well above the task timeout.
+NEWSLETTER_STALL_TIMEOUT = env.int('NEWSLETTER_STALL_TIMEOUT', default=900)
+
+# Survey invitations
+# Survey responses created per INSERT, invitations or reminders sent per
+# Django-Q task, and hours after the invitation when the reminder is due.
+SURVEY_INVITATION_BATCH_SIZE = env.int(
+    'SURVEY_INVITATION_BATCH_SIZE', default=200)
+SURVEY_REMINDER_DELAY_HOURS = env.int('SURVEY_REMINDER_DELAY_HOURS', default=24)
+
+# Email outbox
+# Messages claimed per dispatcher run, delivery attempts before giving up,
+# base retry delay in seconds (doubled on every attempt) and seconds after
+# which a claimed but unfinished message is considered abandoned.
+OUTBOX_BATCH_SIZE = env.int('OUTBOX_BATCH_SIZE', default=50)
+OUTBOX_MAX_ATTEMPTS = env.int('OUTBOX_MAX_ATTEMPTS', default=5)
+OUTBOX_RETRY_DELAY = env.int('OUTBOX_RETRY_DELAY', default=60)
+OUTBOX_CLAIM_TIMEOUT = env.int('OUTBOX_CLAIM_TIMEOUT', default=600)
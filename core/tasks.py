@@ -0,0 +1,111 @@
+"""
+Django-Q tasks of the email outbox.
+"""
+import logging
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db.models import F, Q
+from django.utils import timezone
+from django_q.tasks import async_task
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def dispatch_outbox(batch_size=None):
+    """
+    Claim a batch of due outbox messages and send them over one SMTP
+    connection. Failed messages are retried with exponential backoff.
+    While full batches keep coming, another run is enqueued.
+
+    Returns:
+        int: Number of messages sent
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    messages = claim_outbox_messages(batch_size)
+    if not messages:
+        return 0
+
+    sent_count = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        logger.error(f"Could not connect to the mail server: {str(e)}")
+        for message in messages:
+            register_failure(message, e)
+        save_outbox_messages(messages)
+        return 0
+
+    try:
+        for message in messages:
+            try:
+                message.to_email_message(connection).send()
+                message.status = 'sent'
+                message.sent_at = timezone.now()
+                message.last_error = ''
+                sent_count += 1
+            except Exception as e:
+                logger.error(
+                    f"Failed to send outbox message {message.pk}: {str(e)}")
+                register_failure(message, e)
+                # The SMTP session may be unusable after an error
+                connection.close()
+                connection.open()
+    finally:
+        connection.close()
+        save_outbox_messages(messages)
+
+    if len(messages) == batch_size:
+        async_task('core.tasks.dispatch_outbox', batch_size)
+
+    return sent_count
+
+
+def claim_outbox_messages(batch_size):
+    """
+    Atomically take ownership of up to batch_size due messages.
+
+    The conditional UPDATE only matches rows that are still claimable, so
+    concurrent dispatchers never get the same message. Messages claimed by
+    a dispatcher that died are released after OUTBOX_CLAIM_TIMEOUT.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT)
+    claimable = (
+        Q(status='pending', available_at__lte=now) |
+        Q(status='sending', claimed_at__lt=stale)
+    )
+
+    ids = list(OutboxMessage.objects.filter(claimable).order_by(
+        'id').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+
+    token = uuid.uuid4().hex
+    OutboxMessage.objects.filter(claimable, id__in=ids).update(
+        status='sending',
+        claim_token=token,
+        claimed_at=now,
+        attempts=F('attempts') + 1
+    )
+    return list(OutboxMessage.objects.filter(claim_token=token).order_by('id'))
+
+
+def register_failure(message, error):
+    """Schedule a retry with exponential backoff, or give up."""
+    message.last_error = str(error)
+    if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        message.status = 'failed'
+    else:
+        message.status = 'pending'
+        delay = settings.OUTBOX_RETRY_DELAY * 2 ** (message.attempts - 1)
+        message.available_at = timezone.now() + timedelta(seconds=delay)
+
+
+def save_outbox_messages(messages):
+    """Persist the outcome of a batch with a single statement."""
+    OutboxMessage.objects.bulk_update(
+        messages, ['status', 'sent_at', 'last_error', 'available_at'])
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from unittest.mock import patch
+
+from . import mail as mail_service
+from .models import OutboxMessage
+from .outbox import send_mail
+from .tasks import dispatch_outbox
+
+
+@override_settings(OUTBOX_BATCH_SIZE=10, OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_DELAY=60)
+class OutboxTests(TestCase):
+    """Test cases for the email outbox."""
+
+    def queue_message(self, recipient='test@example.com'):
+        return send_mail(
+            subject='Asunto',
+            message='Texto',
+            from_email=None,
+            recipient_list=[recipient],
+            html_message='<p>Texto</p>',
+        )
+
+    def test_send_mail_queues_without_sending(self):
+        """Test that send_mail stores the message instead of sending it."""
+        self.assertEqual(self.queue_message(), 1)
+
+        self.assertEqual(len(mail.outbox), 0)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.status, 'pending')
+        self.assertEqual(message.to, ['test@example.com'])
+
+    @patch('core.tasks.async_task')
+    def test_dispatch_sends_pending_messages(self, mock_async_task):
+        """Test that the dispatcher sends and marks queued messages."""
+        self.queue_message('a@example.com')
+        self.queue_message('b@example.com')
+
+        self.assertEqual(dispatch_outbox(), 2)
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].alternatives[0][0], '<p>Texto</p>')
+        self.assertFalse(OutboxMessage.objects.exclude(status='sent').exists())
+        mock_async_task.assert_not_called()
+
+    @patch('core.tasks.async_task')
+    def test_dispatch_retries_with_backoff_then_gives_up(self, mock_async_task):
+        """Test that failures are retried later and eventually marked failed."""
+        self.queue_message()
+
+        with patch.object(OutboxMessage, 'to_email_message',
+                          side_effect=Exception('SMTP Error')):
+            self.assertEqual(dispatch_outbox(), 0)
+            message = OutboxMessage.objects.get()
+            self.assertEqual(message.status, 'pending')
+            self.assertEqual(message.attempts, 1)
+            self.assertGreater(message.available_at, timezone.now())
+
+            # Not due yet
+            self.assertEqual(dispatch_outbox(), 0)
+            self.assertEqual(OutboxMessage.objects.get().attempts, 1)
+
+            OutboxMessage.objects.update(
+                available_at=timezone.now() - timedelta(seconds=1))
+            dispatch_outbox()
+
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.status, 'failed')
+        self.assertEqual(message.last_error, 'SMTP Error')
+
+
+class MailServiceTests(TestCase):
+    """Test cases for the shared mail service."""
+
+    def setUp(self):
+        mail_service.register_email_type(
+            'test_type',
+            subject='Hola {name}',
+            template='programs/emails/welcome_assignment.html',
+        )
+        self.addCleanup(mail_service.EMAIL_TYPES.pop, 'test_type')
+
+    def test_send_email_goes_through_outbox(self):
+        """Test that send_email queues the rendered email by default."""
+        self.assertTrue(mail_service.send_email(
+            'test_type', 'test@example.com', {'name': 'Ana'}))
+
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.subject, 'Hola Ana')
+        self.assertTrue(message.body)
+        self.assertNotIn('<', message.body)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_send_bulk_uses_one_connection(self):
+        """Test that send_bulk streams all recipients over one connection."""
+        recipients = (
+            (f'user{i}@example.com', {'name': f'User {i}'}) for i in range(3))
+
+        with patch('core.mail.get_connection',
+                   wraps=mail_service.get_connection) as mock_connection:
+            sent_count, failed = mail_service.send_bulk('test_type', recipients)
+
+        self.assertEqual((sent_count, failed), (3, []))
+        mock_connection.assert_called_once()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[2].subject, 'Hola User 2')
+
+    def test_unknown_email_type(self):
+        """Test that unknown email types are rejected."""
+        with self.assertRaises(ValueError):
+            mail_service.send_email('missing_type', 'test@example.com')
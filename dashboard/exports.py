@@ -0,0 +1,473 @@
+"""
+Exportaciones de datos del dashboard.
+
+Cada exportación sabe generar sus filas (encabezados incluidos) y contar
+cuántas tendrá. Los CSV se envían en streaming desde la vista; Excel y PDF
+se construyen en segundo plano con run_export_job, que usa los escritores
+de este módulo para volcarlos a un archivo.
+"""
+import csv
+import io
+from datetime import datetime
+from importlib.util import find_spec
+from itertools import groupby
+from operator import attrgetter
+from django.http import StreamingHttpResponse
+from events.models import Registration, Survey, SurveyQuestionResponse
+from events.utils import get_survey_analysis
+from newsletter.models import Subscriber
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Cada cuántas filas se informa el progreso de una exportación
+EXPORT_PROGRESS_STEP = 500
+
+# Librería opcional que necesita cada formato
+FORMAT_REQUIREMENTS = {
+    'excel': 'openpyxl',
+    'pdf': 'reportlab',
+}
+
+FORMAT_EXTENSIONS = {
+    'csv': 'csv',
+    'wide': 'csv',
+    'excel': 'xlsx',
+    'pdf': 'pdf',
+}
+
+
+class Echo:
+    """
+    Objeto con la interfaz de un archivo que devuelve lo que se le escribe,
+    para que csv.writer genere líneas sin acumularlas en memoria.
+    """
+
+    def write(self, value):
+        return value
+
+
+def streaming_csv_response(rows, filename):
+    """
+    Respuesta CSV que se genera mientras se envía, con memoria constante.
+    """
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in rows),
+        content_type='text/csv'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+    return response
+
+
+def timestamped_filename(prefix, extension):
+    return f'{prefix}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
+
+
+def available_format(format_type):
+    """
+    Formato con el que se puede generar realmente la exportación: si falta
+    la librería que requiere, se usa CSV.
+    """
+    requirement = FORMAT_REQUIREMENTS.get(format_type)
+    if requirement and find_spec(requirement) is None:
+        return 'csv'
+    return format_type
+
+
+# ===== ENCUESTAS =====
+
+def get_completed_answers(survey):
+    """
+    Respuestas completadas de una encuesta, con todo lo que necesita la
+    exportación en una sola consulta.
+    """
+    return SurveyQuestionResponse.objects.filter(
+        question__survey=survey,
+        survey_response__status='completed'
+    ).select_related(
+        'question', 'selected_option', 'survey_response__registration'
+    ).order_by('question__order', 'question_id', 'survey_response_id', 'id')
+
+
+def get_answer_value(answer, question=None):
+    """Valor legible de una respuesta según el tipo de pregunta."""
+    question_type = (question or answer.question).question_type
+    if question_type == 'text':
+        return answer.text_response
+    elif question_type == 'scale':
+        return f"{answer.scale_response}/5"
+    elif question_type == 'multiple_choice':
+        return answer.selected_option.text if answer.selected_option else ''
+    return ''
+
+
+def survey_csv_rows(survey, include_email=False):
+    """Genera las filas del CSV de resultados, una por respuesta."""
+    # Encabezados
+    yield (['Pregunta', 'Tipo', 'Respuesta', 'Participante'] +
+           (['Email'] if include_email else []) + ['Fecha'])
+
+    # Datos
+    for answer in get_completed_answers(survey).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        registration = answer.survey_response.registration
+        yield [
+            answer.question.text,
+            answer.question.get_question_type_display(),
+            get_answer_value(answer),
+            registration.full_name,
+        ] + ([registration.email] if include_email else []) + [
+            answer.created_at.strftime('%d/%m/%Y %H:%M')
+        ]
+
+
+def survey_wide_csv_rows(survey):
+    """
+    Genera las filas del CSV en formato ancho: una por participante y una
+    columna por pregunta. Las respuestas se recorren una sola vez ordenadas
+    por respuesta de encuesta y se agrupan al vuelo.
+    """
+    questions = list(survey.questions.order_by('order', 'id'))
+    columns = {question.id: index for index, question in enumerate(questions)}
+
+    # Encabezados
+    yield (['Participante', 'Email', 'Evento', 'Fecha de finalización'] +
+           [question.text for question in questions])
+
+    answers = SurveyQuestionResponse.objects.filter(
+        question__survey=survey,
+        survey_response__status='completed'
+    ).select_related(
+        'selected_option', 'survey_response__registration',
+        'survey_response__event'
+    ).order_by('survey_response_id', 'id').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    for _, respondent_answers in groupby(answers, key=attrgetter('survey_response_id')):
+        values = [''] * len(questions)
+        survey_response = None
+        for answer in respondent_answers:
+            survey_response = answer.survey_response
+            index = columns.get(answer.question_id)
+            if index is not None:
+                values[index] = get_answer_value(answer, questions[index])
+
+        completed_at = survey_response.completed_at
+        yield [
+            survey_response.registration.full_name,
+            survey_response.registration.email,
+            survey_response.event.title,
+            completed_at.strftime('%d/%m/%Y %H:%M') if completed_at else '',
+        ] + values
+
+
+class SurveyResultsExport:
+    """Resultados de una encuesta ({"survey_id": ...})."""
+    formats = ('csv', 'wide', 'excel', 'pdf')
+    sheet_title = 'Resultados de Encuesta'
+
+    def __init__(self, params):
+        self.survey = Survey.objects.get(pk=params['survey_id'])
+
+    def filename_prefix(self, format_type):
+        if format_type == 'wide':
+            return f'encuesta_{self.survey.pk}_participantes'
+        return f'encuesta_{self.survey.pk}'
+
+    def count(self, format_type):
+        if format_type == 'wide':
+            return self.survey.responses.filter(status='completed').count()
+        return get_completed_answers(self.survey).count()
+
+    def rows(self, format_type):
+        if format_type == 'wide':
+            return survey_wide_csv_rows(self.survey)
+        return survey_csv_rows(self.survey, include_email=format_type == 'excel')
+
+    def write_pdf(self, file):
+        write_survey_pdf(self.survey, file)
+
+
+# ===== INSCRIPCIONES =====
+
+def registration_rows(registrations):
+    """Genera las filas de la exportación de inscripciones."""
+    # Encabezados
+    yield ['Evento', 'Participante', 'Email', 'Teléfono', 'Estado',
+           'Fecha de inscripción', 'Estado del pago', 'Método de pago', 'Monto']
+
+    # Datos
+    for registration in registrations.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        payment = getattr(registration, 'payment', None)
+        yield [
+            registration.event.title,
+            registration.full_name,
+            registration.email,
+            registration.phone,
+            registration.get_status_display(),
+            registration.registration_date.strftime('%d/%m/%Y %H:%M'),
+            payment.get_status_display() if payment else '',
+            payment.payment_method.name if payment else '',
+            payment.amount if payment else '',
+        ]
+
+
+class EventRegistrationsExport:
+    """Inscripciones a eventos ({"event_id": ..., "status": ...} opcionales)."""
+    formats = ('csv', 'excel')
+    sheet_title = 'Inscripciones'
+
+    def __init__(self, params):
+        self.registrations = Registration.objects.select_related(
+            'event', 'payment__payment_method').order_by('event_id', 'id')
+        self.event_id = params.get('event_id')
+        if self.event_id:
+            self.registrations = self.registrations.filter(
+                event_id=self.event_id)
+        if params.get('status'):
+            self.registrations = self.registrations.filter(
+                status=params['status'])
+
+    def filename_prefix(self, format_type):
+        if self.event_id:
+            return f'inscripciones_evento_{self.event_id}'
+        return 'inscripciones'
+
+    def count(self, format_type):
+        return self.registrations.count()
+
+    def rows(self, format_type):
+        return registration_rows(self.registrations)
+
+
+# ===== SUSCRIPTORES =====
+
+def subscriber_rows(subscribers):
+    """Genera las filas de la exportación de suscriptores."""
+    # Encabezados
+    yield ['Email', 'Nombre', 'Apellido', 'Suscrito',
+           'Fecha de suscripción', 'Fecha de baja']
+
+    # Datos
+    for subscriber in subscribers.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        profile = getattr(subscriber.user, 'profile', None)
+        yield [
+            subscriber.user.email,
+            profile.first_name if profile else '',
+            profile.last_name if profile else '',
+            'Sí' if subscriber.is_subscribed else 'No',
+            subscriber.subscribed_at.strftime('%d/%m/%Y %H:%M'),
+            subscriber.unsubscribed_at.strftime(
+                '%d/%m/%Y %H:%M') if subscriber.unsubscribed_at else '',
+        ]
+
+
+class NewsletterSubscribersExport:
+    """Suscriptores del newsletter ({"subscribed_only": true} opcional)."""
+    formats = ('csv', 'excel')
+    sheet_title = 'Suscriptores'
+
+    def __init__(self, params):
+        self.subscribers = Subscriber.objects.select_related(
+            'user__profile').order_by('id')
+        if params.get('subscribed_only'):
+            self.subscribers = self.subscribers.filter(is_subscribed=True)
+
+    def filename_prefix(self, format_type):
+        return 'suscriptores'
+
+    def count(self, format_type):
+        return self.subscribers.count()
+
+    def rows(self, format_type):
+        return subscriber_rows(self.subscribers)
+
+
+EXPORTS = {
+    'survey_results': SurveyResultsExport,
+    'event_registrations': EventRegistrationsExport,
+    'newsletter_subscribers': NewsletterSubscribersExport,
+}
+
+
+def get_export(kind, params):
+    """
+    Instancia la exportación de un tipo con sus parámetros.
+
+    Raises:
+        ValueError: Si el tipo de exportación no existe.
+    """
+    try:
+        export_class = EXPORTS[kind]
+    except KeyError:
+        raise ValueError(f"Export kind '{kind}' not supported")
+    return export_class(params)
+
+
+# ===== ESCRITORES =====
+
+def track_progress(rows, callback, step=EXPORT_PROGRESS_STEP):
+    """
+    Devuelve las filas tal cual, llamando a callback(procesadas) cada `step`
+    filas de datos y al terminar.
+    """
+    processed = -1  # El encabezado no cuenta
+    for row in rows:
+        yield row
+        processed += 1
+        if processed and processed % step == 0:
+            callback(processed)
+    callback(max(processed, 0))
+
+
+def write_csv(rows, file):
+    """Escribe las filas en un archivo binario como CSV UTF-8."""
+    text = io.TextIOWrapper(file, encoding='utf-8', newline='', write_through=True)
+    csv.writer(text).writerows(rows)
+    text.detach()
+
+
+def write_excel(rows, file, title):
+    """
+    Escribe las filas en un libro de Excel en modo write_only, que vuelca
+    cada fila al disco en lugar de mantener la hoja completa en memoria.
+    """
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment, PatternFill
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+
+    # Estilos
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="366092",
+                              end_color="366092", fill_type="solid")
+    header_alignment = Alignment(horizontal="center", vertical="center")
+
+    rows = iter(rows)
+    headers = next(rows)
+
+    # En modo write_only los anchos se fijan antes de escribir las filas
+    for index, header in enumerate(headers, 1):
+        column_letter = openpyxl.utils.get_column_letter(index)
+        ws.column_dimensions[column_letter].width = min(
+            max(len(header) + 2, 15), 50)
+
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    for row in rows:
+        ws.append(row)
+
+    wb.save(file)
+
+
+def write_survey_pdf(survey, file):
+    """
+    Escribe en un archivo el resumen de resultados de una encuesta en PDF.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+    doc = SimpleDocTemplate(file, pagesize=A4)
+    story = []
+
+    # Estilos
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        spaceAfter=30,
+        alignment=1  # Centrado
+    )
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=14,
+        spaceAfter=12,
+        spaceBefore=20
+    )
+    normal_style = styles['Normal']
+
+    # Título
+    story.append(
+        Paragraph(f"Resultados de Encuesta: {survey.title}", title_style))
+    story.append(Spacer(1, 20))
+
+    # Información general
+    total_responses, question_analysis = get_survey_analysis(survey)
+    story.append(Paragraph(
+        f"<b>Total de respuestas completadas:</b> {total_responses}", normal_style))
+    story.append(Paragraph(
+        f"<b>Total de preguntas:</b> {len(question_analysis)}", normal_style))
+    story.append(Paragraph(
+        f"<b>Fecha de exportación:</b> {datetime.now().strftime('%d/%m/%Y %H:%M')}", normal_style))
+    story.append(Spacer(1, 20))
+
+    # Resultados por pregunta
+    for analysis in question_analysis:
+        question = analysis['question']
+        story.append(Paragraph(f"<b>{question.text}</b>", heading_style))
+        story.append(
+            Paragraph(f"Tipo: {question.get_question_type_display()}", normal_style))
+
+        if analysis['type'] == 'text':
+            # Mostrar algunas respuestas de texto
+            for response in analysis['sample_responses'][:3]:
+                story.append(
+                    Paragraph(f"• {response.text_response[:200]}...", normal_style))
+                story.append(Paragraph(
+                    f"  <i>Por: {response.survey_response.registration.full_name}</i>", normal_style))
+
+        elif analysis['type'] == 'scale':
+            # Estadísticas de escala
+            if analysis['response_count']:
+                story.append(
+                    Paragraph(f"Promedio: {analysis['average_rating']:.2f}/5", normal_style))
+
+                for rating, count in analysis['distribution'].items():
+                    story.append(
+                        Paragraph(f"{rating} estrellas: {count} respuestas", normal_style))
+
+        elif analysis['type'] == 'multiple_choice':
+            # Conteo de opciones
+            for option_text, count in analysis['option_counts'].items():
+                story.append(
+                    Paragraph(f"• {option_text}: {count} respuestas", normal_style))
+
+        story.append(Spacer(1, 15))
+
+    # Construir PDF
+    doc.build(story)
+
+
+def write_export(export, format_type, file, progress=None):
+    """
+    Escribe una exportación en el formato pedido.
+
+    Args:
+        export: Instancia de una de las exportaciones de EXPORTS
+        format_type: Formato ya resuelto con available_format
+        file: Archivo binario abierto para escritura
+        progress: Función opcional que recibe las filas procesadas
+    """
+    if format_type == 'pdf':
+        export.write_pdf(file)
+        return
+
+    rows = export.rows(format_type)
+    if progress is not None:
+        rows = track_progress(rows, progress)
+
+    if format_type == 'excel':
+        write_excel(rows, file, export.sheet_title)
+    else:
+        write_csv(rows, file)
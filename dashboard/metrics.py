@@ -0,0 +1,166 @@
+"""
+Definitions of the counters shown on the dashboard index.
+
+Each metric counts (or sums a field of) the rows of one model that match a
+simple set of lookups. The same definition is used two ways: as SQL
+aggregates for the periodic full recompute, and in Python by the signal
+handlers that turn every save/delete into an F() increment of the
+DashboardMetrics row (for the metrics marked incremental).
+"""
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from constants.constant import UserRoles
+
+
+class Metric:
+    """
+    A dashboard counter.
+
+    Args:
+        group: Context dictionary the value is exposed in ('blog_stats', ...)
+        key: Key inside that dictionary
+        model: Model label ('blog.Post')
+        field: DashboardMetrics field, defaults to key
+        filter: Lookups rows must match; only exact and __gt are supported
+            and values may be callables evaluated at check time
+        exclude: Lookups rows must not match
+        total: Field to sum instead of counting rows
+        incremental: Whether saves and deletes update the metric right
+            away. Metrics fed by very frequent writes are left to the
+            periodic recompute instead, so those writes do not all queue
+            on the lock of the DashboardMetrics row
+    """
+
+    def __init__(self, group, key, model, field=None, filter=None,
+                 exclude=None, total=None, incremental=True):
+        self.group = group
+        self.key = key
+        self.model = model
+        self.field = field or key
+        self.filter = filter or {}
+        self.exclude = exclude or {}
+        self.total = total
+        self.incremental = incremental
+
+    @property
+    def source_fields(self):
+        """Model fields needed to evaluate the metric for one row."""
+        lookups = list(self.filter) + list(self.exclude)
+        fields = {lookup.split('__')[0] for lookup in lookups}
+        if self.total:
+            fields.add(self.total)
+        return fields
+
+    def aggregate(self):
+        """SQL aggregate computing the metric over the whole table."""
+        condition = Q(**resolve(self.filter))
+        if self.exclude:
+            condition &= ~Q(**resolve(self.exclude))
+        if self.total:
+            return Sum(self.total, filter=condition, default=0)
+        return Count('pk', filter=condition)
+
+    def value(self, values):
+        """
+        Contribution of one row, given a dict of its field values.
+        """
+        if not matches(values, self.filter):
+            return 0
+        if self.exclude and matches(values, self.exclude):
+            return 0
+        if self.total:
+            return values[self.total] or 0
+        return 1
+
+
+def resolve(lookups):
+    return {lookup: value() if callable(value) else value
+            for lookup, value in lookups.items()}
+
+
+def matches(values, lookups):
+    """Evaluate exact and __gt lookups against a dict of field values."""
+    for lookup, expected in resolve(lookups).items():
+        field, _, operator = lookup.partition('__')
+        value = values[field]
+        if operator == 'gt':
+            if value is None or not value > expected:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+METRICS = [
+    # Users (managers are not counted)
+    Metric('user_stats', 'total_users', 'accounts.User',
+           exclude={'role': UserRoles.MANAGER}),
+    Metric('user_stats', 'subscribers', 'accounts.User',
+           filter={'role': UserRoles.SUBSCRIBER}),
+    Metric('user_stats', 'members', 'accounts.User',
+           filter={'role': UserRoles.MEMBER}),
+    Metric('user_stats', 'students', 'accounts.User',
+           filter={'role': UserRoles.STUDENT}),
+    Metric('user_stats', 'assistants', 'accounts.User',
+           filter={'role': UserRoles.ASSISTANT}),
+    Metric('user_stats', 'active_users', 'accounts.User',
+           filter={'is_active': True}, exclude={'role': UserRoles.MANAGER}),
+    Metric('user_stats', 'inactive_users', 'accounts.User',
+           filter={'is_active': False}, exclude={'role': UserRoles.MANAGER}),
+
+    # Blog
+    Metric('blog_stats', 'total_posts', 'blog.Post'),
+    Metric('blog_stats', 'published_posts', 'blog.Post',
+           filter={'status': 'published'}),
+    Metric('blog_stats', 'draft_posts', 'blog.Post',
+           filter={'status': 'draft'}),
+    # Every public post view saves view_count; recomputed periodically only
+    Metric('blog_stats', 'total_views', 'blog.Post', total='view_count',
+           incremental=False),
+    Metric('blog_stats', 'total_categories', 'blog.Category'),
+    Metric('blog_stats', 'total_tags', 'blog.Tag'),
+    Metric('blog_stats', 'total_comments', 'blog.Comment',
+           field='blog_comments'),
+    Metric('blog_stats', 'pending_comments', 'blog.Comment',
+           filter={'status': 'pending'}),
+    Metric('blog_stats', 'approved_comments', 'blog.Comment',
+           filter={'status': 'approved'}),
+    Metric('blog_stats', 'spam_comments', 'blog.Comment',
+           filter={'status': 'spam'}),
+
+    # Events. Events move out of "upcoming" as time passes; the periodic
+    # recompute takes care of that.
+    Metric('event_stats', 'total_events', 'events.Event'),
+    Metric('event_stats', 'published_events', 'events.Event',
+           filter={'status': 'published'}),
+    Metric('event_stats', 'draft_events', 'events.Event',
+           filter={'status': 'draft'}),
+    Metric('event_stats', 'upcoming_events', 'events.Event',
+           filter={'start_date__gt': timezone.now}),
+    Metric('event_stats', 'total_registrations', 'events.Registration'),
+
+    # Programs
+    Metric('program_stats', 'total_programs', 'programs.Program'),
+    Metric('program_stats', 'total_modules', 'programs.Module'),
+    Metric('program_stats', 'total_sessions', 'programs.Session'),
+    Metric('program_stats', 'total_assignments', 'programs.Assignment'),
+    Metric('program_stats', 'total_materials', 'programs.Material'),
+    Metric('program_stats', 'total_feedbacks', 'programs.FinalFeedback'),
+    Metric('program_stats', 'total_comments', 'programs.Comment',
+           field='program_comments'),
+
+    # Newsletter
+    Metric('newsletter_stats', 'total_newsletters', 'newsletter.Newsletter'),
+    Metric('newsletter_stats', 'total_subscribers', 'newsletter.Subscriber',
+           filter={'is_subscribed': True}),
+]
+
+
+def metrics_by_model(incremental_only=False):
+    """Return {model label: [Metric, ...]}, optionally only the incremental ones."""
+    grouped = {}
+    for metric in METRICS:
+        if incremental_only and not metric.incremental:
+            continue
+        grouped.setdefault(metric.model, []).append(metric)
+    return grouped
@@ -1,3 +1,148 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import F
+from constants.constant import (
+    EXPORT_JOB_STATUS_CHOICES, EXPORT_JOB_KIND_CHOICES, EXPORT_FORMAT_CHOICES
+)
+from .metrics import METRICS
 
-# Create your models here.
+
+class DashboardMetrics(models.Model):
+    """
+    Single-row snapshot of the counters shown on the dashboard index.
+
+    Kept current by the F() increments of dashboard.signals and fully
+    recomputed by the recompute_dashboard_metrics task.
+    """
+    # Users
+    total_users = models.IntegerField(default=0)
+    subscribers = models.IntegerField(default=0)
+    members = models.IntegerField(default=0)
+    students = models.IntegerField(default=0)
+    assistants = models.IntegerField(default=0)
+    active_users = models.IntegerField(default=0)
+    inactive_users = models.IntegerField(default=0)
+
+    # Blog
+    total_posts = models.IntegerField(default=0)
+    published_posts = models.IntegerField(default=0)
+    draft_posts = models.IntegerField(default=0)
+    total_views = models.BigIntegerField(default=0)
+    total_categories = models.IntegerField(default=0)
+    total_tags = models.IntegerField(default=0)
+    blog_comments = models.IntegerField(default=0)
+    pending_comments = models.IntegerField(default=0)
+    approved_comments = models.IntegerField(default=0)
+    spam_comments = models.IntegerField(default=0)
+
+    # Events
+    total_events = models.IntegerField(default=0)
+    published_events = models.IntegerField(default=0)
+    draft_events = models.IntegerField(default=0)
+    upcoming_events = models.IntegerField(default=0)
+    total_registrations = models.IntegerField(default=0)
+
+    # Programs
+    total_programs = models.IntegerField(default=0)
+    total_modules = models.IntegerField(default=0)
+    total_sessions = models.IntegerField(default=0)
+    total_assignments = models.IntegerField(default=0)
+    total_materials = models.IntegerField(default=0)
+    total_feedbacks = models.IntegerField(default=0)
+    program_comments = models.IntegerField(default=0)
+
+    # Newsletter
+    total_newsletters = models.IntegerField(default=0)
+    total_subscribers = models.IntegerField(default=0)
+
+    recomputed_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Recomputed At')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Updated At')
+
+    SINGLETON_ID = 1
+
+    class Meta:
+        verbose_name = 'Dashboard Metrics'
+        verbose_name_plural = 'Dashboard Metrics'
+
+    def __str__(self):
+        return f'Dashboard metrics ({self.updated_at})'
+
+    @classmethod
+    def increment(cls, deltas):
+        """Apply {field: delta} to the snapshot row atomically."""
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if deltas:
+            cls.objects.filter(pk=cls.SINGLETON_ID).update(
+                **{field: F(field) + delta for field, delta in deltas.items()})
+
+    def as_context(self):
+        """Return the metrics grouped the way the index template expects."""
+        context = {}
+        for metric in METRICS:
+            context.setdefault(metric.group, {})[metric.key] = getattr(
+                self, metric.field)
+        return context
+
+
+class ExportJob(models.Model):
+    """
+    A data export built in the background by a Django-Q task.
+
+    The request only creates the job; run_export_job writes the file under
+    MEDIA_ROOT/exports/ and records its progress so the dashboard can poll
+    it and serve the finished file.
+    """
+    kind = models.CharField(
+        max_length=30, choices=EXPORT_JOB_KIND_CHOICES, verbose_name='Kind')
+    format = models.CharField(
+        max_length=10, choices=EXPORT_FORMAT_CHOICES, verbose_name='Format')
+    # Filters of the export, e.g. {"survey_id": 3} or {"event_id": 7}
+    params = models.JSONField(default=dict, blank=True, verbose_name='Params')
+    status = models.CharField(
+        max_length=10,
+        choices=EXPORT_JOB_STATUS_CHOICES,
+        default='pending',
+        verbose_name='Status'
+    )
+    total_rows = models.PositiveIntegerField(
+        default=0, verbose_name='Total Rows')
+    processed_rows = models.PositiveIntegerField(
+        default=0, verbose_name='Processed Rows')
+    file = models.FileField(
+        upload_to='exports/', blank=True, verbose_name='File')
+    error = models.TextField(blank=True, verbose_name='Error')
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='export_jobs',
+        verbose_name='Created By'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name='Created At')
+    started_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Started At')
+    finished_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Finished At')
+
+    class Meta:
+        verbose_name = 'Export Job'
+        verbose_name_plural = 'Export Jobs'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.get_kind_display()} ({self.get_format_display()}) - {self.get_status_display()}'
+
+    @property
+    def progress(self):
+        """Completion percentage of the job."""
+        if self.status == 'completed':
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, int(self.processed_rows * 100 / self.total_rows))
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
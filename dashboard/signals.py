@@ -0,0 +1,100 @@
+"""
+Keep DashboardMetrics current: every save or delete of a tracked model is
+turned into F() increments of the snapshot row, applied in the same
+transaction as the write. Metrics that are not incremental (total_views)
+are only refreshed by the periodic recompute.
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django_q.tasks import async_task
+from .metrics import metrics_by_model
+from .models import DashboardMetrics
+
+MISSING = object()
+
+# {model class: (metrics, source fields)}
+TRACKED_MODELS = {}
+
+
+def snapshot(instance, fields):
+    # Read __dict__ so deferred fields never trigger a query
+    return {field: instance.__dict__.get(field, MISSING) for field in fields}
+
+
+def contribution(metric, values):
+    """Value of a row for a metric, or None if a needed field is unknown."""
+    if values is None or any(values[field] is MISSING for field in metric.source_fields):
+        return None
+    return metric.value(values)
+
+
+def schedule_recompute():
+    transaction.on_commit(
+        lambda: async_task('dashboard.tasks.recompute_dashboard_metrics'))
+
+
+def remember_metric_values(sender, instance, **kwargs):
+    """Remember the values the metrics depend on as loaded from the DB."""
+    instance._metric_values = snapshot(instance, TRACKED_MODELS[sender][1])
+
+
+def update_metrics_on_save(sender, instance, created, raw=False, **kwargs):
+    """Apply the difference between the saved row and its previous state."""
+    if raw:
+        return
+
+    metrics, fields = TRACKED_MODELS[sender]
+    before = None if created else getattr(instance, '_metric_values', None)
+    after = snapshot(instance, fields)
+    instance._metric_values = after
+
+    deltas = {}
+    stale = False
+    for metric in metrics:
+        new = contribution(metric, after)
+        old = 0 if created else contribution(metric, before)
+        if new is None or old is None:
+            stale = True
+            continue
+        deltas[metric.field] = new - old
+
+    DashboardMetrics.increment(deltas)
+    if stale:
+        schedule_recompute()
+
+
+def update_metrics_on_delete(sender, instance, **kwargs):
+    """Remove the contribution of a deleted row."""
+    metrics, _ = TRACKED_MODELS[sender]
+    before = getattr(instance, '_metric_values', None)
+
+    deltas = {}
+    stale = False
+    for metric in metrics:
+        old = contribution(metric, before)
+        if old is None:
+            stale = True
+            continue
+        deltas[metric.field] = -old
+
+    DashboardMetrics.increment(deltas)
+    if stale:
+        schedule_recompute()
+
+
+def connect_metric_signals():
+    for label, metrics in metrics_by_model(incremental_only=True).items():
+        model = apps.get_model(label)
+        fields = set().union(*(metric.source_fields for metric in metrics))
+        TRACKED_MODELS[model] = (metrics, fields)
+
+        post_init.connect(remember_metric_values, sender=model,
+                          dispatch_uid=f'dashboard_metrics_init_{label}')
+        post_save.connect(update_metrics_on_save, sender=model,
+                          dispatch_uid=f'dashboard_metrics_save_{label}')
+        post_delete.connect(update_metrics_on_delete, sender=model,
+                            dispatch_uid=f'dashboard_metrics_delete_{label}')
+
+
+connect_metric_signals()
@@ -1,3 +1,213 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from unittest.mock import patch
 
-# Create your tests here.
+from blog.models import Category, Post
+from constants.constant import UserRoles
+from events.models import Event, Registration
+from newsletter.models import Subscriber
+from .models import DashboardMetrics, ExportJob
+from .tasks import (
+    compute_dashboard_metrics, recompute_dashboard_metrics, run_export_job
+)
+
+User = get_user_model()
+
+
+@patch('dashboard.signals.async_task')
+class DashboardMetricsTests(TestCase):
+    """Test cases for the dashboard metrics snapshot."""
+
+    def setUp(self):
+        self.manager = User.objects.create_user(
+            email='manager@example.com', password='testpass123',
+            role=UserRoles.MANAGER)
+        self.category = Category.objects.create(name='Filosofía')
+
+    def create_post(self, title, **kwargs):
+        return Post.objects.create(
+            title=title, introduction='Intro', body='Contenido',
+            author=self.manager, category=self.category, **kwargs)
+
+    def assert_snapshot_matches_tables(self):
+        metrics = DashboardMetrics.objects.get()
+        for field, value in compute_dashboard_metrics().items():
+            if field == 'total_views':
+                continue
+            self.assertEqual(getattr(metrics, field), value, field)
+
+    def test_total_views_sums_view_counts(self, mock_async_task):
+        """Test that total_views sums view_count instead of counting posts."""
+        self.create_post('Uno', view_count=10)
+        self.create_post('Dos', view_count=5)
+
+        metrics = recompute_dashboard_metrics()
+
+        self.assertEqual(metrics.total_views, 15)
+        self.assertEqual(metrics.total_posts, 2)
+
+    def test_signals_keep_snapshot_current(self, mock_async_task):
+        """Test that saves and deletes increment the snapshot row."""
+        recompute_dashboard_metrics()
+
+        post = self.create_post('Uno')
+        post.status = 'published'
+        post.save()
+        User.objects.create_user(
+            email='subscriber@example.com', password='testpass123',
+            role=UserRoles.SUBSCRIBER)
+        self.create_post('Dos').delete()
+
+        metrics = DashboardMetrics.objects.get()
+        self.assertEqual(metrics.published_posts, 1)
+        self.assertEqual(metrics.draft_posts, 0)
+        self.assertEqual(metrics.subscribers, 1)
+        self.assertEqual(metrics.total_subscribers, 1)
+        self.assert_snapshot_matches_tables()
+        mock_async_task.assert_not_called()
+
+    def test_post_views_do_not_touch_snapshot(self, mock_async_task):
+        """Test that a post view leaves total_views to the periodic recompute."""
+        recompute_dashboard_metrics()
+        post = self.create_post('Uno')
+
+        with CaptureQueriesContext(connection) as queries:
+            post.increment_view_count()
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(DashboardMetrics.objects.get().total_views, 0)
+        self.assertEqual(recompute_dashboard_metrics().total_views, 1)
+
+    def test_deferred_fields_schedule_recompute(self, mock_async_task):
+        """Test that a save with unknown previous values asks for a recompute."""
+        self.create_post('Uno')
+        post = Post.objects.defer('status').get()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.title = 'Nuevo'
+            post.save()
+
+        mock_async_task.assert_called_once_with(
+            'dashboard.tasks.recompute_dashboard_metrics')
+
+    def test_index_reads_snapshot(self, mock_async_task):
+        """Test that the index renders from the snapshot row."""
+        self.create_post('Uno')
+        recompute_dashboard_metrics()
+        self.client.force_login(self.manager)
+
+        response = self.client.get(reverse('dashboard:dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['blog_stats']['total_posts'], 1)
+        self.assertEqual(response.context['user_stats']['total_users'], 0)
+
+
+@patch('dashboard.views.export_views.async_task')
+class ExportJobTests(TestCase):
+    """Test cases for background export jobs."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.manager = User.objects.create_user(
+            email='manager@example.com', password='testpass123',
+            role=UserRoles.MANAGER)
+        self.client.force_login(self.manager)
+
+        start = timezone.now() + timedelta(days=7)
+        self.event = Event.objects.create(
+            title='Taller', description='Descripción', start_date=start,
+            end_date=start + timedelta(hours=2), event_type='online',
+            modality='free', max_capacity=10, status='published',
+            created_by=self.manager)
+        for i in range(3):
+            Registration.objects.create(
+                event=self.event, full_name=f'Participante {i}',
+                email=f'user{i}@example.com', phone='123456')
+
+    def create_job(self, mock_async_task, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('dashboard:export_job_create'), data)
+
+        job = ExportJob.objects.get()
+        self.assertRedirects(
+            response, reverse('dashboard:export_job_detail', args=[job.pk]))
+        mock_async_task.assert_called_once_with(
+            'dashboard.tasks.run_export_job', job.pk)
+        return job
+
+    def test_registration_export_builds_downloadable_file(self, mock_async_task):
+        """Test that the task writes the file and the dashboard serves it."""
+        job = self.create_job(
+            mock_async_task, kind='event_registrations', format='csv',
+            event_id=self.event.pk)
+        self.assertEqual(job.params, {'event_id': str(self.event.pk)})
+        response = self.client.get(
+            reverse('dashboard:export_job_detail', args=[job.pk]))
+        self.assertContains(
+            response, reverse('dashboard:export_job_status', args=[job.pk]))
+        self.assertContains(
+            self.client.get(reverse('dashboard:export_job_list')),
+            'Inscripciones a eventos')
+
+        self.assertTrue(run_export_job(job.pk))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual((job.processed_rows, job.total_rows), (3, 3))
+        self.assertTrue(job.file.name.startswith('exports/'))
+
+        status = self.client.get(
+            reverse('dashboard:export_job_status', args=[job.pk])).json()
+        self.assertEqual(status['progress'], 100)
+
+        response = self.client.get(status['download_url'])
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertIn('user2@example.com', lines[3])
+
+    def test_job_runs_only_once(self, mock_async_task):
+        """Test that a job delivered twice is only built once."""
+        Subscriber.objects.create(user=self.manager)
+        job = self.create_job(
+            mock_async_task, kind='newsletter_subscribers', format='csv')
+
+        self.assertTrue(run_export_job(job.pk))
+        self.assertFalse(run_export_job(job.pk))
+
+    def test_failed_job_records_error(self, mock_async_task):
+        """Test that a failing export is marked failed and not downloadable."""
+        job = self.create_job(
+            mock_async_task, kind='survey_results', format='csv',
+            survey_id=999)
+
+        self.assertFalse(run_export_job(job.pk))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertTrue(job.error)
+        response = self.client.get(
+            reverse('dashboard:export_job_download', args=[job.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_unknown_format_is_rejected(self, mock_async_task):
+        """Test that formats an export does not support create no job."""
+        response = self.client.post(
+            reverse('dashboard:export_job_create'),
+            {'kind': 'newsletter_subscribers', 'format': 'pdf'})
+
+        self.assertRedirects(response, reverse('dashboard:export_job_list'))
+        self.assertFalse(ExportJob.objects.exists())
@@ -6,6 +6,7 @@ from .program_urls import urlpatterns as program_urls
 from .newsletter_urls import urlpatterns as newsletter_urls
 from .dashboard_urls import urlpatterns as dashboard_urls
 from .event_urls import urlpatterns as event_urls
+from .export_urls import urlpatterns as export_urls
 
 app_name = "dashboard"
 
@@ -16,3 +17,4 @@ urlpatterns.extend(program_urls)
 urlpatterns.extend(newsletter_urls)
 urlpatterns.extend(dashboard_urls)
 urlpatterns.extend(event_urls)
+urlpatterns.extend(export_urls)
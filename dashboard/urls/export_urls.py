@@ -0,0 +1,15 @@
+from django.urls import path
+from dashboard.views.export_views import (
+    export_job_list, export_job_create, export_job_detail, export_job_status,
+    export_job_download,
+)
+
+urlpatterns = [
+    path("exportaciones/", export_job_list, name="export_job_list"),
+    path("exportaciones/crear/", export_job_create, name="export_job_create"),
+    path("exportaciones/<int:pk>/", export_job_detail, name="export_job_detail"),
+    path("exportaciones/<int:pk>/estado/",
+         export_job_status, name="export_job_status"),
+    path("exportaciones/<int:pk>/descargar/",
+         export_job_download, name="export_job_download"),
+]
@@ -2,5 +2,6 @@ from .user_views import *
 from .blog_views import *
 from .program_views import *
 from .event_views import *
+from .export_views import *
 from .newsletter_views import *
 from .dashboard_views import *
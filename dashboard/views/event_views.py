@@ -1,14 +1,21 @@
-import csv
-import io
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import HttpResponse
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q, Count
 from django.utils import timezone
 from constants.constant import manager_required
-from events.models import Event, Category, PaymentMethod, Registration, Payment, Survey, SurveyResponse
+from events.models import Event, Category, PaymentMethod, Registration, Survey
 from events.forms import EventForm, CategoryForm, PaymentMethodForm, SurveyForm, SurveyQuestionFormSet, SurveyQuestionOptionFormSet
+from events.utils import (
+    send_registration_approved_email, send_registration_rejected_email,
+    create_survey_responses_for_event, enqueue_survey_invitations,
+    get_event_statistics, get_survey_analysis
+)
+from dashboard.exports import (
+    streaming_csv_response, timestamped_filename, survey_csv_rows,
+    survey_wide_csv_rows
+)
+from .export_views import start_export_job
 
 # ===== VISTAS DE EVENTOS (GESTIÓN) =====
 
@@ -511,69 +518,7 @@ def event_statistics(request):
     """
     Estadísticas generales de eventos.
     """
-    # Estadísticas de eventos
-    total_events = Event.objects.count()
-    published_events = Event.objects.filter(status='published').count()
-    upcoming_events = Event.objects.filter(
-        start_date__gt=timezone.now()).count()
-    finished_events = Event.objects.filter(end_date__lt=timezone.now()).count()
-
-    # Estadísticas de inscripciones
-    total_registrations = Registration.objects.count()
-    pending_registrations = Registration.objects.filter(
-        status='pending').count()
-    accepted_registrations = Registration.objects.filter(
-        status='accepted').count()
-
-    # Estadísticas de pagos
-    total_payments = Payment.objects.count()
-    pending_payments = Payment.objects.filter(status='pending').count()
-    verified_payments = Payment.objects.filter(status='verified').count()
-
-    # Estadísticas de encuestas
-    total_surveys = Survey.objects.count()
-    active_surveys = Survey.objects.filter(status='active').count()
-    total_survey_responses = SurveyResponse.objects.count()
-    completed_survey_responses = SurveyResponse.objects.filter(
-        status='completed').count()
-    events_with_surveys = Event.objects.filter(survey__isnull=False).count()
-
-    # Eventos más populares
-    popular_events = Event.objects.annotate(
-        registration_count=Count('registrations')
-    ).order_by('-registration_count')[:5]
-
-    # Categorías más populares
-    popular_categories = Category.objects.annotate(
-        annotated_event_count=Count('events')
-    ).order_by('-annotated_event_count')[:5]
-
-    # Encuestas más activas
-    active_survey_list = Survey.objects.filter(status='active').annotate(
-        response_count=Count('responses', filter=Q(
-            responses__status='completed'))
-    ).order_by('-response_count')[:5]
-
-    context = {
-        'total_events': total_events,
-        'published_events': published_events,
-        'upcoming_events': upcoming_events,
-        'finished_events': finished_events,
-        'total_registrations': total_registrations,
-        'pending_registrations': pending_registrations,
-        'accepted_registrations': accepted_registrations,
-        'total_payments': total_payments,
-        'pending_payments': pending_payments,
-        'verified_payments': verified_payments,
-        'total_surveys': total_surveys,
-        'active_surveys': active_surveys,
-        'total_survey_responses': total_survey_responses,
-        'completed_survey_responses': completed_survey_responses,
-        'events_with_surveys': events_with_surveys,
-        'popular_events': popular_events,
-        'popular_categories': popular_categories,
-        'active_survey_list': active_survey_list,
-    }
+    context = get_event_statistics()
 
     return render(request, 'dashboard/events/statistics.html', context)
 
@@ -818,69 +763,10 @@ def survey_results(request, pk):
     """
     Ver resultados de una encuesta.
     """
-    survey = get_object_or_404(
-        Survey.objects.prefetch_related(
-            'questions__options', 'responses__question_responses'),
-        pk=pk
-    )
+    survey = get_object_or_404(Survey, pk=pk)
 
-    # Estadísticas generales
-    total_responses = survey.responses.filter(status='completed').count()
-
-    # Análisis por pregunta
-    question_analysis = []
-    for question in survey.questions.all():
-        responses = question.responses.filter(
-            survey_response__status='completed')
-
-        if question.question_type == 'text':
-            # Para preguntas de texto, mostrar algunas respuestas de ejemplo
-            text_responses = responses.exclude(text_response='')[:5]
-            analysis = {
-                'question': question,
-                'type': 'text',
-                'response_count': responses.count(),
-                'sample_responses': text_responses,
-            }
-
-        elif question.question_type == 'scale':
-            # Para escalas, calcular promedio y distribución
-            scale_responses = responses.exclude(scale_response__isnull=True)
-            if scale_responses.exists():
-                avg_rating = sum(
-                    r.scale_response for r in scale_responses) / scale_responses.count()
-                distribution = {}
-                for i in range(1, 6):
-                    distribution[i] = scale_responses.filter(
-                        scale_response=i).count()
-            else:
-                avg_rating = 0
-                distribution = {i: 0 for i in range(1, 6)}
-
-            analysis = {
-                'question': question,
-                'type': 'scale',
-                'response_count': responses.count(),
-                'average_rating': round(avg_rating, 2),
-                'distribution': distribution,
-            }
-
-        elif question.question_type == 'multiple_choice':
-            # Para opciones múltiples, contar cada opción
-            option_counts = {}
-            for option in question.options.all():
-                count = option.responses.filter(
-                    survey_response__status='completed').count()
-                option_counts[option.text] = count
-
-            analysis = {
-                'question': question,
-                'type': 'multiple_choice',
-                'response_count': responses.count(),
-                'option_counts': option_counts,
-            }
-
-        question_analysis.append(analysis)
+    # Análisis por pregunta con un número fijo de consultas
+    total_responses, question_analysis = get_survey_analysis(survey)
 
     context = {
         'survey': survey,
@@ -896,258 +782,28 @@ def survey_export(request, pk):
     """
     Exportar resultados de encuesta en diferentes formatos.
     """
-    survey = get_object_or_404(
-        Survey.objects.prefetch_related(
-            'questions__options', 'responses__question_responses'),
-        pk=pk
-    )
+    survey = get_object_or_404(Survey, pk=pk)
 
     format_type = request.GET.get('format', 'csv')
 
+    # Los CSV se generan en streaming; Excel y PDF se construyen en segundo plano
     if format_type == 'csv':
-        return export_survey_csv(survey)
-    elif format_type == 'excel':
-        return export_survey_excel(survey)
-    elif format_type == 'pdf':
-        return export_survey_pdf(survey)
+        return streaming_csv_response(
+            survey_csv_rows(survey),
+            timestamped_filename(f'encuesta_{survey.pk}', 'csv'))
+    elif format_type == 'wide':
+        return streaming_csv_response(
+            survey_wide_csv_rows(survey),
+            timestamped_filename(f'encuesta_{survey.pk}_participantes', 'csv'))
+    elif format_type in ('excel', 'pdf'):
+        job = start_export_job(
+            request, 'survey_results', format_type, {'survey_id': survey.pk})
+        return redirect('dashboard:export_job_detail', pk=job.pk)
     else:
         messages.error(request, 'Formato de exportación no válido.')
         return redirect('dashboard:survey_results', pk=pk)
 
 
-def export_survey_csv(survey):
-    """
-    Exportar resultados de encuesta a CSV.
-    """
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="encuesta_{survey.pk}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-
-    writer = csv.writer(response)
-
-    # Encabezados
-    headers = ['Pregunta', 'Tipo', 'Respuesta', 'Participante', 'Fecha']
-    writer.writerow(headers)
-
-    # Datos
-    for question in survey.questions.all():
-        responses = question.responses.filter(
-            survey_response__status='completed')
-
-        for response in responses:
-            if question.question_type == 'text':
-                value = response.text_response
-            elif question.question_type == 'scale':
-                value = f"{response.scale_response}/5"
-            elif question.question_type == 'multiple_choice':
-                value = response.selected_option.text if response.selected_option else ''
-            else:
-                value = ''
-
-            writer.writerow([
-                question.text,
-                question.get_question_type_display(),
-                value,
-                response.survey_response.registration.full_name,
-                response.created_at.strftime('%d/%m/%Y %H:%M')
-            ])
-
-    return response
-
-
-def export_survey_excel(survey):
-    """
-    Exportar resultados de encuesta a Excel.
-    """
-    try:
-        import openpyxl
-        from openpyxl.styles import Font, Alignment, PatternFill
-    except ImportError:
-        # Si no está instalado openpyxl, redirigir a CSV
-        return export_survey_csv(survey)
-
-    # Crear workbook
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Resultados de Encuesta"
-
-    # Estilos
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="366092",
-                              end_color="366092", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center")
-
-    # Encabezados
-    headers = ['Pregunta', 'Tipo', 'Respuesta',
-               'Participante', 'Email', 'Fecha']
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-
-    # Datos
-    row = 2
-    for question in survey.questions.all():
-        responses = question.responses.filter(
-            survey_response__status='completed')
-
-        for response in responses:
-            if question.question_type == 'text':
-                value = response.text_response
-            elif question.question_type == 'scale':
-                value = f"{response.scale_response}/5"
-            elif question.question_type == 'multiple_choice':
-                value = response.selected_option.text if response.selected_option else ''
-            else:
-                value = ''
-
-            ws.cell(row=row, column=1, value=question.text)
-            ws.cell(row=row, column=2, value=question.get_question_type_display())
-            ws.cell(row=row, column=3, value=value)
-            ws.cell(row=row, column=4,
-                    value=response.survey_response.registration.full_name)
-            ws.cell(row=row, column=5,
-                    value=response.survey_response.registration.email)
-            ws.cell(row=row, column=6,
-                    value=response.created_at.strftime('%d/%m/%Y %H:%M'))
-            row += 1
-
-    # Ajustar ancho de columnas
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
-
-    # Guardar
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="encuesta_{survey.pk}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
-
-    wb.save(response)
-    return response
-
-
-def export_survey_pdf(survey):
-    """
-    Exportar resultados de encuesta a PDF.
-    """
-    try:
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.lib import colors
-    except ImportError:
-        # Si no está instalado reportlab, redirigir a CSV
-        return export_survey_csv(survey)
-
-    # Crear buffer para el PDF
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    story = []
-
-    # Estilos
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        spaceAfter=30,
-        alignment=1  # Centrado
-    )
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=12,
-        spaceBefore=20
-    )
-    normal_style = styles['Normal']
-
-    # Título
-    story.append(
-        Paragraph(f"Resultados de Encuesta: {survey.title}", title_style))
-    story.append(Spacer(1, 20))
-
-    # Información general
-    total_responses = survey.responses.filter(status='completed').count()
-    story.append(Paragraph(
-        f"<b>Total de respuestas completadas:</b> {total_responses}", normal_style))
-    story.append(Paragraph(
-        f"<b>Total de preguntas:</b> {survey.questions.count()}", normal_style))
-    story.append(Paragraph(
-        f"<b>Fecha de exportación:</b> {datetime.now().strftime('%d/%m/%Y %H:%M')}", normal_style))
-    story.append(Spacer(1, 20))
-
-    # Resultados por pregunta
-    for question in survey.questions.all():
-        story.append(Paragraph(f"<b>{question.text}</b>", heading_style))
-        story.append(
-            Paragraph(f"Tipo: {question.get_question_type_display()}", normal_style))
-
-        responses = question.responses.filter(
-            survey_response__status='completed')
-
-        if question.question_type == 'text':
-            # Mostrar algunas respuestas de texto
-            text_responses = responses.exclude(text_response='')[:3]
-            for response in text_responses:
-                story.append(
-                    Paragraph(f"• {response.text_response[:200]}...", normal_style))
-                story.append(Paragraph(
-                    f"  <i>Por: {response.survey_response.registration.full_name}</i>", normal_style))
-
-        elif question.question_type == 'scale':
-            # Estadísticas de escala
-            scale_responses = responses.exclude(scale_response__isnull=True)
-            if scale_responses.exists():
-                avg_rating = sum(
-                    r.scale_response for r in scale_responses) / scale_responses.count()
-                story.append(
-                    Paragraph(f"Promedio: {avg_rating:.2f}/5", normal_style))
-
-                # Distribución
-                distribution = {}
-                for i in range(1, 6):
-                    distribution[i] = scale_responses.filter(
-                        scale_response=i).count()
-
-                for rating, count in distribution.items():
-                    story.append(
-                        Paragraph(f"{rating} estrellas: {count} respuestas", normal_style))
-
-        elif question.question_type == 'multiple_choice':
-            # Conteo de opciones
-            option_counts = {}
-            for option in question.options.all():
-                count = option.responses.filter(
-                    survey_response__status='completed').count()
-                option_counts[option.text] = count
-
-            for option_text, count in option_counts.items():
-                story.append(
-                    Paragraph(f"• {option_text}: {count} respuestas", normal_style))
-
-        story.append(Spacer(1, 15))
-
-    # Construir PDF
-    doc.build(story)
-    buffer.seek(0)
-
-    response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="encuesta_{survey.pk}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf"'
-
-    return response
-
-
 @manager_required
 def send_surveys(request, event_pk):
     """
@@ -1166,23 +822,12 @@ def send_surveys(request, event_pk):
         return redirect('dashboard:event_detail', pk=event.pk)
 
     if request.method == 'POST':
-        # Crear respuestas de encuesta para participantes
-        created_count = create_survey_responses_for_event(event)
-
-        # Obtener las respuestas creadas y enviar emails
-        survey_responses = SurveyResponse.objects.filter(
-            survey=event.survey,
-            event=event,
-            status='sent'
-        )
-
-        sent_count = 0
-        for survey_response in survey_responses:
-            if send_survey_invitation_email(survey_response):
-                sent_count += 1
+        # Crear respuestas de encuesta para participantes y encolar el envío
+        survey_response_ids = create_survey_responses_for_event(event)
+        enqueue_survey_invitations(survey_response_ids)
 
         messages.success(
-            request, f'Se enviaron {sent_count} encuestas exitosamente.')
+            request, f'Se están enviando {len(survey_response_ids)} encuestas.')
         return redirect('dashboard:event_detail', pk=event.pk)
 
     # Mostrar vista previa de envío
@@ -0,0 +1,132 @@
+import os
+from django.shortcuts import render, get_object_or_404, redirect
+from django.http import FileResponse, Http404, JsonResponse
+from django.contrib import messages
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.urls import reverse
+from django_q.tasks import async_task
+from constants.constant import manager_required
+from dashboard.exports import EXPORTS
+from dashboard.models import ExportJob
+
+# Campos del formulario que se guardan como parámetros de la exportación
+EXPORT_PARAM_FIELDS = ('survey_id', 'event_id', 'status', 'subscribed_only')
+
+
+def start_export_job(request, kind, format_type, params):
+    """
+    Crear una exportación y encolar su construcción en Django-Q.
+    La tarea se encola al confirmar la transacción, cuando el trabajo ya
+    es visible para el worker.
+    """
+    job = ExportJob.objects.create(
+        kind=kind,
+        format=format_type,
+        params=params,
+        created_by=request.user
+    )
+    transaction.on_commit(
+        lambda: async_task('dashboard.tasks.run_export_job', job.pk))
+    return job
+
+
+# ===== VISTAS DE EXPORTACIONES =====
+
+@manager_required
+def export_job_list(request):
+    """
+    Lista de exportaciones recientes.
+    """
+    jobs = ExportJob.objects.select_related('created_by')
+
+    paginator = Paginator(jobs, 20)
+    page_number = request.GET.get('page')
+    page_obj = paginator.get_page(page_number)
+
+    context = {
+        'jobs': page_obj,
+    }
+
+    return render(request, 'dashboard/exports/job_list.html', context)
+
+
+@manager_required
+def export_job_create(request):
+    """
+    Crear una exportación en segundo plano a partir de un formulario.
+    """
+    if request.method != 'POST':
+        return redirect('dashboard:export_job_list')
+
+    kind = request.POST.get('kind')
+    format_type = request.POST.get('format', 'csv')
+
+    export_class = EXPORTS.get(kind)
+    if export_class is None or format_type not in export_class.formats:
+        messages.error(request, 'Exportación no válida.')
+        return redirect('dashboard:export_job_list')
+
+    params = {
+        field: request.POST[field]
+        for field in EXPORT_PARAM_FIELDS if request.POST.get(field)
+    }
+
+    job = start_export_job(request, kind, format_type, params)
+    messages.success(
+        request, 'La exportación se está generando. Podrás descargarla en cuanto termine.')
+    return redirect('dashboard:export_job_detail', pk=job.pk)
+
+
+@manager_required
+def export_job_detail(request, pk):
+    """
+    Ver el progreso de una exportación y descargarla al terminar.
+    """
+    job = get_object_or_404(ExportJob, pk=pk)
+
+    context = {
+        'job': job,
+    }
+
+    return render(request, 'dashboard/exports/job_detail.html', context)
+
+
+@manager_required
+def export_job_status(request, pk):
+    """
+    Estado de una exportación en JSON, para el sondeo desde la página.
+    """
+    job = get_object_or_404(ExportJob, pk=pk)
+
+    return JsonResponse({
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'progress': job.progress,
+        'processed_rows': job.processed_rows,
+        'total_rows': job.total_rows,
+        'error': job.error,
+        'download_url': reverse('dashboard:export_job_download', args=[job.pk])
+        if job.status == 'completed' else None,
+    })
+
+
+@manager_required
+def export_job_download(request, pk):
+    """
+    Descargar el archivo de una exportación terminada.
+    Los archivos contienen datos personales, así que se sirven desde aquí
+    y no desde la URL pública de media.
+    """
+    job = get_object_or_404(ExportJob, pk=pk)
+
+    if job.status != 'completed' or not job.file:
+        raise Http404('La exportación no está disponible.')
+
+    try:
+        file = job.file.open('rb')
+    except FileNotFoundError:
+        raise Http404('El archivo de la exportación ya no existe.')
+
+    return FileResponse(
+        file, as_attachment=True, filename=os.path.basename(job.file.name))
@@ -10,7 +10,7 @@ from dashboard.forms import (
     AssignmentForm, FinalFeedbackForm, FeedbackQuestionForm
 )
 from programs.models import (
-    Program, Module, Session, Material, Assignment,
+    Program, Module, Session, Material, Assignment, ModuleProgress,
     FinalFeedback, FeedbackQuestion, FeedbackResponse, Comment
 )
 
@@ -64,8 +64,7 @@ class ProgramDetailView(DetailView):
         context = super().get_context_data(**kwargs)
         context['modules'] = self.object.modules.prefetch_related(
             'sessions').order_by('order')
-        context['total_sessions'] = sum(
-            module.sessions.count() for module in self.object.modules.all())
+        context['total_sessions'] = self.object.session_count
         context['assignments_count'] = self.object.assignments.count()
         return context
 
@@ -132,8 +131,7 @@ class ModuleListView(ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['program'] = self.program
-        context['total_sessions'] = sum(
-            module.sessions.count() for module in self.object_list)
+        context['total_sessions'] = self.program.session_count
         return context
 
 
@@ -426,7 +424,8 @@ class AssignmentListView(ListView):
     paginate_by = 20
 
     def get_queryset(self):
-        return Assignment.objects.select_related('student', 'program').order_by('-assigned_at')
+        return Assignment.objects.select_related('student', 'program').prefetch_related(
+            ModuleProgress.prefetch()).order_by('-assigned_at')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
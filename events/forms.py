@@ -1,9 +1,11 @@
 from django import forms
+from django.db import transaction
 from django.forms import inlineformset_factory
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from constants import form_styles
-from .models import Event, Category, PaymentMethod, Registration, Payment, Survey, SurveyQuestion, SurveyQuestionOption, SurveyQuestionResponse
+from .models import Event, Category, PaymentMethod, Registration, Payment, Survey, SurveyQuestion, SurveyQuestionOption, SurveyResponse, SurveyQuestionResponse
+from .utils import get_survey_schema
 
 
 class EventForm(forms.ModelForm):
@@ -411,13 +413,20 @@ class SurveyResponseForm(forms.Form):
         super().__init__(*args, **kwargs)
         self.survey_response = survey_response
 
+        # El esquema cacheado evita consultar preguntas y opciones; se
+        # reutiliza al guardar
+        self.questions = {
+            question['id']: question
+            for question in get_survey_schema(survey_response.survey)
+        }
+
         # Crear campos dinámicos para cada pregunta
-        for question in survey_response.survey.questions.all():
-            field_name = f'question_{question.id}'
+        for question in self.questions.values():
+            field_name = f'question_{question["id"]}'
 
-            if question.question_type == 'text':
+            if question['question_type'] == 'text':
                 self.fields[field_name] = forms.CharField(
-                    required=question.required,
+                    required=question['required'],
                     widget=forms.Textarea(attrs={
                         'class': form_styles.BASE_TEXTAREA,
                         'rows': 3,
@@ -425,53 +434,70 @@ class SurveyResponseForm(forms.Form):
                     })
                 )
 
-            elif question.question_type == 'scale':
+            elif question['question_type'] == 'scale':
                 self.fields[field_name] = forms.ChoiceField(
-                    required=question.required,
+                    required=question['required'],
                     choices=[(i, str(i)) for i in range(1, 6)],
                     widget=forms.RadioSelect(attrs={'class': 'space-y-2'})
                 )
 
-            elif question.question_type == 'multiple_choice':
-                choices = [(option.id, option.text)
-                           for option in question.options.all()]
+            elif question['question_type'] == 'multiple_choice':
                 self.fields[field_name] = forms.ChoiceField(
-                    required=question.required,
-                    choices=choices,
+                    required=question['required'],
+                    choices=question['options'],
                     widget=forms.RadioSelect(attrs={'class': 'space-y-2'})
                 )
 
             # Agregar label personalizado
-            self.fields[field_name].label = question.text
-            if question.required:
+            self.fields[field_name].label = question['text']
+            if question['required']:
                 self.fields[field_name].label += ' *'
 
     def save(self):
-        """Guarda las respuestas a la base de datos."""
-        for field_name, value in self.cleaned_data.items():
-            if field_name.startswith('question_'):
-                question_id = int(field_name.split('_')[1])
-                question = SurveyQuestion.objects.get(id=question_id)
-
-                # Crear o actualizar la respuesta
-                response, created = SurveyQuestionResponse.objects.get_or_create(
-                    survey_response=self.survey_response,
-                    question=question
-                )
+        """
+        Guarda las respuestas a la base de datos.
 
-                # Guardar el valor según el tipo de pregunta
-                if question.question_type == 'text':
-                    response.text_response = value
-                elif question.question_type == 'scale':
-                    response.scale_response = int(value)
-                elif question.question_type == 'multiple_choice':
-                    response.selected_option = SurveyQuestionOption.objects.get(
-                        id=int(value))
+        Todas las respuestas se construyen en memoria y se insertan con un
+        solo bulk_create, dentro de la misma transacción que marca la
+        encuesta como completada.
 
-                response.save()
+        Returns:
+            bool: False si la encuesta ya estaba completada
+        """
+        answers = []
+        for field_name, value in self.cleaned_data.items():
+            if not field_name.startswith('question_'):
+                continue
+            question = self.questions[int(field_name.split('_')[1])]
+            answer = SurveyQuestionResponse(
+                survey_response=self.survey_response,
+                question_id=question['id']
+            )
 
-        # Marcar la encuesta como completada
-        self.survey_response.mark_completed()
+            # Guardar el valor según el tipo de pregunta
+            if question['question_type'] == 'text':
+                answer.text_response = value
+            elif question['question_type'] == 'scale' and value:
+                answer.scale_response = int(value)
+            elif question['question_type'] == 'multiple_choice' and value:
+                # El ChoiceField ya validó que la opción es de la pregunta
+                answer.selected_option_id = int(value)
+
+            answers.append(answer)
+
+        with transaction.atomic():
+            # El bloqueo evita que dos envíos simultáneos mezclen respuestas
+            status = SurveyResponse.objects.select_for_update().values_list(
+                'status', flat=True).get(pk=self.survey_response.pk)
+            if status == 'completed':
+                return False
+
+            # Respuestas de un envío anterior que no llegó a completarse
+            self.survey_response.question_responses.all().delete()
+            SurveyQuestionResponse.objects.bulk_create(answers)
+
+            # Marcar la encuesta como completada
+            return self.survey_response.mark_completed()
 
 
 class EventSurveyForm(forms.ModelForm):
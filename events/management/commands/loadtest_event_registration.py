@@ -0,0 +1,106 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection
+from django.utils import timezone
+
+from events.models import Event, Registration
+from events.utils import allocate_seat
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire concurrent registrations at a throwaway event through '
+        'allocate_seat() and fail if the event ends up overbooked. '
+        'Run it against the real database engine (SQLite/MySQL); the event, '
+        'its registrations and the helper user are deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--registrations', type=int, default=200)
+        parser.add_argument('--capacity', type=int, default=20)
+        parser.add_argument('--workers', type=int, default=16)
+        parser.add_argument(
+            '--duplicates', type=int, default=10,
+            help='Registrations that reuse an email already used by another.')
+
+    def handle(self, *args, **options):
+        total = options['registrations']
+        capacity = options['capacity']
+        duplicates = min(options['duplicates'], total)
+
+        run_id = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(
+            email=f'loadtest-{run_id}@example.com',
+            password=uuid.uuid4().hex)
+        start = timezone.now() + timedelta(days=30)
+        event = Event.objects.create(
+            title=f'Load test {run_id}',
+            description='Evento temporal de prueba de carga',
+            start_date=start,
+            end_date=start + timedelta(hours=1),
+            event_type='online',
+            modality='free',
+            max_capacity=capacity,
+            status='published',
+            created_by=user,
+        )
+
+        emails = [f'attendee-{i}@{run_id}.example.com'
+                  for i in range(total - duplicates)]
+        emails += emails[:duplicates]
+
+        results = {'registered': 0, 'duplicate': 0, 'error': 0}
+        lock = threading.Lock()
+
+        def register(email):
+            try:
+                registration = allocate_seat(Registration(
+                    event_id=event.pk, full_name='Load Test',
+                    email=email, phone='000'))
+                outcome = 'duplicate' if registration is None else 'registered'
+            except OperationalError:
+                # e.g. SQLite "database is locked" under heavy contention
+                outcome = 'error'
+            finally:
+                close_old_connections()
+                connection.close()
+            with lock:
+                results[outcome] += 1
+
+        try:
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                list(executor.map(register, emails))
+
+            event.refresh_from_db()
+            active = event.count_active_registrations()
+            waitlist = event.registrations.filter(status='waitlist').count()
+
+            self.stdout.write(
+                f"Requests: {total}, registered: {results['registered']}, "
+                f"duplicates rejected: {results['duplicate']}, "
+                f"errors: {results['error']}")
+            self.stdout.write(
+                f'Capacity: {capacity}, active: {active}, '
+                f'counter: {event.active_registrations}, waitlist: {waitlist}')
+
+            if active > capacity:
+                raise CommandError(
+                    f'Overbooked: {active} active registrations for {capacity} seats')
+            if active != event.active_registrations:
+                raise CommandError(
+                    f'Counter drift: counter says {event.active_registrations}, '
+                    f'database has {active}')
+            if results['duplicate'] < duplicates:
+                raise CommandError('Duplicate registrations were accepted')
+
+            self.stdout.write(self.style.SUCCESS('No overbooking detected.'))
+        finally:
+            event.delete()
+            user.delete()
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from events.models import Survey, SurveyQuestionStats
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the SurveyQuestionStats rollups from the completed survey '
+        'responses. Run it after deploying the rollups or to fix drift.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--survey', type=int, action='append', dest='surveys',
+            help='Only rebuild the given survey ID (repeatable).')
+
+    def handle(self, *args, **options):
+        surveys = Survey.objects.order_by('id')
+        if options['surveys']:
+            surveys = surveys.filter(id__in=options['surveys'])
+
+        for survey in surveys.iterator():
+            questions = SurveyQuestionStats.rebuild(survey)
+            self.stdout.write(f'{survey.title}: {questions} questions')
+
+        self.stdout.write(self.style.SUCCESS('Survey stats rebuilt.'))
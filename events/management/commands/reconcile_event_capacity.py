@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+
+from constants.constant import ACTIVE_REGISTRATION_STATUSES
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        'Recount the active registrations of every event and fix the '
+        'denormalized Event.active_registrations counter where it drifted. '
+        'Run it once on deploy to backfill the counter of existing events.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report drifted events without updating them.')
+
+    def handle(self, *args, **options):
+        events = Event.objects.annotate(
+            actual=Count(
+                'registrations',
+                filter=Q(registrations__status__in=ACTIVE_REGISTRATION_STATUSES)
+            )
+        ).only('id', 'title', 'active_registrations')
+
+        drifted = 0
+        for event in events.iterator():
+            if event.active_registrations == event.actual:
+                continue
+            drifted += 1
+            self.stdout.write(
+                f'{event.title}: {event.active_registrations} -> {event.actual}')
+            if not options['dry_run']:
+                # Only fix the row if no registration changed it meanwhile
+                Event.objects.filter(
+                    pk=event.pk, active_registrations=event.active_registrations
+                ).update(active_registrations=event.actual)
+
+        if options['dry_run']:
+            self.stdout.write(f'{drifted} events have drifted.')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Reconciled {drifted} events.'))
@@ -1,10 +1,13 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count
 from django.contrib.auth import get_user_model
 from django.utils.text import slugify
 from django.urls import reverse
+from core.counters import adjust_counter
 from constants.constant import (
     EVENT_STATUS_CHOICES, EVENT_TYPE_CHOICES, EVENT_MODALITY_CHOICES,
     PAYMENT_METHOD_TYPE_CHOICES, REGISTRATION_STATUS_CHOICES, PAYMENT_STATUS_CHOICES,
+    ACTIVE_REGISTRATION_STATUSES,
     SURVEY_QUESTION_TYPE_CHOICES, SURVEY_STATUS_CHOICES, SURVEY_RESPONSE_STATUS_CHOICES
 )
 
@@ -104,6 +107,14 @@ class Event(models.Model):
         verbose_name="Precio"
     )
     max_capacity = models.PositiveIntegerField(verbose_name="Cupo máximo")
+    # Inscripciones aceptadas + pendientes, mantenido por events.signals.
+    # Al crear la columna en una base existente, ejecutar
+    # reconcile_event_capacity para cargar el valor de cada evento
+    active_registrations = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Inscripciones activas"
+    )
     location = models.CharField(
         max_length=500,
         blank=True,
@@ -158,35 +169,44 @@ class Event(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        # El contador se actualiza solo con F(); un save() con una copia
+        # desactualizada del evento no debe pisarlo
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'active_registrations'
+            ]
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
         return reverse('events:event_detail', kwargs={'slug': self.slug})
 
+    @classmethod
+    def adjust_active_registrations(cls, event_id, delta):
+        """Suma delta al contador de inscripciones activas de forma atómica."""
+        return adjust_counter(
+            cls.objects.filter(pk=event_id), 'active_registrations', delta)
+
+    def count_active_registrations(self):
+        """Cuenta las inscripciones activas directamente en la base de datos."""
+        return self.registrations.filter(
+            status__in=ACTIVE_REGISTRATION_STATUSES
+        ).count()
+
     @property
     def is_full(self):
         """Verifica si el evento está lleno."""
-        # Contar inscripciones aceptadas y pendientes (excluyendo rechazadas y waitlist)
-        active_registrations = self.registrations.filter(
-            status__in=['accepted', 'pending']
-        ).count()
-        return active_registrations >= self.max_capacity
+        return self.active_registrations >= self.max_capacity
 
     @property
     def available_spots(self):
         """Retorna el número de cupos disponibles."""
-        # Contar inscripciones aceptadas y pendientes (excluyendo rechazadas y waitlist)
-        active_registrations = self.registrations.filter(
-            status__in=['accepted', 'pending']
-        ).count()
-        return max(0, self.max_capacity - active_registrations)
+        return max(0, self.max_capacity - self.active_registrations)
 
     @property
     def active_registrations_count(self):
         """Retorna el número total de inscripciones activas (aceptadas + pendientes)."""
-        return self.registrations.filter(
-            status__in=['accepted', 'pending']
-        ).count()
+        return self.active_registrations
 
     @property
     def is_finished(self):
@@ -406,6 +426,8 @@ class SurveyQuestion(models.Model):
     required = models.BooleanField(default=True, verbose_name="Obligatoria")
     created_at = models.DateTimeField(
         auto_now_add=True, verbose_name="Fecha de creación")
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name="Fecha de actualización")
 
     class Meta:
         verbose_name = "Pregunta de Encuesta"
@@ -437,6 +459,8 @@ class SurveyQuestionOption(models.Model):
     order = models.PositiveIntegerField(default=0, verbose_name="Orden")
     created_at = models.DateTimeField(
         auto_now_add=True, verbose_name="Fecha de creación")
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name="Fecha de actualización")
 
     class Meta:
         verbose_name = "Opción de Pregunta"
@@ -491,17 +515,36 @@ class SurveyResponse(models.Model):
         blank=True,
         verbose_name="Fecha de completado")
     expires_at = models.DateTimeField(verbose_name="Fecha de expiración")
+    reminder_sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Fecha de recordatorio")
 
     class Meta:
         verbose_name = "Respuesta de Encuesta"
         verbose_name_plural = "Respuestas de Encuesta"
         ordering = ['-sent_at']
         unique_together = ['survey', 'registration']
+        indexes = [
+            # Barrido de respuestas vencidas
+            models.Index(fields=['status', 'expires_at']),
+            # Recordatorios pendientes, por rango de fecha de envío
+            models.Index(fields=['status', 'reminder_sent_at', 'sent_at']),
+        ]
 
     def __str__(self):
         return f"Respuesta de {self.registration.full_name} - {self.survey.title}"
 
     def save(self, *args, **kwargs):
+        self.set_defaults()
+        super().save(*args, **kwargs)
+
+    def set_defaults(self):
+        """
+        Genera el token y la fecha de expiración si faltan. bulk_create no
+        llama a save(), así que quien cree respuestas en bloque debe
+        llamarlo antes.
+        """
         if not self.token:
             import secrets
             self.token = secrets.token_urlsafe(32)
@@ -511,8 +554,6 @@ class SurveyResponse(models.Model):
             from datetime import timedelta
             self.expires_at = timezone.now() + timedelta(hours=48)
 
-        super().save(*args, **kwargs)
-
     @property
     def is_expired(self):
         """Verifica si la respuesta ha expirado."""
@@ -528,11 +569,27 @@ class SurveyResponse(models.Model):
             self.save()
 
     def mark_completed(self):
-        """Marca la respuesta como completada."""
+        """
+        Marca la respuesta como completada y suma sus respuestas a los
+        resúmenes de cada pregunta.
+
+        Returns:
+            bool: False si la respuesta ya estaba completada
+        """
         from django.utils import timezone
-        self.completed_at = timezone.now()
-        self.status = 'completed'
-        self.save()
+        with transaction.atomic():
+            # El bloqueo evita sumar dos veces la misma respuesta
+            status = SurveyResponse.objects.select_for_update().values_list(
+                'status', flat=True).get(pk=self.pk)
+            if status == 'completed':
+                self.status = status
+                return False
+
+            self.completed_at = timezone.now()
+            self.status = 'completed'
+            self.save()
+            SurveyQuestionStats.apply_response(self)
+        return True
 
 
 class SurveyQuestionResponse(models.Model):
@@ -590,6 +647,124 @@ class SurveyQuestionResponse(models.Model):
         return None
 
 
+class SurveyQuestionStats(models.Model):
+    """
+    Resumen materializado de las respuestas completadas de una pregunta.
+    Se actualiza en SurveyResponse.mark_completed y se reconstruye con el
+    comando rebuild_survey_stats.
+    """
+    question = models.OneToOneField(
+        SurveyQuestion,
+        on_delete=models.CASCADE,
+        related_name='stats',
+        verbose_name="Pregunta"
+    )
+    response_count = models.PositiveIntegerField(
+        default=0, verbose_name="Respuestas")
+    scale_count = models.PositiveIntegerField(
+        default=0, verbose_name="Respuestas de escala")
+    scale_sum = models.PositiveIntegerField(
+        default=0, verbose_name="Suma de escala")
+    # {"valor de escala": conteo}
+    scale_histogram = models.JSONField(
+        default=dict, verbose_name="Distribución de escala")
+    # {"id de opción": conteo}
+    option_histogram = models.JSONField(
+        default=dict, verbose_name="Distribución de opciones")
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name="Última actualización")
+
+    class Meta:
+        verbose_name = "Resumen de Pregunta"
+        verbose_name_plural = "Resúmenes de Preguntas"
+
+    def __str__(self):
+        return f"Resumen de {self.question.text[:30]}"
+
+    @property
+    def average_rating(self):
+        """Promedio de las respuestas de escala."""
+        if not self.scale_count:
+            return 0
+        return round(self.scale_sum / self.scale_count, 2)
+
+    def add(self, scale_response, selected_option_id, count=1):
+        """Suma (o resta, con count negativo) una combinación de respuestas."""
+        self.response_count += count
+        if scale_response is not None:
+            self.scale_count += count
+            self.scale_sum += scale_response * count
+            key = str(scale_response)
+            self.scale_histogram[key] = self.scale_histogram.get(key, 0) + count
+        if selected_option_id is not None:
+            key = str(selected_option_id)
+            self.option_histogram[key] = self.option_histogram.get(
+                key, 0) + count
+
+    @classmethod
+    def apply_response(cls, survey_response, sign=1):
+        """
+        Suma (sign=1) o resta (sign=-1) las respuestas de una encuesta
+        completada a los resúmenes de sus preguntas.
+        """
+        answers = list(survey_response.question_responses.values_list(
+            'question_id', 'scale_response', 'selected_option_id'))
+        if not answers:
+            return
+
+        from django.utils import timezone
+        question_ids = sorted({answer[0] for answer in answers})
+        with transaction.atomic():
+            cls.objects.bulk_create(
+                [cls(question_id=question_id) for question_id in question_ids],
+                ignore_conflicts=True
+            )
+            # Orden fijo de bloqueo para no provocar interbloqueos
+            stats = {
+                row.question_id: row
+                for row in cls.objects.select_for_update().filter(
+                    question_id__in=question_ids).order_by('question_id')
+            }
+            for question_id, scale_response, selected_option_id in answers:
+                stats[question_id].add(
+                    scale_response, selected_option_id, sign)
+
+            # bulk_update no aplica auto_now
+            now = timezone.now()
+            for row in stats.values():
+                row.updated_at = now
+
+            cls.objects.bulk_update(
+                stats.values(),
+                ['response_count', 'scale_count', 'scale_sum',
+                 'scale_histogram', 'option_histogram', 'updated_at']
+            )
+
+    @classmethod
+    def rebuild(cls, survey):
+        """
+        Recalcula desde cero los resúmenes de las preguntas de una encuesta
+        con una consulta agrupada.
+        """
+        rows = SurveyQuestionResponse.objects.filter(
+            question__survey=survey,
+            survey_response__status='completed'
+        ).values(
+            'question_id', 'scale_response', 'selected_option_id'
+        ).annotate(count=Count('id')).order_by()
+
+        stats = {question_id: cls(question_id=question_id)
+                 for question_id in survey.questions.values_list('id', flat=True)}
+        for row in rows:
+            stats[row['question_id']].add(
+                row['scale_response'], row['selected_option_id'], row['count'])
+
+        with transaction.atomic():
+            cls.objects.filter(question__survey=survey).delete()
+            cls.objects.bulk_create(stats.values())
+        return len(stats)
+
+
 # Agregar relación survey al modelo Event después de que todos los modelos estén definidos
 Event.add_to_class('survey', models.ForeignKey(
     Survey,
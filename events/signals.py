@@ -0,0 +1,115 @@
+from django.db import transaction
+from django.db.models.signals import (
+    post_init, post_save, pre_delete, post_delete, m2m_changed
+)
+from django.dispatch import receiver
+from constants.constant import ACTIVE_REGISTRATION_STATUSES
+from .models import (
+    Event, Category, Registration, Payment, Survey, SurveyQuestion,
+    SurveyResponse, SurveyQuestionStats
+)
+from .utils import (
+    promote_waitlist, bump_statistics_version
+)
+
+
+@receiver(post_init, sender=Registration)
+def remember_registration_status(sender, instance, **kwargs):
+    """
+    Guarda el estado con el que se cargó la inscripción para saber,
+    al guardarla, si ocupaba un cupo.
+    """
+    # No forzar una consulta si el campo status fue diferido
+    instance._counted_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Registration)
+def update_active_registrations(sender, instance, created, **kwargs):
+    """
+    Actualiza Event.active_registrations cuando una inscripción entra
+    o sale de los estados que ocupan cupo.
+    """
+    if created:
+        # allocate_seat() ya reservó el cupo con su UPDATE condicional
+        was_active = getattr(instance, '_seat_reserved', False)
+    else:
+        was_active = instance._counted_status in ACTIVE_REGISTRATION_STATUSES
+    is_active = instance.status in ACTIVE_REGISTRATION_STATUSES
+    instance._counted_status = instance.status
+
+    delta = int(is_active) - int(was_active)
+    if delta:
+        apply_active_registrations_delta(instance, delta)
+
+
+@receiver(post_delete, sender=Registration)
+def release_active_registration(sender, instance, **kwargs):
+    """
+    Libera el cupo de una inscripción activa eliminada.
+    """
+    if instance._counted_status in ACTIVE_REGISTRATION_STATUSES:
+        apply_active_registrations_delta(instance, -1)
+
+
+@receiver(post_save, sender=Event)
+def promote_waitlist_on_capacity_change(sender, instance, created, **kwargs):
+    """
+    Un aumento del cupo máximo también libera plazas para la lista de espera.
+    """
+    if not created:
+        schedule_waitlist_promotion(instance.pk)
+
+
+def schedule_waitlist_promotion(event_id):
+    """Promueve la lista de espera una vez confirmado el cambio actual."""
+    transaction.on_commit(lambda: promote_waitlist(event_id))
+
+
+def apply_active_registrations_delta(registration, delta):
+    Event.adjust_active_registrations(registration.event_id, delta)
+
+    # Cada cupo liberado se ofrece a la lista de espera
+    if delta < 0:
+        schedule_waitlist_promotion(registration.event_id)
+
+    # Mantener al día el evento ya cargado en la inscripción
+    if Registration.event.is_cached(registration):
+        try:
+            registration.event.refresh_from_db(
+                fields=['active_registrations'])
+        except Event.DoesNotExist:
+            pass
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Registration)
+@receiver(post_delete, sender=Registration)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@receiver(post_save, sender=Survey)
+@receiver(post_delete, sender=Survey)
+@receiver(post_save, sender=SurveyQuestion)
+@receiver(post_delete, sender=SurveyQuestion)
+@receiver(post_save, sender=SurveyResponse)
+@receiver(post_delete, sender=SurveyResponse)
+@receiver(m2m_changed, sender=Event.categories.through)
+def invalidate_event_statistics(sender, **kwargs):
+    """
+    Cualquier escritura en los modelos de eventos invalida las estadísticas.
+    """
+    bump_statistics_version()
+
+
+@receiver(pre_delete, sender=SurveyResponse)
+def remove_survey_response_from_stats(sender, instance, **kwargs):
+    """
+    Resta de los resúmenes las respuestas de una encuesta completada que se
+    elimina (por ejemplo, al borrar su evento). Se hace antes del borrado,
+    mientras las respuestas por pregunta todavía existen.
+    """
+    if instance.status == 'completed':
+        SurveyQuestionStats.apply_response(instance, sign=-1)
+
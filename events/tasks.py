@@ -1,134 +1,124 @@
 """
 Tareas programadas para el sistema de encuestas.
 """
-from django.utils import timezone
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
+from datetime import timedelta
 from django.conf import settings
-from django_q.tasks import async_task, schedule
-from django_q.models import Schedule
+from django.utils import timezone
+from django_q.tasks import async_task
 
-from .models import SurveyResponse, Event
+from core.mail import send_bulk
+from .models import SurveyResponse, Event, Registration
+from .utils import (
+    send_survey_invitation_email, send_survey_reminder_email,
+    get_registration_email_context, get_survey_email_context,
+    create_survey_responses_for_event, enqueue_survey_invitations,
+    cleanup_expired_survey_responses
+)
 
 
 def send_survey_email(survey_response):
     """
     Envía un email con el enlace de la encuesta.
     """
-    try:
-        # Construir el enlace de la encuesta
-        survey_url = f"{settings.SITE_URL}/eventos/encuesta/{survey_response.token}/"
-
-        # Renderizar el template del email
-        context = {
-            'survey_response': survey_response,
-            'survey': survey_response.survey,
-            'event': survey_response.event,
-            'registration': survey_response.registration,
-            'survey_url': survey_url,
-            'expires_at': survey_response.expires_at,
-        }
-
-        html_message = render_to_string(
-            'events/emails/survey_invitation.html', context)
-        plain_message = render_to_string(
-            'events/emails/survey_invitation.txt', context)
-
-        # Enviar el email
-        send_mail(
-            subject=f'Encuesta de satisfacción - {survey_response.event.title}',
-            message=plain_message,
-            html_message=html_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[survey_response.registration.email],
-            fail_silently=False,
-        )
-
-        # Marcar como enviada
-        survey_response.status = 'sent'
-        survey_response.save()
-
-        return True
+    # Ya estamos en el worker, así que el email sale directamente
+    return send_survey_invitation_email(survey_response, queue=False)
 
-    except Exception as e:
-        # Log del error
-        print(
-            f"Error enviando encuesta a {survey_response.registration.email}: {str(e)}")
-        return False
+
+def send_survey_invitations(survey_response_ids):
+    """
+    Envía las invitaciones de un lote de respuestas de encuesta, cargadas
+    con una sola consulta y enviadas por una sola conexión SMTP.
+    """
+    survey_responses = SurveyResponse.objects.filter(
+        id__in=survey_response_ids, status='sent'
+    ).select_related('survey', 'event', 'registration')
+
+    sent_count, failed = send_bulk(
+        'survey_invitation',
+        ((survey_response.registration.email,
+          get_survey_email_context(survey_response))
+         for survey_response in survey_responses.iterator())
+    )
+    return sent_count
 
 
 def send_survey_reminder(survey_response):
     """
     Envía un recordatorio para completar la encuesta.
-    """
-    try:
-        # Construir el enlace de la encuesta
-        survey_url = f"{settings.SITE_URL}/eventos/encuesta/{survey_response.token}/"
-
-        # Renderizar el template del email
-        context = {
-            'survey_response': survey_response,
-            'survey': survey_response.survey,
-            'event': survey_response.event,
-            'registration': survey_response.registration,
-            'survey_url': survey_url,
-            'expires_at': survey_response.expires_at,
-        }
-
-        html_message = render_to_string(
-            'events/emails/survey_reminder.html', context)
-        plain_message = render_to_string(
-            'events/emails/survey_reminder.txt', context)
-
-        # Enviar el email
-        send_mail(
-            subject=f'Recordatorio: Encuesta de satisfacción - {survey_response.event.title}',
-            message=plain_message,
-            html_message=html_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[survey_response.registration.email],
-            fail_silently=False,
-        )
-
-        return True
 
-    except Exception as e:
-        # Log del error
-        print(
-            f"Error enviando recordatorio a {survey_response.registration.email}: {str(e)}")
+    Se mantiene para los recordatorios que se programaron uno por uno antes
+    de schedule_survey_reminders; reclama la respuesta igual que este para
+    no enviar el recordatorio dos veces.
+    """
+    survey_response_id = getattr(survey_response, 'pk', survey_response)
+    claimed = SurveyResponse.objects.filter(
+        id=survey_response_id, status='sent', reminder_sent_at__isnull=True
+    ).update(reminder_sent_at=timezone.now())
+    if not claimed:
         return False
 
+    survey_response = SurveyResponse.objects.select_related(
+        'survey', 'event', 'registration').get(id=survey_response_id)
+    return send_survey_reminder_email(survey_response, queue=False)
+
+
+def send_survey_reminders(survey_response_ids):
+    """
+    Envía los recordatorios de un lote de respuestas ya reclamadas por
+    schedule_survey_reminders, por una sola conexión SMTP. Las que fallan
+    vuelven a quedar pendientes para la siguiente ejecución.
+    """
+    survey_responses = SurveyResponse.objects.filter(
+        id__in=survey_response_ids, status='sent'
+    ).select_related('survey', 'event', 'registration')
+
+    sent_count, failed = send_bulk(
+        'survey_reminder',
+        ((survey_response.registration.email,
+          get_survey_email_context(survey_response))
+         for survey_response in survey_responses.iterator())
+    )
+
+    if failed:
+        SurveyResponse.objects.filter(
+            id__in=survey_response_ids, registration__email__in=failed
+        ).update(reminder_sent_at=None)
+
+    return sent_count
+
+
+def send_waitlist_notifications(registration_ids):
+    """
+    Avisa a las inscripciones promovidas desde la lista de espera,
+    todas por una sola conexión SMTP.
+    """
+    registrations = Registration.objects.filter(
+        id__in=registration_ids, status='pending'
+    ).select_related('event')
+
+    sent_count, failed = send_bulk(
+        'waitlist_promoted',
+        ((registration.email,
+          get_registration_email_context(registration, {'cupo_liberado': True}))
+         for registration in registrations.iterator())
+    )
+    return sent_count
+
 
 def send_surveys_for_event(event_id):
     """
     Envía encuestas para todos los participantes de un evento.
     """
     try:
-        event = Event.objects.get(id=event_id)
+        event = Event.objects.select_related('survey').get(id=event_id)
 
         if not event.survey or not event.send_survey:
             return False
 
-        # Obtener inscripciones aceptadas que no tienen respuesta de encuesta
-        registrations = event.registrations.filter(
-            status='accepted',
-            survey_responses__isnull=True
-        )
-
-        sent_count = 0
-        for registration in registrations:
-            # Crear respuesta de encuesta
-            survey_response = SurveyResponse.objects.create(
-                survey=event.survey,
-                event=event,
-                registration=registration
-            )
+        survey_response_ids = create_survey_responses_for_event(event)
+        enqueue_survey_invitations(survey_response_ids)
 
-            # Enviar email de forma asíncrona
-            async_task(send_survey_email, survey_response)
-            sent_count += 1
-
-        return sent_count
+        return len(survey_response_ids)
 
     except Event.DoesNotExist:
         return False
@@ -139,50 +129,56 @@ def send_surveys_for_event(event_id):
 
 def schedule_survey_reminders():
     """
-    Programa recordatorios para encuestas no completadas.
+    Encola los recordatorios de las encuestas enviadas hace más de
+    SURVEY_REMINDER_DELAY_HOURS que siguen sin abrirse y no han expirado.
+    Se ejecuta periódicamente (ver setup_schedules).
+
+    Las respuestas pendientes se leen por lotes con una consulta de rango
+    sobre el índice (status, reminder_sent_at, sent_at) y se reclaman con
+    un UPDATE condicional antes de encolar cada lote, así dos ejecuciones
+    simultáneas no recuerdan dos veces la misma encuesta.
+
+    Returns:
+        int: Número de recordatorios encolados
     """
-    # Obtener respuestas enviadas pero no completadas que no han expirado
-    pending_responses = SurveyResponse.objects.filter(
+    batch_size = getattr(settings, 'SURVEY_INVITATION_BATCH_SIZE', 200)
+    delay = timedelta(hours=getattr(settings, 'SURVEY_REMINDER_DELAY_HOURS', 24))
+    now = timezone.now()
+
+    due_ids = SurveyResponse.objects.filter(
         status='sent',
-        expires_at__gt=timezone.now(),
-        completed_at__isnull=True
-    )
+        reminder_sent_at__isnull=True,
+        sent_at__lte=now - delay,
+        expires_at__gt=now
+    ).order_by('sent_at', 'id').values_list('id', flat=True)
 
-    for response in pending_responses:
-        # Calcular cuándo enviar el recordatorio (24 horas después del envío)
-        reminder_time = response.sent_at + timezone.timedelta(hours=24)
+    queued = 0
+    while True:
+        ids = list(due_ids[:batch_size])
+        if not ids:
+            break
 
-        # Solo programar si aún no ha pasado el tiempo del recordatorio
-        if reminder_time > timezone.now():
-            # Verificar si ya existe un recordatorio programado
-            existing_schedule = Schedule.objects.filter(
-                func='events.tasks.send_survey_reminder',
-                args=f'[{response.id}]'
-            ).first()
+        claimed = SurveyResponse.objects.filter(
+            id__in=ids, reminder_sent_at__isnull=True
+        ).update(reminder_sent_at=now)
+        if claimed < len(ids):
+            # Otra ejecución reclamó parte del lote
+            ids = list(SurveyResponse.objects.filter(
+                id__in=ids, reminder_sent_at=now).values_list('id', flat=True))
 
-            if not existing_schedule:
-                schedule(
-                    'events.tasks.send_survey_reminder',
-                    response.id,
-                    schedule_type=Schedule.ONCE,
-                    next_run=reminder_time
-                )
+        if ids:
+            async_task('events.tasks.send_survey_reminders', ids)
+            queued += len(ids)
+
+    return queued
 
 
 def cleanup_expired_surveys():
     """
     Marca como expiradas las encuestas que han superado su tiempo límite.
+    Se ejecuta periódicamente (ver setup_schedules).
     """
-    expired_responses = SurveyResponse.objects.filter(
-        status__in=['sent', 'opened'],
-        expires_at__lt=timezone.now()
-    )
-
-    for response in expired_responses:
-        response.status = 'expired'
-        response.save()
-
-    return expired_responses.count()
+    return cleanup_expired_survey_responses()
 
 
 def send_bulk_surveys_task(event_ids):
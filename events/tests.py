@@ -1,3 +1,552 @@
-from django.test import TestCase
+import csv
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from unittest.mock import patch
 
-# Create your tests here.
+from constants.constant import UserRoles
+from .models import (
+    Event, Registration, Survey, SurveyQuestion, SurveyQuestionOption,
+    SurveyQuestionResponse, SurveyQuestionStats, SurveyResponse
+)
+from .forms import SurveyResponseForm
+from .tasks import (
+    cleanup_expired_surveys, schedule_survey_reminders, send_survey_invitations,
+    send_survey_reminders, send_waitlist_notifications
+)
+from .utils import (
+    allocate_seat, create_survey_responses_for_event,
+    enqueue_survey_invitations, get_event_statistics, get_survey_analysis
+)
+
+User = get_user_model()
+
+
+class EventTestMixin:
+    """Datos comunes para las pruebas de eventos."""
+
+    def create_event(self, max_capacity=2, **kwargs):
+        if not hasattr(self, 'manager'):
+            self.manager = User.objects.create_user(
+                email='manager@example.com', password='testpass123')
+        start = timezone.now() + timedelta(days=7)
+        defaults = {
+            'title': f'Evento {Event.objects.count() + 1}',
+            'description': 'Descripción',
+            'start_date': start,
+            'end_date': start + timedelta(hours=2),
+            'event_type': 'online',
+            'modality': 'free',
+            'max_capacity': max_capacity,
+            'status': 'published',
+            'created_by': self.manager,
+        }
+        defaults.update(kwargs)
+        return Event.objects.create(**defaults)
+
+    def register(self, event, email, status='pending'):
+        return Registration.objects.create(
+            event=event, full_name='Participante', email=email,
+            phone='123456', status=status)
+
+
+class ActiveRegistrationsCounterTests(EventTestMixin, TestCase):
+    """Pruebas del contador de inscripciones activas."""
+
+    def setUp(self):
+        self.event = self.create_event(max_capacity=2)
+
+    def counter(self):
+        return Event.objects.values_list(
+            'active_registrations', flat=True).get(pk=self.event.pk)
+
+    def test_counter_follows_status_transitions(self):
+        """El contador sigue los cambios de estado y las eliminaciones."""
+        first = self.register(self.event, 'a@example.com')
+        second = self.register(self.event, 'b@example.com', status='waitlist')
+        self.assertEqual(self.counter(), 1)
+
+        first.status = 'accepted'
+        first.save()
+        self.assertEqual(self.counter(), 1)
+
+        second.status = 'accepted'
+        second.save()
+        self.assertEqual(self.counter(), 2)
+
+        first.status = 'rejected'
+        first.save()
+        self.assertEqual(self.counter(), 1)
+
+        second.delete()
+        self.assertEqual(self.counter(), 0)
+
+    def test_properties_read_counter_without_queries(self):
+        """is_full y available_spots no consultan la base de datos."""
+        self.register(self.event, 'a@example.com')
+        self.register(self.event, 'b@example.com', status='accepted')
+        event = Event.objects.get(pk=self.event.pk)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(event.is_full)
+            self.assertEqual(event.available_spots, 0)
+            self.assertEqual(event.active_registrations_count, 2)
+
+    def test_stale_event_save_keeps_counter(self):
+        """Guardar una copia antigua del evento no pisa el contador."""
+        self.register(self.event, 'a@example.com')
+
+        self.event.title = 'Nuevo título'
+        self.event.save()
+
+        self.assertEqual(self.counter(), 1)
+
+    def test_decrement_clamps_at_zero_without_going_negative(self):
+        """Descontar de un contador en cero lo deja en cero sin restar."""
+        # Un evento previo al contador: la inscripción existe pero el
+        # contador sigue en cero hasta ejecutar reconcile_event_capacity
+        registration = self.register(self.event, 'a@example.com')
+        Event.objects.filter(pk=self.event.pk).update(active_registrations=0)
+
+        with CaptureQueriesContext(connection) as queries:
+            registration.delete()
+
+        self.assertEqual(self.counter(), 0)
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertFalse(any('GREATEST' in sql.upper() or 'MAX(' in sql.upper()
+                             for sql in updates))
+
+        Event.adjust_active_registrations(self.event.pk, 3)
+        Event.adjust_active_registrations(self.event.pk, -5)
+        self.assertEqual(self.counter(), 0)
+
+    def test_reconcile_command_fixes_drift(self):
+        """El comando de conciliación corrige el contador desfasado."""
+        self.register(self.event, 'a@example.com')
+        Event.objects.filter(pk=self.event.pk).update(active_registrations=5)
+
+        call_command('reconcile_event_capacity', stdout=StringIO())
+
+        self.assertEqual(self.counter(), 1)
+
+
+class SeatAllocationTests(EventTestMixin, TestCase):
+    """Pruebas de la asignación de cupos."""
+
+    def allocate(self, event, email):
+        return allocate_seat(Registration(
+            event=event, full_name='Participante', email=email, phone='123'))
+
+    def test_allocate_seat_waitlists_when_full(self):
+        """Las inscripciones que exceden el cupo pasan a lista de espera."""
+        event = self.create_event(max_capacity=2)
+
+        statuses = [self.allocate(event, f'user{i}@example.com').status
+                    for i in range(3)]
+
+        self.assertEqual(statuses, ['pending', 'pending', 'waitlist'])
+        event.refresh_from_db()
+        self.assertEqual(event.active_registrations, 2)
+        self.assertEqual(event.count_active_registrations(), 2)
+
+    def test_allocate_seat_rejects_duplicates(self):
+        """Una inscripción duplicada no falla ni consume cupo."""
+        event = self.create_event(max_capacity=2)
+        self.allocate(event, 'user@example.com')
+
+        self.assertIsNone(self.allocate(event, 'user@example.com'))
+        event.refresh_from_db()
+        self.assertEqual(event.active_registrations, 1)
+
+
+@patch('events.utils.async_task')
+class WaitlistPromotionTests(EventTestMixin, TestCase):
+    """Pruebas de la promoción automática de la lista de espera."""
+
+    def setUp(self):
+        self.event = self.create_event(max_capacity=2)
+        self.accepted = self.register(
+            self.event, 'a@example.com', status='accepted')
+        self.pending = self.register(self.event, 'b@example.com')
+        self.waitlisted = [
+            self.register(self.event, f'w{i}@example.com', status='waitlist')
+            for i in range(3)
+        ]
+
+    def statuses(self):
+        return list(Registration.objects.filter(
+            pk__in=[r.pk for r in self.waitlisted]
+        ).order_by('registration_date', 'id').values_list('status', flat=True))
+
+    def test_rejection_promotes_oldest_waitlisted(self, mock_async_task):
+        """Rechazar una inscripción promueve a la más antigua en espera."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pending.status = 'rejected'
+            self.pending.save()
+
+        self.assertEqual(self.statuses(), ['pending', 'waitlist', 'waitlist'])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.active_registrations, 2)
+        mock_async_task.assert_called_once_with(
+            'events.tasks.send_waitlist_notifications',
+            [self.waitlisted[0].pk])
+
+        send_waitlist_notifications([self.waitlisted[0].pk])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['w0@example.com'])
+
+    def test_capacity_increase_promotes_in_one_pass(self, mock_async_task):
+        """Ampliar el cupo promueve varias inscripciones a la vez."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.max_capacity = 10
+            self.event.save()
+
+        self.assertEqual(self.statuses(), ['pending'] * 3)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.active_registrations, 5)
+        self.assertEqual(self.event.count_active_registrations(), 5)
+
+    def test_no_promotion_without_free_spots(self, mock_async_task):
+        """Sin cupos libres nadie sale de la lista de espera."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.waitlisted[0].status = 'rejected'
+            self.waitlisted[0].save()
+
+        self.assertEqual(self.statuses(), ['rejected', 'waitlist', 'waitlist'])
+        mock_async_task.assert_not_called()
+
+
+class EventStatisticsTests(EventTestMixin, TestCase):
+    """Pruebas de las estadísticas cacheadas de eventos."""
+
+    def setUp(self):
+        cache.clear()
+        self.event = self.create_event(max_capacity=5)
+        self.register(self.event, 'a@example.com')
+        self.register(self.event, 'b@example.com', status='accepted')
+
+    def test_statistics_are_cached_until_data_changes(self):
+        """Las estadísticas se sirven desde caché hasta que cambian los datos."""
+        with self.assertNumQueries(8):
+            statistics = get_event_statistics()
+        self.assertEqual(statistics['total_registrations'], 2)
+        self.assertEqual(statistics['pending_registrations'], 1)
+        self.assertEqual(statistics['popular_events'][0].registration_count, 2)
+
+        with self.assertNumQueries(0):
+            get_event_statistics()
+
+        self.register(self.event, 'c@example.com')
+        self.assertEqual(get_event_statistics()['total_registrations'], 3)
+
+    def test_statistics_view_renders(self):
+        """La vista de estadísticas del dashboard se renderiza."""
+        self.manager.role = UserRoles.MANAGER
+        self.manager.save()
+        Survey.objects.create(
+            title='Encuesta', status='active', created_by=self.manager)
+        self.client.force_login(self.manager)
+
+        response = self.client.get(reverse('dashboard:statistics'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['active_surveys'], 1)
+
+
+class SurveyDataMixin(EventTestMixin):
+    """Encuesta con respuestas para las pruebas de resultados."""
+
+    def setUp(self):
+        self.event = self.create_event(max_capacity=10)
+        self.survey = Survey.objects.create(
+            title='Satisfacción', status='active', created_by=self.manager)
+        self.text = SurveyQuestion.objects.create(
+            survey=self.survey, text='Comentarios', question_type='text', order=1)
+        self.scale = SurveyQuestion.objects.create(
+            survey=self.survey, text='Valoración', question_type='scale', order=2)
+        self.choice = SurveyQuestion.objects.create(
+            survey=self.survey, text='Formato', question_type='multiple_choice',
+            order=3)
+        self.online = SurveyQuestionOption.objects.create(
+            question=self.choice, text='Online', order=1)
+        self.presential = SurveyQuestionOption.objects.create(
+            question=self.choice, text='Presencial', order=2)
+
+        answers = [(5, self.online, 'Muy bien'), (4, self.online, ''),
+                   (2, self.presential, 'Regular')]
+        for i, (scale, option, text) in enumerate(answers):
+            self.answer(f'user{i}@example.com', scale, option, text)
+        # Las respuestas no completadas no cuentan
+        self.answer('open@example.com', 1, self.presential, 'No',
+                    status='opened')
+
+    def answer(self, email, scale, option, text, status='completed'):
+        response = SurveyResponse.objects.create(
+            survey=self.survey, event=self.event,
+            registration=self.register(self.event, email), status='opened')
+        SurveyQuestionResponse.objects.bulk_create([
+            SurveyQuestionResponse(
+                survey_response=response, question=self.text,
+                text_response=text),
+            SurveyQuestionResponse(
+                survey_response=response, question=self.scale,
+                scale_response=scale),
+            SurveyQuestionResponse(
+                survey_response=response, question=self.choice,
+                selected_option=option),
+        ])
+        if status == 'completed':
+            response.mark_completed()
+        return response
+
+
+class SurveyAnalysisTests(SurveyDataMixin, TestCase):
+    """Pruebas del análisis de resultados de encuestas."""
+
+    def assert_analysis(self):
+        total_responses, analysis = get_survey_analysis(self.survey)
+
+        self.assertEqual(total_responses, 3)
+        text, scale, choice = analysis
+
+        self.assertEqual(text['response_count'], 3)
+        self.assertEqual(
+            [answer.text_response for answer in text['sample_responses']],
+            ['Muy bien', 'Regular'])
+
+        self.assertEqual(scale['average_rating'], 3.67)
+        self.assertEqual(scale['distribution'],
+                         {1: 0, 2: 1, 3: 0, 4: 1, 5: 1})
+
+        self.assertEqual(choice['option_counts'],
+                         {'Online': 2, 'Presencial': 1})
+
+    def test_analysis_reads_rollups(self):
+        """El análisis se lee de los resúmenes en un número fijo de consultas."""
+        with self.assertNumQueries(4):
+            get_survey_analysis(self.survey)
+        self.assert_analysis()
+
+    def test_completing_twice_counts_once(self):
+        """Completar dos veces la misma respuesta no duplica los conteos."""
+        response = SurveyResponse.objects.filter(status='completed').first()
+
+        self.assertFalse(response.mark_completed())
+        self.assert_analysis()
+
+    def test_deleting_completed_response_updates_rollups(self):
+        """Eliminar una respuesta completada la resta de los resúmenes."""
+        response = self.answer('extra@example.com', 1, self.presential, 'Mal')
+        response.delete()
+
+        self.assert_analysis()
+
+    def test_rebuild_command_restores_rollups(self):
+        """El comando de reconstrucción recalcula los resúmenes."""
+        SurveyQuestionStats.objects.all().delete()
+
+        call_command('rebuild_survey_stats', stdout=StringIO())
+
+        self.assert_analysis()
+
+
+class SurveyResponseFormTests(SurveyDataMixin, TestCase):
+    """Pruebas del guardado de respuestas de encuesta."""
+
+    def submit(self, survey_response, scale='3'):
+        data = {}
+        for question in self.survey.questions.all():
+            if question.question_type == 'text':
+                data[f'question_{question.id}'] = 'Respuesta'
+            elif question.question_type == 'scale':
+                data[f'question_{question.id}'] = scale
+            else:
+                data[f'question_{question.id}'] = str(self.presential.id)
+        form = SurveyResponseForm(survey_response, data)
+        self.assertTrue(form.is_valid(), form.errors)
+        return form
+
+    def save_queries(self, survey_response):
+        form = self.submit(survey_response)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(form.save())
+        return len(queries)
+
+    def test_save_replaces_answers_and_completes(self):
+        """Guardar reemplaza respuestas previas y actualiza los resúmenes."""
+        survey_response = SurveyResponse.objects.get(status='opened')
+
+        self.assertTrue(self.submit(survey_response).save())
+
+        survey_response.refresh_from_db()
+        self.assertEqual(survey_response.status, 'completed')
+        self.assertEqual(survey_response.question_responses.count(), 3)
+        self.assertEqual(
+            self.choice.stats.option_histogram[str(self.presential.id)], 2)
+        # Una respuesta ya completada no se vuelve a guardar
+        self.assertFalse(self.submit(survey_response).save())
+
+    def test_form_is_built_from_cached_schema(self):
+        """El formulario se arma con una consulta y refleja los cambios."""
+        survey_response = SurveyResponse.objects.get(status='opened')
+        SurveyResponseForm(survey_response)
+
+        # Solo la consulta del sello de preguntas y opciones
+        with self.assertNumQueries(1):
+            form = SurveyResponseForm(survey_response)
+        self.assertEqual(len(form.fields), 3)
+
+        hybrid = SurveyQuestionOption.objects.create(
+            question=self.choice, text='Híbrido', order=3)
+        self.text.required = False
+        self.text.save()
+
+        form = SurveyResponseForm(survey_response)
+        self.assertIn((hybrid.id, 'Híbrido'),
+                      form.fields[f'question_{self.choice.id}'].choices)
+        self.assertFalse(form.fields[f'question_{self.text.id}'].required)
+
+        hybrid_id, text_id = hybrid.id, self.text.id
+        hybrid.delete()
+        self.text.delete()
+
+        form = SurveyResponseForm(survey_response)
+        self.assertNotIn(f'question_{text_id}', form.fields)
+        self.assertNotIn((hybrid_id, 'Híbrido'),
+                         form.fields[f'question_{self.choice.id}'].choices)
+
+    def test_save_query_count_is_constant(self):
+        """El número de consultas no depende del número de preguntas."""
+        small = self.save_queries(SurveyResponse.objects.get(status='opened'))
+
+        for order in range(4, 44):
+            SurveyQuestion.objects.create(
+                survey=self.survey, text=f'Pregunta {order}',
+                question_type='scale', order=order)
+        survey_response = SurveyResponse.objects.create(
+            survey=self.survey, event=self.event,
+            registration=self.register(self.event, 'big@example.com'))
+
+        self.assertEqual(self.save_queries(survey_response), small)
+
+
+@override_settings(SURVEY_INVITATION_BATCH_SIZE=2)
+class SurveyInvitationTests(EventTestMixin, TestCase):
+    """Pruebas del envío masivo de invitaciones a encuestas."""
+
+    def setUp(self):
+        self.event = self.create_event(max_capacity=10)
+        self.event.survey = Survey.objects.create(
+            title='Satisfacción', status='active', created_by=self.manager)
+        self.event.send_survey = True
+        self.event.save()
+        for i in range(5):
+            self.register(self.event, f'user{i}@example.com', status='accepted')
+        self.register(self.event, 'pending@example.com')
+
+    @patch('events.utils.async_task')
+    def test_invitations_are_created_in_bulk_and_sent_in_batches(self, mock_async_task):
+        """Las respuestas se crean en bloque y se envían por lotes de IDs."""
+        # Una consulta de inscripciones y, por lote, un INSERT y un SELECT
+        with self.assertNumQueries(7):
+            survey_response_ids = create_survey_responses_for_event(self.event)
+        self.assertEqual(len(survey_response_ids), 5)
+        self.assertEqual(len(set(SurveyResponse.objects.values_list(
+            'token', flat=True))), 5)
+        # Una segunda ejecución no duplica respuestas
+        self.assertEqual(create_survey_responses_for_event(self.event), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(enqueue_survey_invitations(survey_response_ids), 3)
+        batches = [call.args[1] for call in mock_async_task.call_args_list]
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+
+        with self.assertNumQueries(1):
+            self.assertEqual(send_survey_invitations(batches[0]), 2)
+        self.assertEqual(len(mail.outbox), 2)
+        for token in SurveyResponse.objects.filter(
+                id__in=batches[0]).values_list('token', flat=True):
+            self.assertTrue(any(token in email.body for email in mail.outbox))
+
+    @patch('events.tasks.async_task')
+    def test_due_reminders_are_claimed_once_and_sent_in_batch(self, mock_async_task):
+        """Los recordatorios vencidos se reclaman una vez y se envían por lotes."""
+        survey_response_ids = create_survey_responses_for_event(self.event)
+        SurveyResponse.objects.filter(id__in=survey_response_ids[:3]).update(
+            sent_at=timezone.now() - timedelta(hours=25))
+        # Las encuestas ya abiertas no reciben recordatorio
+        SurveyResponse.objects.filter(id=survey_response_ids[2]).update(
+            status='opened')
+
+        self.assertEqual(schedule_survey_reminders(), 2)
+        self.assertEqual(schedule_survey_reminders(), 0)
+
+        mock_async_task.assert_called_once_with(
+            'events.tasks.send_survey_reminders', survey_response_ids[:2])
+        self.assertEqual(send_survey_reminders(survey_response_ids[:2]), 2)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_expiry_sweep_is_one_update(self):
+        """El barrido de vencidas es un UPDATE y devuelve las afectadas."""
+        survey_response_ids = create_survey_responses_for_event(self.event)
+        past = timezone.now() - timedelta(hours=1)
+        SurveyResponse.objects.filter(id__in=survey_response_ids[:2]).update(
+            expires_at=past)
+        SurveyResponse.objects.filter(id=survey_response_ids[2]).update(
+            expires_at=past, status='completed')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(cleanup_expired_surveys(), 2)
+
+        self.assertEqual(
+            SurveyResponse.objects.filter(status='expired').count(), 2)
+        self.assertEqual(cleanup_expired_surveys(), 0)
+
+
+class SurveyExportTests(SurveyDataMixin, TestCase):
+    """Pruebas de la exportación de resultados de encuestas."""
+
+    def export(self, format_type):
+        self.manager.role = UserRoles.MANAGER
+        self.manager.save()
+        self.client.force_login(self.manager)
+        return self.client.get(
+            reverse('dashboard:survey_export', args=[self.survey.pk]),
+            {'format': format_type})
+
+    def test_csv_export_streams_rows_in_one_query(self):
+        """El CSV se genera en streaming con una sola consulta de datos."""
+        response = self.export('csv')
+        self.assertTrue(response.streaming)
+
+        with CaptureQueriesContext(connection) as queries:
+            lines = b''.join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(lines[0], 'Pregunta,Tipo,Respuesta,Participante,Fecha')
+        # 3 respuestas completadas x 3 preguntas
+        self.assertEqual(len(lines), 10)
+        self.assertIn('Valoración,Escala (1-5),5/5,Participante', lines[4])
+
+    def test_wide_export_has_one_row_per_respondent(self):
+        """El formato ancho genera una fila por participante."""
+        response = self.export('wide')
+
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(csv.reader(
+                b''.join(response.streaming_content).decode().splitlines()))
+
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(rows[0][4:], ['Comentarios', 'Valoración', 'Formato'])
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][1], 'user0@example.com')
+        self.assertEqual(rows[1][4:], ['Muy bien', '5/5', 'Online'])
+        self.assertEqual(rows[3][4:], ['Regular', '2/5', 'Presencial'])
@@ -1,9 +1,65 @@
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
+import hashlib
+import uuid
 from django.conf import settings
-from django.utils.html import strip_tags
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Count, Max, Window
+from django.db.models.functions import RowNumber
 from django.utils import timezone
+from django_q.tasks import async_task
 from datetime import timedelta
+from core.mail import register_email_type, get_email_type, send_email, send_bulk
+
+
+register_email_type(
+    'registration_confirmation',
+    subject='Confirmación de Inscripción - {event.title}',
+    template='events/emails/registration_confirmation.html',
+)
+register_email_type(
+    'registration_approved',
+    subject='¡Inscripción Aprobada! - {event.title}',
+    template='events/emails/registration_approved.html',
+)
+register_email_type(
+    'registration_rejected',
+    subject='Inscripción No Aprobada - {event.title}',
+    template='events/emails/registration_rejected.html',
+)
+register_email_type(
+    'waitlist_promoted',
+    subject='¡Se liberó un cupo! - {event.title}',
+    template='events/emails/registration_confirmation.html',
+)
+register_email_type(
+    'event_reminder',
+    subject='Recordatorio: {event.title} - Mañana',
+    template='events/emails/event_reminder.html',
+)
+register_email_type(
+    'survey_invitation',
+    subject='Encuesta de satisfacción - {event.title}',
+    template='events/emails/survey_invitation.html',
+    text_template='events/emails/survey_invitation.txt',
+)
+register_email_type(
+    'survey_reminder',
+    subject='Recordatorio: Encuesta de satisfacción - {event.title}',
+    template='events/emails/survey_reminder.html',
+    text_template='events/emails/survey_reminder.txt',
+)
+
+
+def get_registration_email_context(registration, context=None):
+    """
+    Construye el contexto común de los emails de una inscripción.
+    """
+    context = dict(context or {})
+    context.update({
+        'registration': registration,
+        'event': registration.event,
+    })
+    return context
 
 
 def send_email_notification(email_type, registration, context=None):
@@ -18,61 +74,46 @@ def send_email_notification(email_type, registration, context=None):
     Returns:
         bool: True si el email fue enviado exitosamente, False en caso contrario
     """
-    if context is None:
-        context = {}
-
-    # Configuraciones de email
-    email_configs = {
-        'registration_confirmation': {
-            'subject': f'Confirmación de Inscripción - {registration.event.title}',
-            'template': 'events/emails/registration_confirmation.html',
-        },
-        'registration_approved': {
-            'subject': f'¡Inscripción Aprobada! - {registration.event.title}',
-            'template': 'events/emails/registration_approved.html',
-        },
-        'registration_rejected': {
-            'subject': f'Inscripción No Aprobada - {registration.event.title}',
-            'template': 'events/emails/registration_rejected.html',
-        },
-        'event_reminder': {
-            'subject': f'Recordatorio: {registration.event.title} - Mañana',
-            'template': 'events/emails/event_reminder.html',
-        }
-    }
+    get_email_type(email_type)
 
-    config = email_configs.get(email_type)
-    if not config:
-        raise ValueError(f"Email type '{email_type}' not supported")
+    return send_email(
+        email_type,
+        registration.email,
+        get_registration_email_context(registration, context)
+    )
 
-    # Agregar contexto común
-    context.update({
-        'registration': registration,
-        'event': registration.event,
-        'site_name': 'Fernando Da Silva',
-        'recipient_email': registration.email,
-    })
+
+def allocate_seat(registration):
+    """
+    Guarda una nueva inscripción decidiendo de forma atómica si obtiene
+    cupo ('pending') o pasa a la lista de espera ('waitlist').
+
+    El cupo se reserva con un UPDATE condicional sobre
+    Event.active_registrations, así que inscripciones concurrentes nunca
+    superan max_capacity.
+
+    Returns:
+        Registration: La inscripción guardada, o None si el email ya estaba
+        inscrito en el evento
+    """
+    from .models import Event
 
     try:
-        # Renderizar contenido del email
-        html_message = render_to_string(config['template'], context)
-        plain_message = strip_tags(html_message)
-
-        # Enviar email
-        send_mail(
-            subject=config['subject'],
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[registration.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        return True
+        with transaction.atomic():
+            reserved = Event.objects.filter(
+                pk=registration.event_id,
+                active_registrations__lt=F('max_capacity')
+            ).update(active_registrations=F('active_registrations') + 1)
+
+            registration.status = 'pending' if reserved else 'waitlist'
+            registration._seat_reserved = bool(reserved)
+            registration.save()
+    except IntegrityError:
+        # Inscripción duplicada (unique_together event/email); el UPDATE
+        # del contador se revierte junto con el INSERT
+        return None
 
-    except Exception as e:
-        # Log error en producción
-        print(f"Error sending email: {e}")
-        return False
+    return registration
 
 
 def send_registration_confirmation_email(registration):
@@ -123,12 +164,144 @@ def send_waitlist_notification_email(registration):
         'cupo_liberado': True,
     }
     return send_email_notification(
-        email_type='registration_approved',
+        email_type='waitlist_promoted',
         registration=registration,
         context=context
     )
 
 
+def promote_waitlist(event_id):
+    """
+    Pasa a 'pending' las inscripciones más antiguas en lista de espera,
+    tantas como cupos libres tenga el evento.
+
+    La fila del evento se bloquea durante la promoción, así que no compite
+    con allocate_seat() ni con otra promoción del mismo evento. Los emails
+    se encolan en una tarea al confirmar la transacción.
+
+    Returns:
+        int: Número de inscripciones promovidas
+    """
+    from .models import Event, Registration
+
+    with transaction.atomic():
+        event = Event.objects.select_for_update().filter(pk=event_id).only(
+            'max_capacity', 'active_registrations').first()
+        if event is None:
+            return 0
+
+        free_spots = event.max_capacity - event.active_registrations
+        if free_spots <= 0:
+            return 0
+
+        # Orden FIFO por fecha de inscripción
+        promoted_ids = list(
+            Registration.objects.select_for_update().filter(
+                event_id=event_id, status='waitlist'
+            ).order_by('registration_date', 'id').values_list(
+                'id', flat=True)[:free_spots]
+        )
+        if not promoted_ids:
+            return 0
+
+        # update() no dispara señales: el contador se ajusta aquí
+        promoted = Registration.objects.filter(
+            id__in=promoted_ids, status='waitlist'
+        ).update(status='pending')
+        Event.adjust_active_registrations(event_id, promoted)
+
+        transaction.on_commit(lambda: async_task(
+            'events.tasks.send_waitlist_notifications', promoted_ids))
+        transaction.on_commit(bump_statistics_version)
+
+    return promoted
+
+
+# ====== ESTADÍSTICAS ======
+
+STATISTICS_CACHE_TIMEOUT = 60
+STATISTICS_VERSION_KEY = 'events:statistics:version'
+
+
+def get_statistics_version():
+    """Retorna el sello de versión actual de los datos de eventos."""
+    return cache.get_or_set(STATISTICS_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def bump_statistics_version():
+    """Invalida las estadísticas cacheadas cambiando el sello de versión."""
+    cache.set(STATISTICS_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def get_event_statistics():
+    """
+    Estadísticas generales de eventos, inscripciones, pagos y encuestas.
+
+    Cada modelo se resume con una sola consulta de agregados condicionales.
+    El resultado se cachea con una clave que incluye el sello de versión,
+    que las señales de events cambian en cada escritura.
+    """
+    from .models import Event, Category, Registration, Payment, Survey, SurveyResponse
+
+    cache_key = f'events:statistics:{get_statistics_version()}'
+    statistics = cache.get(cache_key)
+    if statistics is not None:
+        return statistics
+
+    now = timezone.now()
+    statistics = {}
+
+    events = Event.objects.aggregate(
+        total_events=Count('id'),
+        published_events=Count('id', filter=Q(status='published')),
+        upcoming_events=Count('id', filter=Q(start_date__gt=now)),
+        finished_events=Count('id', filter=Q(end_date__lt=now)),
+        events_with_surveys=Count('id', filter=Q(survey__isnull=False)),
+    )
+    registrations = Registration.objects.aggregate(
+        total_registrations=Count('id'),
+        pending_registrations=Count('id', filter=Q(status='pending')),
+        accepted_registrations=Count('id', filter=Q(status='accepted')),
+    )
+    payments = Payment.objects.aggregate(
+        total_payments=Count('id'),
+        pending_payments=Count('id', filter=Q(status='pending')),
+        verified_payments=Count('id', filter=Q(status='verified')),
+    )
+    surveys = Survey.objects.aggregate(
+        total_surveys=Count('id'),
+        active_surveys=Count('id', filter=Q(status='active')),
+    )
+    survey_responses = SurveyResponse.objects.aggregate(
+        total_survey_responses=Count('id'),
+        completed_survey_responses=Count('id', filter=Q(status='completed')),
+    )
+    for aggregates in (events, registrations, payments, surveys, survey_responses):
+        statistics.update(aggregates)
+
+    # Eventos más populares
+    statistics['popular_events'] = list(Event.objects.annotate(
+        registration_count=Count('registrations')
+    ).order_by('-registration_count')[:5])
+
+    # Categorías más populares
+    statistics['popular_categories'] = list(Category.objects.annotate(
+        annotated_event_count=Count('events')
+    ).order_by('-annotated_event_count')[:5])
+
+    # Encuestas más activas
+    statistics['active_survey_list'] = list(Survey.objects.filter(
+        status='active'
+    ).annotate(
+        completed_response_count=Count('responses', filter=Q(
+            responses__status='completed'), distinct=True),
+        annotated_question_count=Count('questions', distinct=True)
+    ).order_by('-completed_response_count')[:5])
+
+    cache.set(cache_key, statistics, STATISTICS_CACHE_TIMEOUT)
+    return statistics
+
+
 def schedule_event_reminders():
     """
     Programa recordatorios para eventos que están a 24 horas de comenzar.
@@ -148,128 +321,263 @@ def schedule_event_reminders():
         event__start_date__lt=end_of_tomorrow
     ).select_related('event')
 
-    for registration in registrations:
-        send_event_reminder_email(registration)
+    # Todos los recordatorios salen por una sola conexión SMTP
+    sent_count, failed = send_bulk(
+        'event_reminder',
+        ((registration.email, get_registration_email_context(registration))
+         for registration in registrations.iterator())
+    )
 
-    return len(registrations)
+    return sent_count + len(failed)
 
 
 # ====== FUNCIONES DE ENCUESTAS ======
 
-def send_survey_invitation_email(survey_response):
+def get_survey_email_context(survey_response):
     """
-    Envía email de invitación para completar la encuesta de satisfacción.
+    Construye el contexto de los emails de encuesta.
     """
-    try:
-        # Construir el enlace de la encuesta
-        survey_url = f"{settings.SITE_URL}/eventos/encuesta/{survey_response.token}/"
-
-        # Contexto para el template
-        context = {
-            'survey_response': survey_response,
-            'survey': survey_response.survey,
-            'event': survey_response.event,
-            'registration': survey_response.registration,
-            'survey_url': survey_url,
-            'expires_at': survey_response.expires_at,
-            'site_name': 'Fernando Da Silva',
-        }
+    return {
+        'survey_response': survey_response,
+        'survey': survey_response.survey,
+        'event': survey_response.event,
+        'registration': survey_response.registration,
+        'survey_url': f"{settings.SITE_URL}/eventos/encuesta/{survey_response.token}/",
+        'expires_at': survey_response.expires_at,
+    }
 
-        # Renderizar contenido del email
-        html_message = render_to_string(
-            'events/emails/survey_invitation.html', context)
-        plain_message = strip_tags(html_message)
-
-        # Enviar email
-        send_mail(
-            subject=f'Encuesta de satisfacción - {survey_response.event.title}',
-            message=plain_message,
-            html_message=html_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[survey_response.registration.email],
-            fail_silently=False,
-        )
 
+def send_survey_invitation_email(survey_response, queue=True):
+    """
+    Envía email de invitación para completar la encuesta de satisfacción.
+    """
+    sent = send_email(
+        'survey_invitation',
+        survey_response.registration.email,
+        get_survey_email_context(survey_response),
+        queue=queue
+    )
+
+    if sent:
         # Marcar como enviada
         survey_response.status = 'sent'
         survey_response.save()
 
-        return True
-
-    except Exception as e:
-        print(
-            f"Error enviando encuesta a {survey_response.registration.email}: {e}")
-        return False
+    return sent
 
 
-def send_survey_reminder_email(survey_response):
+def send_survey_reminder_email(survey_response, queue=True):
     """
     Envía email de recordatorio para completar la encuesta.
     """
-    try:
-        # Construir el enlace de la encuesta
-        survey_url = f"{settings.SITE_URL}/eventos/encuesta/{survey_response.token}/"
-
-        # Contexto para el template
-        context = {
-            'survey_response': survey_response,
-            'survey': survey_response.survey,
-            'event': survey_response.event,
-            'registration': survey_response.registration,
-            'survey_url': survey_url,
-            'expires_at': survey_response.expires_at,
-            'site_name': 'Fernando Da Silva',
+    return send_email(
+        'survey_reminder',
+        survey_response.registration.email,
+        get_survey_email_context(survey_response),
+        queue=queue
+    )
+
+
+SURVEY_SCHEMA_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_survey_schema_version(survey_id):
+    """
+    Sello de los datos del esquema de una encuesta: cantidad y última
+    modificación de sus preguntas y opciones, en una sola consulta.
+    Cambia con cualquier alta, edición o baja.
+    """
+    from .models import SurveyQuestion
+
+    version = SurveyQuestion.objects.filter(survey_id=survey_id).aggregate(
+        question_count=Count('id', distinct=True),
+        option_count=Count('options'),
+        question_changed=Max('updated_at'),
+        option_changed=Max('options__updated_at'),
+    )
+    return hashlib.md5(
+        repr(sorted(version.items())).encode()).hexdigest()
+
+
+def get_survey_schema_cache_key(survey_id):
+    version = get_survey_schema_version(survey_id)
+    return f'events:survey_schema:{survey_id}:{version}'
+
+
+def get_survey_schema(survey):
+    """
+    Esquema de una encuesta para construir su formulario: preguntas con su
+    tipo, si son obligatorias y sus opciones, en orden.
+
+    Se cachea con una clave que incluye el sello de sus preguntas y
+    opciones, así cualquier cambio se ve enseguida en todos los procesos
+    aunque la caché no sea compartida, y armar el formulario cuesta una
+    sola consulta.
+
+    Returns:
+        list: [{'id', 'text', 'question_type', 'required', 'options'}, ...]
+        donde options es una lista de (id, texto)
+    """
+    cache_key = get_survey_schema_cache_key(survey.pk)
+    schema = cache.get(cache_key)
+    if schema is None:
+        schema = [
+            {
+                'id': question.id,
+                'text': question.text,
+                'question_type': question.question_type,
+                'required': question.required,
+                'options': [(option.id, option.text)
+                            for option in question.options.all()],
+            }
+            for question in survey.questions.prefetch_related('options')
+        ]
+        cache.set(cache_key, schema, SURVEY_SCHEMA_CACHE_TIMEOUT)
+    return schema
+
+
+SURVEY_TEXT_SAMPLES = 5
+
+
+def get_survey_analysis(survey):
+    """
+    Análisis de las respuestas completadas de una encuesta.
+
+    Los conteos, promedios y distribuciones se leen de SurveyQuestionStats,
+    que se mantiene al completar cada respuesta, así que no se recorren las
+    respuestas individuales. Las respuestas de texto de ejemplo salen de una
+    consulta con ROW_NUMBER() por pregunta.
+
+    Returns:
+        tuple: (total_responses, question_analysis)
+    """
+    from .models import SurveyQuestionResponse, SurveyQuestionStats
+
+    questions = list(survey.questions.select_related(
+        'stats').prefetch_related('options'))
+    total_responses = survey.responses.filter(status='completed').count()
+
+    samples = {}
+    if any(question.question_type == 'text' for question in questions):
+        sample_rows = SurveyQuestionResponse.objects.filter(
+            question__survey=survey,
+            question__question_type='text',
+            survey_response__status='completed'
+        ).exclude(text_response='').annotate(
+            position=Window(
+                expression=RowNumber(),
+                partition_by=[F('question_id')],
+                order_by=[F('survey_response_id').asc(), F('id').asc()]
+            )
+        ).filter(position__lte=SURVEY_TEXT_SAMPLES).select_related(
+            'survey_response__registration'
+        ).order_by('question_id', 'position')
+        for answer in sample_rows:
+            samples.setdefault(answer.question_id, []).append(answer)
+
+    question_analysis = []
+    for question in questions:
+        try:
+            stats = question.stats
+        except SurveyQuestionStats.DoesNotExist:
+            # Pregunta sin respuestas completadas todavía
+            stats = SurveyQuestionStats(question=question)
+
+        analysis = {
+            'question': question,
+            'type': question.question_type,
+            'response_count': stats.response_count,
         }
 
-        # Renderizar contenido del email
-        html_message = render_to_string(
-            'events/emails/survey_reminder.html', context)
-        plain_message = strip_tags(html_message)
-
-        # Enviar email
-        send_mail(
-            subject=f'Recordatorio: Encuesta de satisfacción - {survey_response.event.title}',
-            message=plain_message,
-            html_message=html_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[survey_response.registration.email],
-            fail_silently=False,
-        )
+        if question.question_type == 'text':
+            # Para preguntas de texto, mostrar algunas respuestas de ejemplo
+            analysis['sample_responses'] = samples.get(question.id, [])
+
+        elif question.question_type == 'scale':
+            analysis['average_rating'] = stats.average_rating
+            analysis['distribution'] = {
+                i: stats.scale_histogram.get(str(i), 0) for i in range(1, 6)}
 
-        return True
+        elif question.question_type == 'multiple_choice':
+            analysis['option_counts'] = {
+                option.text: stats.option_histogram.get(str(option.id), 0)
+                for option in question.options.all()
+            }
 
-    except Exception as e:
-        print(
-            f"Error enviando recordatorio a {survey_response.registration.email}: {e}")
-        return False
+        question_analysis.append(analysis)
+
+    return total_responses, question_analysis
 
 
 def create_survey_responses_for_event(event):
     """
     Crea respuestas de encuesta para todos los participantes de un evento.
+
+    Las respuestas se insertan por lotes con bulk_create y tokens generados
+    de antemano; como ignore_conflicts no devuelve los IDs, se recuperan
+    por token. Si otra ejecución creó ya alguna, se omite sin error.
+
+    Returns:
+        list: IDs de las respuestas creadas
     """
     from .models import SurveyResponse
 
     if not event.survey or not event.send_survey:
-        return 0
+        return []
+
+    batch_size = getattr(settings, 'SURVEY_INVITATION_BATCH_SIZE', 200)
 
     # Obtener inscripciones aceptadas que no tienen respuesta de encuesta
-    registrations = event.registrations.filter(
+    registration_ids = list(event.registrations.filter(
         status='accepted',
         survey_responses__isnull=True
-    )
+    ).order_by('id').values_list('id', flat=True))
+
+    created_ids = []
+    for start in range(0, len(registration_ids), batch_size):
+        survey_responses = []
+        for registration_id in registration_ids[start:start + batch_size]:
+            survey_response = SurveyResponse(
+                survey_id=event.survey_id,
+                event=event,
+                registration_id=registration_id
+            )
+            survey_response.set_defaults()
+            survey_responses.append(survey_response)
+
+        SurveyResponse.objects.bulk_create(
+            survey_responses, ignore_conflicts=True)
+        created_ids.extend(SurveyResponse.objects.filter(
+            token__in=[survey_response.token for survey_response in survey_responses]
+        ).order_by('id').values_list('id', flat=True))
+
+    # bulk_create no emite post_save
+    if created_ids:
+        bump_statistics_version()
+
+    return created_ids
+
+
+def enqueue_survey_invitations(survey_response_ids):
+    """
+    Encola el envío de las invitaciones en tareas de Django-Q con un lote
+    de IDs cada una. Se encolan al confirmar la transacción, cuando las
+    respuestas ya son visibles para el worker.
 
-    created_count = 0
-    for registration in registrations:
-        # Crear respuesta de encuesta
-        survey_response = SurveyResponse.objects.create(
-            survey=event.survey,
-            event=event,
-            registration=registration
-        )
-        created_count += 1
+    Returns:
+        int: Número de tareas encoladas
+    """
+    survey_response_ids = list(survey_response_ids)
+    batch_size = getattr(settings, 'SURVEY_INVITATION_BATCH_SIZE', 200)
+    batches = [survey_response_ids[start:start + batch_size]
+               for start in range(0, len(survey_response_ids), batch_size)]
+
+    def enqueue():
+        for batch in batches:
+            async_task('events.tasks.send_survey_invitations', batch)
 
-    return created_count
+    transaction.on_commit(enqueue)
+    return len(batches)
 
 
 def send_surveys_for_event_manual(event):
@@ -282,33 +590,34 @@ def send_surveys_for_event_manual(event):
         return 0
 
     # Obtener respuestas de encuesta no enviadas
-    survey_responses = SurveyResponse.objects.filter(
+    survey_response_ids = list(SurveyResponse.objects.filter(
         survey=event.survey,
         event=event,
         status='sent'
-    )
-
-    sent_count = 0
-    for survey_response in survey_responses:
-        if send_survey_invitation_email(survey_response):
-            sent_count += 1
+    ).values_list('id', flat=True))
 
-    return sent_count
+    enqueue_survey_invitations(survey_response_ids)
+    return len(survey_response_ids)
 
 
 def cleanup_expired_survey_responses():
     """
     Marca como expiradas las encuestas que han superado su tiempo límite.
+
+    Se hace con un solo UPDATE apoyado en el índice (status, expires_at).
+
+    Returns:
+        int: Número de respuestas marcadas como expiradas
     """
     from .models import SurveyResponse
 
-    expired_responses = SurveyResponse.objects.filter(
+    expired_count = SurveyResponse.objects.filter(
         status__in=['sent', 'opened'],
         expires_at__lt=timezone.now()
-    )
+    ).update(status='expired')
 
-    for response in expired_responses:
-        response.status = 'expired'
-        response.save()
+    # update() no emite post_save
+    if expired_count:
+        bump_statistics_version()
 
-    return expired_responses.count()
+    return expired_count
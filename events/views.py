@@ -4,7 +4,7 @@ from django.core.paginator import Paginator
 from django.db.models import Q, Count
 from .models import Event, Category, PaymentMethod, Registration, Payment, SurveyResponse
 from .forms import RegistrationForm, SurveyResponseForm
-from .utils import send_registration_confirmation_email
+from .utils import send_registration_confirmation_email, allocate_seat
 
 # ===== VISTAS PÚBLICAS =====
 
@@ -163,19 +163,19 @@ def event_registration(request, slug):
         if form.is_valid():
             registration = form.save(commit=False)
             registration.event = event
+            registration = allocate_seat(registration)
+            if registration is None:
+                messages.info(request, 'Ya estás inscrito en este evento.')
+                return redirect('events:event_detail', slug=slug)
 
-            # Determinar el estado inicial de la inscripción
-            if event.is_full:
-                registration.status = 'waitlist'
+            # Determinar el mensaje según el estado asignado
+            if registration.status == 'waitlist':
                 messages.warning(
                     request, 'El evento está lleno. Has sido agregado a la lista de espera.')
             else:
-                registration.status = 'pending'
                 messages.success(
                     request, 'Tu inscripción ha sido recibida y está pendiente de aprobación.')
 
-            registration.save()
-
             # Si el evento es de pago, crear el registro de pago
             if event.modality == 'paid':
                 payment_method_id = request.POST.get('payment_method')
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Newsletter, Subscriber
+from .models import Newsletter, Subscriber, NewsletterDelivery
 
 
 @admin.register(Newsletter)
@@ -22,3 +22,12 @@ class SubscriberAdmin(admin.ModelAdmin):
     list_filter = ['is_subscribed', 'subscribed_at', 'unsubscribed_at']
     search_fields = ['user__email', 'user__first_name', 'user__last_name']
     readonly_fields = ['unsubscribe_token', 'subscribed_at', 'unsubscribed_at']
+
+
+@admin.register(NewsletterDelivery)
+class NewsletterDeliveryAdmin(admin.ModelAdmin):
+    list_display = ['newsletter', 'subscriber', 'status', 'sent_at']
+    list_filter = ['status', 'newsletter']
+    search_fields = ['subscriber__user__email']
+    readonly_fields = ['created_at', 'updated_at', 'sent_at', 'error']
+    list_select_related = ['newsletter', 'subscriber__user']
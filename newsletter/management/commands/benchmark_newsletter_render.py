@@ -0,0 +1,68 @@
+import secrets
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from accounts.models import Profile
+from newsletter.models import Newsletter, Subscriber
+from newsletter.utils import (
+    NEWSLETTER_TEMPLATE, get_unsubscribe_url, personalize_newsletter,
+    render_newsletter_skeleton
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the per-recipient cost of rendering the newsletter template '
+        'for every subscriber against rendering a skeleton once and '
+        'personalizing it. Uses unsaved objects, nothing is written.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        recipients = options['recipients']
+        newsletter = Newsletter(
+            pk=1,
+            title='Benchmark newsletter',
+            content='<h2>Reflexión</h2>' + '<p>Lorem ipsum dolor sit amet.</p>' * 40,
+        )
+        subscribers = [self.build_subscriber(i) for i in range(recipients)]
+
+        started = time.perf_counter()
+        for subscriber in subscribers:
+            render_to_string(NEWSLETTER_TEMPLATE, {
+                'newsletter': newsletter,
+                'user': subscriber.user,
+                'subscriber': subscriber,
+                'unsubscribe_url': get_unsubscribe_url(subscriber.unsubscribe_token),
+                'preview_mode': False,
+            })
+        full_render = time.perf_counter() - started
+
+        started = time.perf_counter()
+        skeleton = render_newsletter_skeleton(newsletter)
+        for subscriber in subscribers:
+            personalize_newsletter(skeleton, subscriber)
+        two_phase = time.perf_counter() - started
+
+        self.stdout.write(f'Recipients: {recipients}')
+        self.report('Full render per recipient', full_render, recipients)
+        self.report('Skeleton + substitution', two_phase, recipients)
+        self.stdout.write(self.style.SUCCESS(
+            f'Speedup: {full_render / two_phase:.1f}x'))
+
+    def build_subscriber(self, index):
+        user = User(email=f'subscriber{index}@example.com')
+        user.profile = Profile(first_name=f'Nombre{index}', last_name='Apellido')
+        return Subscriber(user=user, unsubscribe_token=secrets.token_urlsafe(32))
+
+    def report(self, label, elapsed, recipients):
+        self.stdout.write(
+            f'{label}: {elapsed:.3f}s total, '
+            f'{elapsed / recipients * 1e6:.1f}us per recipient')
@@ -2,7 +2,7 @@ import secrets
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from constants.constant import NEWSLETTER_STATUS_CHOICES
+from constants.constant import NEWSLETTER_STATUS_CHOICES, NEWSLETTER_DELIVERY_STATUS_CHOICES
 
 User = get_user_model()
 
@@ -93,3 +93,45 @@ class Subscriber(models.Model):
         self.is_subscribed = True
         self.unsubscribed_at = None
         self.save()
+
+
+class NewsletterDelivery(models.Model):
+    """
+    Delivery state of a newsletter for a single subscriber.
+    Acts as the ledger that lets an interrupted send resume where it stopped.
+    """
+    newsletter = models.ForeignKey(
+        Newsletter,
+        on_delete=models.CASCADE,
+        related_name='deliveries',
+        verbose_name='Newsletter'
+    )
+    subscriber = models.ForeignKey(
+        Subscriber,
+        on_delete=models.CASCADE,
+        related_name='deliveries',
+        verbose_name='Subscriber'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=NEWSLETTER_DELIVERY_STATUS_CHOICES,
+        default='queued',
+        verbose_name='Status'
+    )
+    error = models.TextField(blank=True, verbose_name='Error')
+    sent_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Sent At')
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name='Created At')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Updated At')
+
+    class Meta:
+        verbose_name = 'Newsletter Delivery'
+        verbose_name_plural = 'Newsletter Deliveries'
+        unique_together = ['newsletter', 'subscriber']
+        indexes = [
+            models.Index(fields=['newsletter', 'status', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.newsletter.title} - {self.subscriber.user.email} ({self.status})"
@@ -1,10 +1,15 @@
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
-from django.urls import reverse
 from django.conf import settings
-from .models import Newsletter, Subscriber
+from django_q.tasks import async_task
+from .models import Newsletter, Subscriber, NewsletterDelivery
+from .utils import get_newsletter_skeleton, personalize_newsletter
+from smtplib import SMTPRecipientsRefused
+from datetime import timedelta
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +18,12 @@ def send_newsletter_task(newsletter_id):
     """
     Asynchronous task to send newsletter to all active subscribers.
     This task is designed to be executed by Django-Q.
+
+    Every active subscriber gets a queued NewsletterDelivery row first. Only
+    queued rows are then split into keyset-paginated batches and distributed
+    over NEWSLETTER_CONCURRENCY lanes, each lane being a chain of
+    send_newsletter_batch tasks. Running the task again for an interrupted
+    newsletter therefore only sends to the subscribers still pending.
     """
     logger.info(f"Starting newsletter task for newsletter_id: {newsletter_id}")
 
@@ -27,46 +38,38 @@ def send_newsletter_task(newsletter_id):
                 f"Newsletter {newsletter_id} is not in sending status")
             return False
 
-        # Get all active subscribers
-        subscribers = Subscriber.objects.filter(
-            is_subscribed=True).select_related('user')
-        subscriber_count = subscribers.count()
+        concurrency = max(1, getattr(settings, 'NEWSLETTER_CONCURRENCY', 1))
+        rate_limit = getattr(settings, 'NEWSLETTER_RATE_LIMIT', 0)
+        batch_size = get_newsletter_batch_size(concurrency, rate_limit)
+
+        queue_newsletter_deliveries(newsletter, batch_size)
+
+        # Failed deliveries get another chance, bounced ones do not
+        newsletter.deliveries.filter(status='failed').update(
+            status='queued', error='', updated_at=timezone.now())
+
+        batches = list(get_delivery_batches(newsletter, batch_size))
 
-        if subscriber_count == 0:
+        if not batches:
             logger.warning(
-                f"No active subscribers found for newsletter {newsletter_id}")
+                f"No pending deliveries found for newsletter {newsletter_id}")
             newsletter.status = 'sent'
             newsletter.sent_date = timezone.now()
             newsletter.save()
             return True
 
-        logger.info(
-            f"Starting to send newsletter '{newsletter.title}' to {subscriber_count} subscribers")
-
-        sent_count = 0
-        failed_count = 0
+        # Round-robin the batches so every lane gets a similar share
+        lanes = [batches[i::concurrency]
+                 for i in range(min(concurrency, len(batches)))]
 
-        # Send email to each subscriber
-        for subscriber in subscribers:
-            try:
-                success = send_newsletter_email(newsletter, subscriber)
-                if success:
-                    sent_count += 1
-                else:
-                    failed_count += 1
-
-            except Exception as e:
-                logger.error(
-                    f"Failed to send newsletter to {subscriber.user.email}: {str(e)}")
-                failed_count += 1
-
-        # Update newsletter status
-        newsletter.status = 'sent'
-        newsletter.sent_date = timezone.now()
-        newsletter.save()
+        # The global rate limit is shared evenly between the lanes
+        interval = len(lanes) / rate_limit if rate_limit else 0
 
         logger.info(
-            f"Newsletter '{newsletter.title}' sending completed. Sent: {sent_count}, Failed: {failed_count}")
+            f"Sending newsletter '{newsletter.title}' in {len(batches)} batches over {len(lanes)} lanes")
+
+        for lane in lanes:
+            async_task(send_newsletter_batch, newsletter.id, lane, interval)
 
         return True
 
@@ -77,63 +80,273 @@ def send_newsletter_task(newsletter_id):
     except Exception as e:
         logger.error(
             f"Unexpected error sending newsletter {newsletter_id}: {str(e)}")
+        reset_newsletter_to_draft(newsletter_id)
+        return False
 
-        # Reset newsletter status to draft on failure
-        try:
-            newsletter = Newsletter.objects.get(id=newsletter_id)
-            newsletter.status = 'draft'
-            newsletter.save()
-        except:
-            pass
 
+def get_newsletter_batch_size(concurrency, rate_limit):
+    """
+    NEWSLETTER_BATCH_SIZE, capped so that a throttled batch fits in the
+    Django-Q task timeout. Each lane sends rate_limit / concurrency emails
+    per second and only NEWSLETTER_TIMEOUT_HEADROOM of the timeout is spent
+    sleeping, leaving the rest for rendering and SMTP round trips.
+    """
+    batch_size = getattr(settings, 'NEWSLETTER_BATCH_SIZE', 200)
+    timeout = getattr(settings, 'Q_CLUSTER', {}).get('timeout')
+    if rate_limit and timeout:
+        headroom = getattr(settings, 'NEWSLETTER_TIMEOUT_HEADROOM', 0.5)
+        batch_size = min(
+            batch_size, int(timeout * rate_limit / concurrency * headroom))
+    return max(1, batch_size)
+
+
+def reset_newsletter_to_draft(newsletter_id):
+    """
+    Put an interrupted newsletter back to draft so it can be sent again.
+    Subscribers already marked as sent in the ledger are skipped next time.
+    """
+    try:
+        Newsletter.objects.filter(id=newsletter_id, status='sending').update(
+            status='draft', updated_at=timezone.now())
+    except Exception:
+        pass
+
+
+def queue_newsletter_deliveries(newsletter, batch_size):
+    """
+    Create a queued delivery row for every active subscriber without one.
+    Rows are inserted in bulk, one keyset-paginated page at a time.
+    """
+    subscriber_ids = Subscriber.objects.filter(
+        is_subscribed=True).order_by('id').values_list('id', flat=True)
+
+    last_id = 0
+    while True:
+        ids = list(subscriber_ids.filter(id__gt=last_id)[:batch_size])
+        if not ids:
+            break
+        NewsletterDelivery.objects.bulk_create(
+            [NewsletterDelivery(newsletter=newsletter, subscriber_id=subscriber_id)
+             for subscriber_id in ids],
+            ignore_conflicts=True
+        )
+        last_id = ids[-1]
+
+
+def get_delivery_batches(newsletter, batch_size):
+    """
+    Yield (after_id, upto_id) bounds covering the queued deliveries.
+
+    Uses keyset pagination on the primary key, so each step is an index
+    range scan regardless of how far into the ledger it is.
+    """
+    delivery_ids = newsletter.deliveries.filter(
+        status='queued').order_by('id').values_list('id', flat=True)
+
+    last_id = 0
+    while True:
+        ids = list(delivery_ids.filter(id__gt=last_id)[:batch_size])
+        if not ids:
+            break
+        yield (last_id, ids[-1])
+        last_id = ids[-1]
+
+
+def send_newsletter_batch(newsletter_id, batches, interval=0):
+    """
+    Send the first batch of a lane and enqueue the rest of the lane.
+
+    Args:
+        newsletter_id: Newsletter ID
+        batches: List of (after_id, upto_id) delivery bounds for this lane
+        interval: Minimum seconds between two emails of this lane
+
+    Returns:
+        bool: True if the batch was processed, False otherwise
+    """
+    newsletter = Newsletter.objects.filter(
+        id=newsletter_id, status='sending').first()
+    if newsletter is None:
+        logger.warning(
+            f"Newsletter {newsletter_id} is no longer sending, dropping batch")
         return False
 
+    try:
+        after_id, upto_id = batches[0]
+        deliveries = newsletter.deliveries.filter(
+            status='queued', id__gt=after_id, id__lte=upto_id
+        ).select_related('subscriber__user__profile').order_by('id')
+
+        sent_count, failed_count = send_newsletter_emails(
+            newsletter, deliveries, interval)
 
-def send_newsletter_email(newsletter, subscriber):
+        logger.info(
+            f"Newsletter '{newsletter.title}' batch ({after_id}, {upto_id}] done. Sent: {sent_count}, Failed: {failed_count}")
+
+        if len(batches) > 1:
+            async_task(send_newsletter_batch,
+                       newsletter_id, batches[1:], interval)
+
+        # The lane that sees an empty queue closes the newsletter
+        elif not newsletter.deliveries.filter(status='queued').exists():
+            finished = Newsletter.objects.filter(
+                pk=newsletter_id, status='sending'
+            ).update(status='sent', sent_date=timezone.now())
+            if finished:
+                logger.info(
+                    f"Newsletter '{newsletter.title}' sending completed")
+
+        return True
+
+    except Exception as e:
+        logger.error(
+            f"Unexpected error sending newsletter {newsletter_id} batch: {str(e)}")
+        reset_newsletter_to_draft(newsletter_id)
+        return False
+
+
+def send_newsletter_emails(newsletter, deliveries, interval=0):
     """
-    Send individual newsletter email to a subscriber.
+    Send the newsletter for the given deliveries over one SMTP connection.
+
+    The outcome of each delivery is saved right after its email is sent,
+    so if the worker is killed or an error escapes mid-batch, at most the
+    email in flight can be sent again when the newsletter is resumed.
+
+    Args:
+        newsletter: Newsletter instance
+        deliveries: Iterable of NewsletterDelivery instances
+        interval: Minimum seconds between two emails
+
+    Returns:
+        tuple: (sent_count, failed_count)
+    """
+    sent_count = 0
+    failed_count = 0
+    next_send = time.monotonic()
+    skeleton = get_newsletter_skeleton(newsletter)
+
+    with get_connection() as connection:
+        for delivery in deliveries:
+            # Subscribers may leave while the newsletter is being sent
+            if not delivery.subscriber.is_subscribed:
+                NewsletterDelivery.objects.filter(id=delivery.id).delete()
+                continue
+
+            if interval:
+                delay = next_send - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                next_send = max(next_send, time.monotonic()) + interval
+
+            email = delivery.subscriber.user.email
+            outcome = {'error': '', 'sent_at': None}
+            try:
+                build_newsletter_email(
+                    newsletter, delivery.subscriber, connection, skeleton).send()
+                outcome.update(status='sent', sent_at=timezone.now())
+                sent_count += 1
+            except SMTPRecipientsRefused as e:
+                logger.warning(f"Newsletter bounced for {email}: {str(e)}")
+                outcome.update(status='bounced', error=str(e))
+                failed_count += 1
+            except Exception as e:
+                logger.error(
+                    f"Failed to send newsletter email to {email}: {str(e)}")
+                outcome.update(status='failed', error=str(e))
+                failed_count += 1
+
+            NewsletterDelivery.objects.filter(id=delivery.id).update(
+                updated_at=timezone.now(), **outcome)
+
+            if outcome['status'] == 'failed':
+                # The SMTP session may be unusable after an error
+                connection.close()
+                connection.open()
+
+    return sent_count, failed_count
+
+
+def resume_stalled_newsletters():
+    """
+    Resume newsletters stuck in sending, e.g. because a worker was killed
+    and its lane stopped enqueueing batches. Runs periodically (see
+    setup_schedules).
+
+    A newsletter is stalled when neither it nor any of its deliveries has
+    been updated for NEWSLETTER_STALL_TIMEOUT seconds. Running
+    send_newsletter_task again only sends to the deliveries still queued,
+    or closes the newsletter if none is left.
+
+    Returns:
+        int: Number of newsletters resumed
+    """
+    stall_timeout = getattr(settings, 'NEWSLETTER_STALL_TIMEOUT', 900)
+    stalled_before = timezone.now() - timedelta(seconds=stall_timeout)
+
+    recent_deliveries = NewsletterDelivery.objects.filter(
+        newsletter=OuterRef('pk'), updated_at__gt=stalled_before)
+    newsletter_ids = list(Newsletter.objects.filter(
+        status='sending', updated_at__lte=stalled_before
+    ).exclude(Exists(recent_deliveries)).values_list('id', flat=True))
+
+    for newsletter_id in newsletter_ids:
+        # Mark the newsletter as touched so the next sweep waits again
+        Newsletter.objects.filter(id=newsletter_id).update(
+            updated_at=timezone.now())
+        logger.warning(f"Resuming stalled newsletter {newsletter_id}")
+        async_task('newsletter.tasks.send_newsletter_task', newsletter_id)
+
+    return len(newsletter_ids)
+
+
+def build_newsletter_email(newsletter, subscriber, connection=None, skeleton=None):
+    """
+    Build the newsletter email for a subscriber.
 
     Args:
         newsletter: Newsletter instance
         subscriber: Subscriber instance
+        connection: Optional open email backend connection to reuse
+        skeleton: Optional pre-rendered skeleton of the newsletter
 
     Returns:
-        bool: True if email was sent successfully, False otherwise
+        EmailMultiAlternatives: Message ready to be sent
     """
-    try:
-        # Generate unsubscribe URL
-        unsubscribe_url = f"{settings.SITE_URL}{reverse('newsletter:unsubscribe', kwargs={'token': subscriber.unsubscribe_token})}"
+    if skeleton is None:
+        skeleton = get_newsletter_skeleton(newsletter)
 
-        # Prepare context for email template
-        context = {
-            'newsletter': newsletter,
-            'user': subscriber.user,
-            'subscriber': subscriber,
-            'unsubscribe_url': unsubscribe_url,
-            'preview_mode': False,
-        }
+    # Render email content
+    html_content = personalize_newsletter(skeleton, subscriber)
 
-        # Render email content
-        html_content = render_to_string(
-            'dashboard/newsletter/emails/newsletter.html', context)
+    # Create email with HTML content
+    email = EmailMultiAlternatives(
+        subject=newsletter.title,
+        body="Please enable HTML to view this email.",  # Fallback text
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[subscriber.user.email],
+        connection=connection
+    )
 
-        # Create email message
-        subject = newsletter.title
-        from_email = settings.DEFAULT_FROM_EMAIL
-        to_email = [subscriber.user.email]
+    email.attach_alternative(html_content, "text/html")
 
-        # Create email with HTML content
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body="Please enable HTML to view this email.",  # Fallback text
-            from_email=from_email,
-            to=to_email
-        )
+    return email
 
-        email.attach_alternative(html_content, "text/html")
 
-        # Send email
-        email.send()
+def send_newsletter_email(newsletter, subscriber, connection=None):
+    """
+    Send individual newsletter email to a subscriber.
+
+    Args:
+        newsletter: Newsletter instance
+        subscriber: Subscriber instance
+        connection: Optional open email backend connection to reuse
+
+    Returns:
+        bool: True if email was sent successfully, False otherwise
+    """
+    try:
+        build_newsletter_email(newsletter, subscriber, connection).send()
 
         logger.debug(
             f"Newsletter sent successfully to {subscriber.user.email}")
@@ -1,3 +1,178 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.template.loader import render_to_string
+from datetime import timedelta
+from django.utils import timezone
+from unittest.mock import MagicMock, patch
 
-# Create your tests here.
+from .models import Newsletter, Subscriber, NewsletterDelivery
+from .tasks import (
+    send_newsletter_task, queue_newsletter_deliveries, get_delivery_batches,
+    get_newsletter_batch_size, resume_stalled_newsletters
+)
+from .utils import (
+    NEWSLETTER_TEMPLATE, get_unsubscribe_url, personalize_newsletter,
+    render_newsletter_skeleton
+)
+
+User = get_user_model()
+
+
+def run_inline(func, *args, **kwargs):
+    """Execute an enqueued Django-Q task immediately."""
+    return func(*args, **kwargs)
+
+
+@override_settings(NEWSLETTER_BATCH_SIZE=2, NEWSLETTER_CONCURRENCY=2, NEWSLETTER_RATE_LIMIT=0)
+class NewsletterDeliveryTests(TestCase):
+    """Test cases for the batched newsletter delivery."""
+
+    def setUp(self):
+        """Set up test data."""
+        for i in range(5):
+            User.objects.create_user(
+                email=f'subscriber{i}@example.com', password='testpass123')
+        self.newsletter = Newsletter.objects.create(
+            title='Boletín', content='<p>Hola</p>', status='sending')
+
+    def test_delivery_batches_cover_all_subscribers(self):
+        """Test that keyset batches cover every active subscriber once."""
+        Subscriber.objects.filter(
+            user__email='subscriber0@example.com').update(is_subscribed=False)
+        queue_newsletter_deliveries(self.newsletter, 2)
+        batches = list(get_delivery_batches(self.newsletter, 2))
+
+        covered = []
+        for after_id, upto_id in batches:
+            covered.extend(self.newsletter.deliveries.filter(
+                id__gt=after_id, id__lte=upto_id
+            ).values_list('subscriber_id', flat=True))
+
+        self.assertEqual(len(batches), 2)
+        self.assertCountEqual(covered, Subscriber.objects.filter(
+            is_subscribed=True).values_list('id', flat=True))
+
+    @patch('newsletter.tasks.async_task', side_effect=run_inline)
+    def test_send_newsletter_task_sends_to_all(self, mock_async_task):
+        """Test that every subscriber receives the newsletter once."""
+        self.assertTrue(send_newsletter_task(self.newsletter.id))
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertCountEqual(
+            [message.to[0] for message in mail.outbox],
+            [f'subscriber{i}@example.com' for i in range(5)]
+        )
+
+        self.newsletter.refresh_from_db()
+        self.assertEqual(self.newsletter.status, 'sent')
+        self.assertIsNotNone(self.newsletter.sent_date)
+        self.assertEqual(
+            self.newsletter.deliveries.filter(status='sent').count(), 5)
+
+    @patch('newsletter.tasks.async_task', side_effect=run_inline)
+    def test_send_newsletter_task_resumes_pending_deliveries(self, mock_async_task):
+        """Test that a resumed send skips subscribers already delivered."""
+        queue_newsletter_deliveries(self.newsletter, 10)
+        delivered = self.newsletter.deliveries.order_by('id')[:3]
+        NewsletterDelivery.objects.filter(
+            id__in=[d.id for d in delivered]).update(status='sent')
+
+        self.assertTrue(send_newsletter_task(self.newsletter.id))
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.newsletter.refresh_from_db()
+        self.assertEqual(self.newsletter.status, 'sent')
+
+    @patch('newsletter.tasks.async_task', side_effect=run_inline)
+    def test_failed_delivery_is_recorded(self, mock_async_task):
+        """Test that a failing recipient is marked as failed, not sent."""
+        with patch('newsletter.tasks.build_newsletter_email',
+                   side_effect=Exception('SMTP Error')):
+            send_newsletter_task(self.newsletter.id)
+
+        self.assertEqual(
+            self.newsletter.deliveries.filter(status='failed').count(), 5)
+
+    @patch('newsletter.tasks.async_task', side_effect=run_inline)
+    def test_interrupted_batch_keeps_sent_deliveries(self, mock_async_task):
+        """Test that emails sent before an interruption are not sent again."""
+        message = MagicMock()
+        with patch('newsletter.tasks.build_newsletter_email',
+                   side_effect=[message, message, SystemExit]):
+            with self.assertRaises(SystemExit):
+                send_newsletter_task(self.newsletter.id)
+
+        self.assertEqual(
+            self.newsletter.deliveries.filter(status='sent').count(), 2)
+
+        send_newsletter_task(self.newsletter.id)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(
+            self.newsletter.deliveries.filter(status='sent').count(), 5)
+
+    @patch('newsletter.tasks.async_task')
+    def test_stalled_newsletter_is_resumed(self, mock_async_task):
+        """Test that the sweep resumes only newsletters without progress."""
+        queue_newsletter_deliveries(self.newsletter, 10)
+        # Just started, so not stalled
+        Newsletter.objects.create(
+            title='Reciente', content='<p>Hola</p>', status='sending')
+        long_ago = timezone.now() - timedelta(hours=1)
+        Newsletter.objects.filter(pk=self.newsletter.pk).update(updated_at=long_ago)
+        self.newsletter.deliveries.update(updated_at=long_ago)
+
+        self.assertEqual(resume_stalled_newsletters(), 1)
+        mock_async_task.assert_called_once_with(
+            'newsletter.tasks.send_newsletter_task', self.newsletter.id)
+        # Resumed newsletters wait a full stall timeout before the next sweep
+        self.assertEqual(resume_stalled_newsletters(), 0)
+
+    @override_settings(NEWSLETTER_BATCH_SIZE=200, Q_CLUSTER={'timeout': 60})
+    def test_batch_size_fits_task_timeout(self):
+        """Test that a throttled batch is sized to finish within the timeout."""
+        # 2 lanes at 10 emails/s send 5 emails/s each, 30s of budget
+        self.assertEqual(get_newsletter_batch_size(2, 10), 150)
+        self.assertEqual(get_newsletter_batch_size(2, 1000), 200)
+        self.assertEqual(get_newsletter_batch_size(2, 0), 200)
+
+    @patch('newsletter.tasks.async_task', side_effect=run_inline)
+    def test_send_newsletter_task_requires_sending_status(self, mock_async_task):
+        """Test that drafts are not sent."""
+        self.newsletter.status = 'draft'
+        self.newsletter.save()
+
+        self.assertFalse(send_newsletter_task(self.newsletter.id))
+        self.assertEqual(len(mail.outbox), 0)
+
+
+class NewsletterRenderingTests(TestCase):
+    """Test cases for the two-phase newsletter renderer."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            email='reader@example.com', password='testpass123')
+        self.user.profile.first_name = '<Ana>'
+        self.user.profile.save()
+        self.subscriber = self.user.newsletter_subscription
+        self.newsletter = Newsletter.objects.create(
+            title='Boletín', content='<p>Hola</p>')
+
+    def test_personalized_output_matches_full_render(self):
+        """Test that substitution yields the same HTML as a full render."""
+        expected = render_to_string(NEWSLETTER_TEMPLATE, {
+            'newsletter': self.newsletter,
+            'user': {'first_name': '<Ana>', 'last_name': '',
+                     'email': 'reader@example.com'},
+            'unsubscribe_url': get_unsubscribe_url(
+                self.subscriber.unsubscribe_token),
+            'preview_mode': False,
+        })
+
+        skeleton = render_newsletter_skeleton(self.newsletter)
+        html = personalize_newsletter(skeleton, self.subscriber)
+
+        self.assertEqual(html, expected)
+        self.assertIn(self.subscriber.unsubscribe_token, html)
+        self.assertNotIn('__NEWSLETTER_', html)
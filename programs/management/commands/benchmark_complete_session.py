@@ -0,0 +1,76 @@
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from constants.constant import UserRoles
+from programs.models import Assignment, Module, Program, Session
+from programs.views import complete_session
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Count the queries of one complete_session call on throwaway '
+        'programs of different sizes. Everything is created inside a '
+        'transaction that is rolled back at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', default=['1x2', '10x10', '40x25'],
+            help='Program sizes as <modules>x<sessions per module>.')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [tuple(int(part) for part in size.split('x'))
+                     for size in options['sizes']]
+        except ValueError:
+            raise CommandError('Sizes must look like 10x10.')
+
+        self.stdout.write('modules x sessions | first | repeat | last of module')
+        with transaction.atomic():
+            for modules, sessions in sizes:
+                counts = self.benchmark(modules, sessions)
+                self.stdout.write(
+                    f'{modules:>7} x {sessions:<8} | {counts[0]:>5} | '
+                    f'{counts[1]:>6} | {counts[2]:>14}')
+            transaction.set_rollback(True)
+
+    def benchmark(self, modules, sessions):
+        run_id = uuid.uuid4().hex[:8]
+        student = User.objects.create_user(
+            email=f'benchmark-{run_id}@example.com',
+            password=uuid.uuid4().hex, role=UserRoles.STUDENT)
+        program = Program.objects.create(
+            title=f'Benchmark {run_id}', description='Programa temporal')
+        for module_order in range(1, modules + 1):
+            module = Module.objects.create(
+                program=program, title=f'Módulo {module_order}',
+                description='Módulo temporal', order=module_order)
+            for session_order in range(1, sessions + 1):
+                Session.objects.create(
+                    module=module, title=f'Sesión {session_order}',
+                    order=session_order)
+        Assignment.objects.create(student=student, program=program)
+
+        first_module = Session.objects.filter(
+            module__program=program, module__order=1).order_by('order')
+        calls = [first_module.first(), first_module.first(), first_module.last()]
+
+        factory = RequestFactory()
+        counts = []
+        for session in calls:
+            request = factory.post(f'/completar-sesion/{session.pk}/')
+            request.user = student
+            with CaptureQueriesContext(connection) as queries:
+                response = complete_session(request, sesion_pk=session.pk)
+            if response.status_code != 200:
+                raise CommandError(
+                    f'complete_session returned {response.status_code}')
+            counts.append(len(queries))
+        return counts
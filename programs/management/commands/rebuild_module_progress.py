@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from programs.models import Assignment, ModuleProgress
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the per-module progress snapshot of every assignment '
+        'from the session completions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--program', type=int,
+            help='Only rebuild the assignments of this program.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Assignments rebuilt per batch.')
+
+    def handle(self, *args, **options):
+        assignments = Assignment.objects.order_by('pk')
+        if options['program']:
+            assignments = assignments.filter(program_id=options['program'])
+
+        assignment_ids = list(assignments.values_list('pk', flat=True))
+        batch_size = options['batch_size']
+        rows = 0
+        for start in range(0, len(assignment_ids), batch_size):
+            batch = assignment_ids[start:start + batch_size]
+            rows += ModuleProgress.rebuild(
+                Assignment.objects.filter(pk__in=batch))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rows} progress rows for {len(assignment_ids)} assignments.'))
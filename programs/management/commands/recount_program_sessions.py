@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from programs.models import Module, Program
+
+
+class Command(BaseCommand):
+    help = (
+        'Recount the sessions of every module and program and fix the '
+        'denormalized session_count counters where they drifted. Run it '
+        'once on deploy to backfill the counters of existing programs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report drifted rows without updating them.')
+
+    def handle(self, *args, **options):
+        drifted = 0
+        for model, lookup in ((Module, 'sessions'), (Program, 'modules__sessions')):
+            rows = model.objects.annotate(
+                actual=Count(lookup)).only('id', 'title', 'session_count')
+
+            for row in rows.iterator():
+                if row.session_count == row.actual:
+                    continue
+                drifted += 1
+                self.stdout.write(
+                    f'{model._meta.verbose_name} "{row.title}": '
+                    f'{row.session_count} -> {row.actual}')
+                if not options['dry_run']:
+                    # Only fix the row if no session changed it meanwhile
+                    model.objects.filter(
+                        pk=row.pk, session_count=row.session_count
+                    ).update(session_count=row.actual)
+
+        if options['dry_run']:
+            self.stdout.write(f'{drifted} counters have drifted.')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Reconciled {drifted} counters.'))
@@ -1,10 +1,13 @@
 """
 Models for the programs app.
 """
-from django.db import models
+from django.db import connection, models
+from django.db.models import F, Q, Case, When, Value, Count
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
+from django.utils.functional import cached_property
+from core.counters import adjust_counter
 from constants.constant import (
     ASSIGNMENT_STATUS_CHOICES, MATERIAL_TYPE_CHOICES,
     FEEDBACK_QUESTION_TYPE_CHOICES
@@ -13,7 +16,28 @@ from constants.constant import (
 User = get_user_model()
 
 
-class Program(models.Model):
+class SessionCountMixin:
+    """
+    Shared by Program and Module, whose session_count is kept up to date by
+    programs.signals with atomic F() updates.
+    """
+
+    def save(self, *args, **kwargs):
+        # A save() with a stale copy must not overwrite the counter
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'session_count'
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def adjust_session_count(cls, pk, delta):
+        """Atomically add delta to the session counter of a row."""
+        return adjust_counter(cls.objects.filter(pk=pk), 'session_count', delta)
+
+
+class Program(SessionCountMixin, models.Model):
     """
     Represents a complete course (e.g., "Maestría Emocional").
     The main container unit that contains multiple modules.
@@ -26,6 +50,13 @@ class Program(models.Model):
         null=True,
         verbose_name="Imagen de portada"
     )
+    # Sessions in all modules, maintained by programs.signals. Run
+    # recount_program_sessions after adding the column to backfill it
+    session_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Número de sesiones"
+    )
     created_at = models.DateTimeField(
         auto_now_add=True, verbose_name="Fecha de creación")
     updated_at = models.DateTimeField(
@@ -42,10 +73,14 @@ class Program(models.Model):
     @property
     def total_sessions(self):
         """Returns the total number of sessions in this program."""
-        return sum(module.sessions.count() for module in self.modules.all())
+        return self.session_count
 
+    def count_sessions(self):
+        """Counts the sessions of this program directly in the database."""
+        return Session.objects.filter(module__program=self).count()
 
-class Module(models.Model):
+
+class Module(SessionCountMixin, models.Model):
     """
     A chapter or thematic section within a Program.
     Groups a set of related lessons (e.g., "Módulo 1: Autoconocimiento").
@@ -63,6 +98,13 @@ class Module(models.Model):
         blank=True,
         verbose_name="Mensaje de felicitación"
     )
+    # Sessions in this module, maintained by programs.signals. Run
+    # recount_program_sessions after adding the column to backfill it
+    session_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Número de sesiones"
+    )
     created_at = models.DateTimeField(
         auto_now_add=True, verbose_name="Fecha de creación")
     updated_at = models.DateTimeField(
@@ -105,21 +147,32 @@ class Session(models.Model):
     def __str__(self):
         return f"{self.module.title} - {self.title}"
 
+    @cached_property
+    def materials_by_type(self):
+        """
+        Materials grouped by type, {type: [material, ...]}. Built from
+        materials.all(), so it is free when the materials were prefetched.
+        """
+        grouped = {material_type: [] for material_type, _ in MATERIAL_TYPE_CHOICES}
+        for material in self.materials.all():
+            grouped.setdefault(material.type, []).append(material)
+        return grouped
+
     @property
     def video_materials(self):
-        return self.materials.filter(type='video')
+        return self.materials_by_type['video']
 
     @property
     def audio_materials(self):
-        return self.materials.filter(type='audio')
+        return self.materials_by_type['audio']
 
     @property
     def reading_materials(self):
-        return self.materials.filter(type='reading')
+        return self.materials_by_type['reading']
 
     @property
     def file_materials(self):
-        return self.materials.filter(type='file')
+        return self.materials_by_type['file']
 
 
 class Material(models.Model):
@@ -227,22 +280,88 @@ class Assignment(models.Model):
     def __str__(self):
         return f"{self.student.get_full_name()} - {self.program.title}"
 
+    @staticmethod
+    def calculate_progress(completed_sessions, total_sessions):
+        if not total_sessions:
+            return 0
+        return min(100, int((completed_sessions / total_sessions) * 100))
+
     def update_progress(self):
-        """Calculate and update the progress percentage based on completed sessions."""
-        total_sessions = self.program.total_sessions
-        if total_sessions == 0:
-            self.progress_percentage = 0
-        else:
-            completed_sessions = self.completed_sessions.count()
-            self.progress_percentage = int(
-                (completed_sessions / total_sessions) * 100)
+        """
+        Recalculate the progress percentage from the completed sessions.
+
+        Uses the stored Program.session_count, so it costs one count of the
+        completions plus one UPDATE regardless of the size of the program.
+        """
+        progress = self.calculate_progress(
+            self.completed_sessions.count(), self.program.session_count)
+
+        now = timezone.now()
+        updates = {
+            'progress_percentage': progress,
+            'updated_at': now,
+        }
+
+        # Update status if completed, only if the row is still active
+        if progress == 100:
+            updates['status'] = Case(
+                When(status='active', then=Value('completed')),
+                default=F('status'))
+            updates['completed_at'] = Case(
+                When(status='active', then=Value(now)),
+                default=F('completed_at'))
+
+        Assignment.objects.filter(pk=self.pk).update(**updates)
+
+        self.progress_percentage = progress
+        self.updated_at = now
+        if progress == 100 and self.status == 'active':
+            self.status = 'completed'
+            self.completed_at = now
+
+    def complete_session(self, session):
+        """
+        Mark a session as completed. Safe to repeat: the completion is
+        inserted with ON CONFLICT DO NOTHING and the module snapshot is
+        recounted from the completions, so a double click counts once.
+
+        Must be called inside a transaction on an assignment locked with
+        select_for_update, with session.module already loaded.
+
+        Returns:
+            bool: True if this call completed the last session of the module
+        """
+        module = session.module
+        previously_completed = ModuleProgress.objects.filter(
+            assignment=self, module=module).values_list(
+            'completed', flat=True).first() or 0
+
+        SessionCompletion.objects.bulk_create(
+            [SessionCompletion(assignment=self, session=session)],
+            ignore_conflicts=True
+        )
+        counts = self.completed_sessions.aggregate(
+            total=Count('id'),
+            module=Count('id', filter=Q(session__module=module)))
+
+        ModuleProgress.upsert([
+            ModuleProgress(assignment=self, module=module,
+                           completed=counts['module'],
+                           total=module.session_count)
+        ])
+
+        self.progress_percentage = self.calculate_progress(
+            counts['total'], self.program.session_count)
+        update_fields = ['progress_percentage', 'updated_at']
 
         # Update status if completed
         if self.progress_percentage == 100 and self.status == 'active':
             self.status = 'completed'
             self.completed_at = timezone.now()
+            update_fields += ['status', 'completed_at']
 
-        self.save()
+        self.save(update_fields=update_fields)
+        return previously_completed < module.session_count <= counts['module']
 
 
 class SessionCompletion(models.Model):
@@ -274,6 +393,116 @@ class SessionCompletion(models.Model):
         return f"{self.assignment.student.get_full_name()} - {self.session.title}"
 
 
+class ModuleProgress(models.Model):
+    """
+    Snapshot of the progress of an assignment in one module.
+
+    Kept up to date on every completion and by programs.signals, so
+    per-module progress bars can be drawn from one query per page instead
+    of walking the completions. rebuild_module_progress recomputes it.
+    """
+    assignment = models.ForeignKey(
+        Assignment,
+        on_delete=models.CASCADE,
+        related_name='module_progress',
+        verbose_name="Asignación"
+    )
+    module = models.ForeignKey(
+        Module,
+        on_delete=models.CASCADE,
+        related_name='student_progress',
+        verbose_name="Módulo"
+    )
+    completed = models.PositiveIntegerField(
+        default=0, verbose_name="Sesiones completadas")
+    total = models.PositiveIntegerField(
+        default=0, verbose_name="Sesiones del módulo")
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name="Fecha de actualización")
+
+    class Meta:
+        verbose_name = "Progreso de módulo"
+        verbose_name_plural = "Progreso de módulos"
+        unique_together = ['assignment', 'module']
+
+    def __str__(self):
+        return f"{self.assignment} - {self.module.title}"
+
+    @property
+    def percentage(self):
+        return Assignment.calculate_progress(self.completed, self.total)
+
+    @staticmethod
+    def prefetch():
+        """Prefetch for Assignment querysets, with the modules in order."""
+        return models.Prefetch(
+            'module_progress',
+            queryset=ModuleProgress.objects.select_related(
+                'module').order_by('module__order')
+        )
+
+    @classmethod
+    def rebuild(cls, assignments, module_ids=None):
+        """
+        Recompute the snapshot of the given assignments from their
+        completions, creating missing rows and dropping the rows of modules
+        that left the program. Optionally limited to some modules.
+
+        Costs three queries plus the batched upsert.
+
+        Returns:
+            int: Number of rows written
+        """
+        pairs = assignments.values_list(
+            'pk', 'program__modules', 'program__modules__session_count')
+
+        completions = SessionCompletion.objects.filter(assignment__in=assignments)
+        stale = cls.objects.filter(assignment__in=assignments).exclude(
+            module__program=F('assignment__program'))
+        if module_ids is not None:
+            completions = completions.filter(session__module__in=module_ids)
+            stale = stale.filter(module__in=module_ids)
+
+        completed = {
+            (assignment_id, module_id): count
+            for assignment_id, module_id, count in completions.values_list(
+                'assignment_id', 'session__module_id').annotate(
+                count=Count('id')).order_by()
+        }
+        rows = [
+            cls(assignment_id=assignment_id, module_id=module_id,
+                completed=completed.get((assignment_id, module_id), 0),
+                total=total)
+            for assignment_id, module_id, total in pairs
+            # Programs without modules come back with module_id None
+            if module_id is not None
+            and (module_ids is None or module_id in module_ids)
+        ]
+
+        stale.delete()
+        cls.upsert(rows)
+        return len(rows)
+
+    @classmethod
+    def upsert(cls, rows):
+        """
+        Insert the rows, or update completed and total of the rows that
+        already exist for the same assignment and module.
+        """
+        # MySQL does not take a conflict target: ON DUPLICATE KEY UPDATE
+        # applies to the unique (assignment, module) index on its own
+        conflict_target = {}
+        if connection.features.supports_update_conflicts_with_target:
+            conflict_target['unique_fields'] = ['assignment', 'module']
+        cls.objects.bulk_create(
+            rows,
+            batch_size=500,
+            update_conflicts=True,
+            update_fields=['completed', 'total', 'updated_at'],
+            **conflict_target
+        )
+
+
 class Comment(models.Model):
     """
     The unit of social interaction and reflection in each Session.
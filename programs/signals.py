@@ -0,0 +1,127 @@
+from django.db.models.signals import post_init, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from core.counters import adjust_counter
+from .models import Program, Module, Session, Assignment, ModuleProgress
+
+
+@receiver(post_init, sender=Session)
+def remember_session_module(sender, instance, **kwargs):
+    """
+    Remember the module the session was loaded with, to detect moves
+    between modules when it is saved.
+    """
+    # Do not force a query if module_id was deferred
+    instance._counted_module_id = instance.__dict__.get('module_id')
+
+
+@receiver(post_init, sender=Module)
+def remember_module_program(sender, instance, **kwargs):
+    """
+    Remember the program the module was loaded with, to detect moves
+    between programs when it is saved.
+    """
+    instance._counted_program_id = instance.__dict__.get('program_id')
+
+
+@receiver(post_save, sender=Session)
+def count_saved_session(sender, instance, created, **kwargs):
+    """
+    Keep Module.session_count and Program.session_count in step with
+    created sessions and sessions moved to another module.
+    """
+    previous_module_id = None if created else instance._counted_module_id
+    instance._counted_module_id = instance.module_id
+
+    if previous_module_id == instance.module_id:
+        return
+    if previous_module_id is not None:
+        adjust_session_counts(previous_module_id, -1)
+        adjust_completed_counts(instance, previous_module_id, -1)
+        adjust_completed_counts(instance, instance.module_id, 1)
+    adjust_session_counts(instance.module_id, 1)
+
+
+@receiver(pre_delete, sender=Session)
+def discount_deleted_completions(sender, instance, **kwargs):
+    """
+    Discount the completions of a session about to be deleted from the
+    module progress, while the completions still exist.
+    """
+    adjust_completed_counts(instance, instance.module_id, -1)
+
+
+@receiver(post_delete, sender=Session)
+def count_deleted_session(sender, instance, **kwargs):
+    """
+    Discount a deleted session. When the whole module or program is being
+    deleted the counter rows may be gone already, which is harmless.
+    """
+    adjust_session_counts(instance.module_id, -1)
+
+
+@receiver(post_save, sender=Module)
+def count_moved_module(sender, instance, created, **kwargs):
+    """
+    Move the sessions of a module to the counter of its new program.
+    New modules have no sessions yet, so there is nothing to count.
+    """
+    previous_program_id = instance._counted_program_id
+    instance._counted_program_id = instance.program_id
+
+    if created:
+        # Give every student of the program an empty row for the module
+        ModuleProgress.rebuild(
+            Assignment.objects.filter(program_id=instance.program_id),
+            module_ids=[instance.pk])
+        return
+    if previous_program_id in (None, instance.program_id):
+        return
+
+    ModuleProgress.rebuild(
+        Assignment.objects.filter(
+            program_id__in=[previous_program_id, instance.program_id]),
+        module_ids=[instance.pk])
+    session_count = Module.objects.filter(pk=instance.pk).values_list(
+        'session_count', flat=True).first() or 0
+    if session_count:
+        Program.adjust_session_count(previous_program_id, -session_count)
+        Program.adjust_session_count(instance.program_id, session_count)
+
+
+@receiver(post_init, sender=Assignment)
+def remember_assignment_program(sender, instance, **kwargs):
+    """
+    Remember the program the assignment was loaded with, to detect moves
+    between programs when it is saved.
+    """
+    instance._progress_program_id = instance.__dict__.get('program_id')
+
+
+@receiver(post_save, sender=Assignment)
+def create_module_progress(sender, instance, created, **kwargs):
+    """
+    Create the module progress rows of a new assignment, and rebuild them
+    when the assignment is moved to another program. The rebuild drops the
+    rows of the modules of the previous program.
+    """
+    previous_program_id = instance._progress_program_id
+    instance._progress_program_id = instance.program_id
+
+    if created or previous_program_id not in (None, instance.program_id):
+        ModuleProgress.rebuild(Assignment.objects.filter(pk=instance.pk))
+
+
+def adjust_session_counts(module_id, delta):
+    Module.adjust_session_count(module_id, delta)
+    adjust_counter(
+        Program.objects.filter(modules=module_id), 'session_count', delta)
+    adjust_counter(
+        ModuleProgress.objects.filter(module_id=module_id), 'total', delta)
+
+
+def adjust_completed_counts(session, module_id, delta):
+    """Add delta to the module progress of every student who completed the session."""
+    adjust_counter(ModuleProgress.objects.filter(
+        module_id=module_id,
+        assignment__completed_sessions__session=session
+    ), 'completed', delta)
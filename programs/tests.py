@@ -1,3 +1,430 @@
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from constants.constant import UserRoles
+from .models import (
+    Assignment, Comment, Material, Module, ModuleProgress, Program, Session
+)
+from .utils import COMMENT_THREADS_PER_PAGE
+
+User = get_user_model()
+
+
+class ProgramTestMixin:
+    """Common data for the programs tests."""
+
+    def create_program(self, title='Maestría Emocional', modules=2, sessions=2):
+        program = Program.objects.create(title=title, description='Descripción')
+        for module_order in range(1, modules + 1):
+            module = Module.objects.create(
+                program=program, title=f'Módulo {module_order}',
+                description='Descripción', order=module_order)
+            for session_order in range(1, sessions + 1):
+                Session.objects.create(
+                    module=module, title=f'Sesión {session_order}',
+                    order=session_order)
+        return program
+
+    def assert_counts_match(self):
+        for module in Module.objects.all():
+            self.assertEqual(module.session_count, module.sessions.count())
+        for program in Program.objects.all():
+            self.assertEqual(program.session_count, program.count_sessions())
+
+
+class SessionCountTests(ProgramTestMixin, TestCase):
+    """Test cases for the stored session counters."""
+
+    def setUp(self):
+        self.program = self.create_program()
+
+    def test_counters_follow_creates_and_deletes(self):
+        """Test that creating and deleting sessions updates both counters."""
+        self.program.refresh_from_db()
+        self.assertEqual(self.program.total_sessions, 4)
+
+        Session.objects.filter(order=1).first().delete()
+        self.program.modules.last().delete()
+
+        self.program.refresh_from_db()
+        self.assertEqual(self.program.session_count, 1)
+        self.assert_counts_match()
+
+    def test_counters_follow_moves(self):
+        """Test that moving sessions and modules moves their counts."""
+        other = self.create_program('Otro', modules=1, sessions=1)
+        first, second = self.program.modules.all()
+
+        session = first.sessions.first()
+        session.module = second
+        session.order = 10
+        session.save()
+
+        second.program = other
+        second.order = 10
+        second.save()
+
+        self.assert_counts_match()
+        other.refresh_from_db()
+        self.assertEqual(other.session_count, 4)
+
+    def test_stale_save_keeps_counter(self):
+        """Test that saving a stale copy does not overwrite the counter."""
+        stale = Program.objects.get(pk=self.program.pk)
+        Session.objects.create(
+            module=self.program.modules.first(), title='Extra', order=3)
+
+        stale.title = 'Nuevo título'
+        stale.save()
+
+        self.assert_counts_match()
+
+    def test_delete_before_backfill_keeps_counters_at_zero(self):
+        """Test that deleting with counters not yet backfilled does not underflow."""
+        Program.objects.update(session_count=0)
+        Module.objects.update(session_count=0)
+
+        Session.objects.filter(order=1).first().delete()
+
+        self.program.refresh_from_db()
+        self.assertEqual(self.program.session_count, 0)
+        self.assertFalse(Module.objects.exclude(session_count=0).exists())
+
+    def test_recount_command_fixes_drift(self):
+        """Test that the recount command restores drifted counters."""
+        Program.objects.update(session_count=0)
+        Module.objects.update(session_count=7)
+
+        call_command('recount_program_sessions', stdout=StringIO())
+
+        self.assert_counts_match()
+
+
+class ProgressTests(ProgramTestMixin, TestCase):
+    """Test cases for the assignment progress."""
+
+    def setUp(self):
+        self.program = self.create_program(modules=2, sessions=2)
+        self.student = User.objects.create_user(
+            email='student@example.com', password='testpass123',
+            role=UserRoles.STUDENT)
+        self.assignment = Assignment.objects.create(
+            student=self.student, program=self.program)
+        self.client.force_login(self.student)
+
+    def complete(self, session):
+        return self.client.post(
+            reverse('programs:complete_session', args=[session.pk])).json()
+
+    def test_update_progress_costs_two_queries(self):
+        """Test that the progress costs one count and one update."""
+        assignment = Assignment.objects.select_related('program').get(
+            pk=self.assignment.pk)
+
+        with self.assertNumQueries(2):
+            assignment.update_progress()
+
+        self.assertEqual(assignment.progress_percentage, 0)
+
+    def test_complete_session_is_idempotent_and_constant(self):
+        """Test that repeating a completion counts once at a fixed cost."""
+        first, second = Session.objects.filter(
+            module__order=1).order_by('order')
+        small = self.create_program('Corto', modules=1, sessions=1)
+        Assignment.objects.create(student=self.student, program=small)
+        small_session = Session.objects.get(module__program=small)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.complete(first)
+        with CaptureQueriesContext(connection) as repeat_queries:
+            result = self.complete(first)
+        with CaptureQueriesContext(connection) as small_queries:
+            self.complete(small_session)
+
+        self.assertEqual(result['progress'], 25)
+        # The lock must not need FOR UPDATE OF, unsupported on MariaDB
+        assignment_queries = [
+            query['sql'] for query in queries
+            if 'FROM "programs_assignment"' in query['sql']]
+        self.assertTrue(assignment_queries)
+        for sql in assignment_queries:
+            self.assertNotIn('JOIN', sql)
+        self.assertEqual(len(repeat_queries), len(queries))
+        self.assertEqual(len(small_queries), len(queries))
+        self.assertEqual(self.assignment.completed_sessions.count(), 1)
+
+        Module.objects.filter(order=1).update(congratulation_message='¡Bien!')
+        self.assertEqual(self.complete(second)['congratulation'], '¡Bien!')
+        # Only the call that finishes the module congratulates
+        self.assertIsNone(self.complete(second)['congratulation'])
+        progress = self.assignment.module_progress.get(module=first.module)
+        self.assertEqual((progress.completed, progress.total), (2, 2))
+
+    def test_benchmark_command_reports_constant_queries(self):
+        """Test that the benchmark reports the same count for every size."""
+        out = StringIO()
+        call_command('benchmark_complete_session',
+                     sizes=['1x2', '5x5'], stdout=out)
+
+        rows = out.getvalue().splitlines()[1:]
+        counts = [row.split('|', 1)[1] for row in rows]
+        self.assertEqual(counts[0], counts[1])
+        self.assertFalse(Program.objects.filter(
+            title__startswith='Benchmark').exists())
+
+    def test_completing_every_session_completes_assignment(self):
+        """Test that completing all sessions reaches 100% and completes."""
+        sessions = list(Session.objects.order_by('module__order', 'order'))
+
+        self.assertEqual(self.complete(sessions[0])['progress'], 25)
+        result = self.complete(sessions[1])
+        self.assertEqual(result['progress'], 50)
+        for session in sessions[2:]:
+            result = self.complete(session)
+
+        self.assertEqual(result['progress'], 100)
+        self.assignment.refresh_from_db()
+        self.assertEqual(self.assignment.status, 'completed')
+        self.assertIsNotNone(self.assignment.completed_at)
+
+
+class ModuleProgressTests(ProgramTestMixin, TestCase):
+    """Test cases for the per-module progress snapshot."""
+
+    def setUp(self):
+        self.program = self.create_program(modules=2, sessions=2)
+        self.student = User.objects.create_user(
+            email='student@example.com', password='testpass123',
+            role=UserRoles.STUDENT)
+        self.assignment = Assignment.objects.create(
+            student=self.student, program=self.program)
+        self.first, self.second = self.program.modules.all()
+
+    def snapshot(self):
+        return {
+            row.module_id: (row.completed, row.total)
+            for row in ModuleProgress.objects.filter(assignment=self.assignment)
+        }
+
+    def complete(self, session):
+        self.client.force_login(self.student)
+        self.client.post(reverse('programs:complete_session', args=[session.pk]))
+
+    def test_rows_follow_completions_and_structure(self):
+        """Test that the snapshot follows completions and session changes."""
+        self.assertEqual(self.snapshot(), {
+            self.first.pk: (0, 2), self.second.pk: (0, 2)})
+
+        session = self.first.sessions.first()
+        self.complete(session)
+        Session.objects.create(module=self.first, title='Extra', order=3)
+        self.assertEqual(self.snapshot()[self.first.pk], (1, 3))
+
+        session.module = self.second
+        session.order = 10
+        session.save()
+        self.assertEqual(self.snapshot(), {
+            self.first.pk: (0, 2), self.second.pk: (1, 3)})
+
+        session.delete()
+        third = Module.objects.create(
+            program=self.program, title='Módulo 3', description='', order=3)
+        self.assertEqual(self.snapshot(), {
+            self.first.pk: (0, 2), self.second.pk: (0, 2), third.pk: (0, 0)})
+
+    def test_moved_module_leaves_old_assignments(self):
+        """Test that a module moved to another program changes snapshots."""
+        other = self.create_program('Otro', modules=1, sessions=1)
+        other_assignment = Assignment.objects.create(
+            student=self.student, program=other)
+
+        self.second.program = other
+        self.second.order = 10
+        self.second.save()
+
+        self.assertEqual(list(self.snapshot()), [self.first.pk])
+        self.assertEqual(ModuleProgress.objects.filter(
+            assignment=other_assignment).count(), 2)
+
+    def test_delete_before_rebuild_keeps_snapshot_at_zero(self):
+        """Test that deleting a session with stale zero rows does not underflow."""
+        session = self.first.sessions.first()
+        self.complete(session)
+        ModuleProgress.objects.update(completed=0, total=0)
+
+        session.delete()
+
+        self.assertEqual(self.snapshot()[self.first.pk], (0, 0))
+
+    def test_moved_assignment_gets_new_program_rows(self):
+        """Test that moving an assignment to another program rebuilds its rows."""
+        other = self.create_program('Otro', modules=3, sessions=1)
+
+        assignment = Assignment.objects.get(pk=self.assignment.pk)
+        assignment.program = other
+        assignment.save()
+
+        self.assertCountEqual(
+            self.snapshot(), other.modules.values_list('id', flat=True))
+
+    def test_rebuild_command_restores_snapshot(self):
+        """Test that the rebuild command recreates drifted and missing rows."""
+        self.complete(self.first.sessions.first())
+        expected = self.snapshot()
+        ModuleProgress.objects.filter(module=self.first).update(completed=9)
+        ModuleProgress.objects.filter(module=self.second).delete()
+
+        call_command('rebuild_module_progress', stdout=StringIO())
+
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_index_reads_progress_in_one_query(self):
+        """Test that the student index costs the same for more programs."""
+        self.client.force_login(self.student)
+        url = reverse('programs:index')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+
+        other = self.create_program('Otro', modules=3, sessions=1)
+        Assignment.objects.create(student=self.student, program=other)
+        with CaptureQueriesContext(connection) as more_queries:
+            response = self.client.get(url)
+
+        self.assertEqual(len(more_queries), len(queries))
+        self.assertContains(response, 'Módulo 3')
+
+
+class OutlineTests(ProgramTestMixin, TestCase):
+    """Test cases for the cached program outline."""
+
+    def setUp(self):
+        cache.clear()
+        self.program = self.create_program(modules=2, sessions=2)
+        self.student = User.objects.create_user(
+            email='student@example.com', password='testpass123',
+            role=UserRoles.STUDENT)
+        Assignment.objects.create(student=self.student, program=self.program)
+        self.client.force_login(self.student)
+        self.session = Session.objects.get(module__order=1, order=2)
+
+    def add_material(self, session, title):
+        return Material.objects.create(
+            session=session, type='reading', title=title,
+            reading_content=f'<p>{title}</p>')
+
+    def test_session_detail_renders_from_outline(self):
+        """Test that a cached session page does not grow with its content."""
+        url = reverse('programs:session_detail', args=[self.session.pk])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+
+        for index in range(3):
+            self.add_material(self.session, f'Lectura {index}')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as more_queries:
+            response = self.client.get(url)
+
+        self.assertEqual(len(more_queries), len(queries))
+        self.assertContains(response, 'Lectura 2')
+        self.assertEqual(response.context['previous_session']['title'], 'Sesión 1')
+        self.assertEqual(response.context['next_session']['id'], Session.objects.get(
+            module__order=2, order=1).pk)
+
+    def test_outline_follows_edits(self):
+        """Test that editing the program structure refreshes the pages."""
+        url = reverse('programs:program_detail', args=[self.program.pk])
+        self.assertContains(self.client.get(url), '2 sesiones')
+
+        extra = Session.objects.create(
+            module=self.program.modules.first(), title='Extra', order=3)
+        self.assertContains(self.client.get(url), '3 sesiones')
+        extra.delete()
+        self.assertContains(self.client.get(url), '2 sesiones')
+
+        material = self.add_material(self.session, 'Lectura')
+        session_url = reverse('programs:session_detail', args=[self.session.pk])
+        self.assertContains(self.client.get(session_url), 'Lectura')
+        material.delete()
+        self.assertNotContains(self.client.get(session_url), 'Lectura')
+
+    def test_materials_by_type_uses_prefetch(self):
+        """Test that the typed material lists reuse the prefetched materials."""
+        self.add_material(self.session, 'Lectura')
+        session = Session.objects.prefetch_related('materials').get(
+            pk=self.session.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(len(session.reading_materials), 1)
+            self.assertEqual(session.video_materials, [])
+
+
+class CommentThreadTests(ProgramTestMixin, TestCase):
+    """Test cases for the paginated comment threads of a session."""
+
+    def setUp(self):
+        cache.clear()
+        self.program = self.create_program(modules=1, sessions=1)
+        self.session = Session.objects.get()
+        self.student = User.objects.create_user(
+            email='student@example.com', password='testpass123',
+            role=UserRoles.STUDENT)
+        Assignment.objects.create(student=self.student, program=self.program)
+        self.client.force_login(self.student)
+
+    def add_threads(self, count, replies=2):
+        for index in range(count):
+            root = Comment.objects.create(
+                session=self.session, author=self.student,
+                content=f'Hilo {index}')
+            Comment.objects.bulk_create([
+                Comment(session=self.session, author=self.student,
+                        parent=root, content=f'Respuesta {index}-{reply}')
+                for reply in range(replies)
+            ])
+
+    def test_session_detail_cost_does_not_grow_with_comments(self):
+        """Test that the comments of a session load in a fixed number of queries."""
+        url = reverse('programs:session_detail', args=[self.session.pk])
+        self.add_threads(1)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+
+        self.add_threads(5, replies=3)
+        with CaptureQueriesContext(connection) as more_queries:
+            response = self.client.get(url)
+
+        self.assertEqual(len(more_queries), len(queries))
+        self.assertContains(response, 'Respuesta 4-2')
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_load_more_walks_every_thread_once(self):
+        """Test that following the cursors returns each thread exactly once."""
+        self.add_threads(COMMENT_THREADS_PER_PAGE + 5, replies=1)
+        response = self.client.get(
+            reverse('programs:session_detail', args=[self.session.pk]))
+        roots = response.context['root_comments']
+        self.assertEqual(len(roots), COMMENT_THREADS_PER_PAGE)
+        self.assertEqual(roots[0].content, f'Hilo {COMMENT_THREADS_PER_PAGE + 4}')
+
+        url = reverse('programs:session_comments', args=[self.session.pk])
+        data = self.client.get(
+            url, {'cursor': response.context['next_cursor']}).json()
+
+        self.assertIsNone(data['next_cursor'])
+        for index in range(5):
+            self.assertIn(f'Hilo {index}<', data['html'])
+            self.assertIn(f'Respuesta {index}-0', data['html'])
+        self.assertNotIn(f'Hilo {COMMENT_THREADS_PER_PAGE}<', data['html'])
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected."""
+        url = reverse('programs:session_comments', args=[self.session.pk])
+        self.assertEqual(self.client.get(url, {'cursor': 'x'}).status_code, 400)
@@ -19,4 +19,6 @@ urlpatterns = [
 urlpatterns += [
     path('sesiones/<int:sesion_pk>/comentar/',
          add_session_comment, name='session_add_comment'),
+    path('sesiones/<int:sesion_pk>/comentarios/',
+         views.session_comments, name='session_comments'),
 ]
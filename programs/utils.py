@@ -1,6 +1,16 @@
-from django.core.mail import EmailMessage
-from django.template.loader import render_to_string
-from django.conf import settings
+import hashlib
+from django.core.cache import cache
+from django.db.models import Count, Max, Prefetch, Q, Subquery, prefetch_related_objects
+from constants.constant import MATERIAL_TYPE_CHOICES
+from core.mail import register_email_type, send_email
+from .models import Comment, Module, Session
+
+
+register_email_type(
+    'welcome_assignment',
+    subject='¡Bienvenido a tu programa: {program_title}!',
+    template='programs/emails/welcome_assignment.html',
+)
 
 
 def send_welcome_assignment_email(assignment, manager_email=None):
@@ -10,23 +20,9 @@ def send_welcome_assignment_email(assignment, manager_email=None):
     """
     student = assignment.student
     program = assignment.program
-    to_email = student.email
     student_name = getattr(student, 'get_full_name', lambda: str(student))()
     program_title = getattr(program, 'title', str(program))
 
-    # Renderizar el cuerpo del correo
-    html_content = render_to_string(
-        'programs/emails/welcome_assignment.html',
-        {
-            'student_name': student_name,
-            'program_title': program_title,
-        }
-    )
-
-    subject = f"¡Bienvenido a tu programa: {program_title}!"
-    from_email = getattr(settings, 'DEFAULT_FROM_EMAIL',
-                         None) or 'no-reply@fds.com'
-
     # Determinar el email del manager para BCC
     bcc = []
     if manager_email:
@@ -34,17 +30,171 @@ def send_welcome_assignment_email(assignment, manager_email=None):
     elif hasattr(assignment, 'assigned_by') and getattr(assignment.assigned_by, 'email', None):
         bcc.append(assignment.assigned_by.email)
 
-    email = EmailMessage(
-        subject=subject,
-        body=html_content,
-        from_email=from_email,
-        to=[to_email],
-        bcc=bcc,
+    return send_email(
+        'welcome_assignment',
+        student.email,
+        {
+            'student_name': student_name,
+            'program_title': program_title,
+        },
+        bcc=bcc
     )
-    email.content_subtype = 'html'  # Enviar como HTML
-    try:
-        email.send(fail_silently=False)
-        return True
-    except Exception as e:
-        # Aquí podrías loggear el error si lo deseas
-        return False
+
+
+PROGRAM_OUTLINE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_program_outline_version(program_id):
+    """
+    Sello de los datos del índice de un programa: cantidad y última
+    modificación de sus módulos, sesiones y materiales, en una sola
+    consulta. Cambia con cualquier alta, edición o baja.
+    """
+    version = Module.objects.filter(program_id=program_id).aggregate(
+        module_count=Count('id', distinct=True),
+        session_count=Count('sessions', distinct=True),
+        material_count=Count('sessions__materials', distinct=True),
+        module_changed=Max('updated_at'),
+        session_changed=Max('sessions__updated_at'),
+        material_changed=Max('sessions__materials__updated_at'),
+    )
+    return hashlib.md5(
+        repr(sorted(version.items())).encode()).hexdigest()
+
+
+def get_program_outline_cache_key(program_id):
+    version = get_program_outline_version(program_id)
+    return f'programs:outline:{program_id}:{version}'
+
+
+def serialize_material(material):
+    return {
+        'id': material.id,
+        'type': material.type,
+        'title': material.title,
+        'video_url': material.video_url,
+        'audio_url': material.audio_url,
+        'reading_content': material.reading_content,
+        'file_url': material.file.url if material.file else None,
+    }
+
+
+def get_program_outline(program_id):
+    """
+    Índice de un programa para la navegación del estudiante: módulos en
+    orden, con sus sesiones y los materiales de cada sesión, también
+    agrupados por tipo.
+
+    Se arma con un solo prefetch y se cachea con una clave que incluye el
+    sello de sus módulos, sesiones y materiales, así cualquier cambio se ve
+    enseguida en todos los procesos aunque la caché no sea compartida, y
+    las páginas del programa y de las sesiones cuestan una consulta en vez
+    de recorrer la base de datos.
+
+    Returns:
+        dict: {'modules': [{'id', 'title', 'description', 'order',
+        'congratulation_message', 'sessions'}, ...]} donde cada sesión es
+        {'id', 'title', 'order', 'materials', 'materials_by_type'}
+    """
+    cache_key = get_program_outline_cache_key(program_id)
+    outline = cache.get(cache_key)
+    if outline is None:
+        modules = Module.objects.filter(program_id=program_id).order_by(
+            'order').prefetch_related(
+            Prefetch('sessions', queryset=Session.objects.order_by('order')),
+            'sessions__materials')
+        outline = {'modules': []}
+        for module in modules:
+            sessions = []
+            for session in module.sessions.all():
+                materials = [serialize_material(material)
+                             for material in session.materials.all()]
+                materials_by_type = {
+                    material_type: [] for material_type, _ in MATERIAL_TYPE_CHOICES
+                }
+                for material in materials:
+                    materials_by_type.setdefault(material['type'], []).append(material)
+                sessions.append({
+                    'id': session.id,
+                    'title': session.title,
+                    'order': session.order,
+                    'materials': materials,
+                    'materials_by_type': materials_by_type,
+                })
+            outline['modules'].append({
+                'id': module.id,
+                'title': module.title,
+                'description': module.description,
+                'order': module.order,
+                'congratulation_message': module.congratulation_message,
+                'sessions': sessions,
+            })
+        cache.set(cache_key, outline, PROGRAM_OUTLINE_CACHE_TIMEOUT)
+    return outline
+
+
+def find_outline_session(outline, session_id):
+    """
+    Ubica una sesión en el índice de su programa.
+
+    Returns:
+        dict: {'module', 'session', 'previous', 'next'}, o None si la
+        sesión no está en el índice
+    """
+    position = None
+    previous = None
+    for module in outline['modules']:
+        for session in module['sessions']:
+            if position is not None:
+                position['next'] = session
+                return position
+            if session['id'] == session_id:
+                position = {'module': module, 'session': session,
+                            'previous': previous, 'next': None}
+            previous = session
+    return position
+
+
+COMMENT_THREADS_PER_PAGE = 20
+
+
+def get_comment_threads(session_id, cursor=None, per_page=COMMENT_THREADS_PER_PAGE):
+    """
+    Página de hilos de comentarios de una sesión, del más reciente al más
+    antiguo. Cada comentario raíz trae sus respuestas en thread_replies, en
+    orden, y todos los autores vienen con su perfil.
+
+    Cuesta dos consultas sin importar cuántos hilos o respuestas haya: los
+    comentarios raíz de la página y las respuestas de esos hilos.
+
+    Args:
+        session_id: ID de la sesión
+        cursor: ID del último comentario raíz de la página anterior
+        per_page: Cantidad de hilos por página
+
+    Returns:
+        tuple: (comentarios raíz, cursor de la página siguiente o None)
+    """
+    roots = Comment.objects.filter(
+        session_id=session_id, parent__isnull=True
+    ).select_related('author__profile').order_by('-created_at', '-pk')
+
+    if cursor is not None:
+        cursor_created_at = Subquery(
+            Comment.objects.filter(pk=cursor).values('created_at'))
+        roots = roots.filter(
+            Q(created_at__lt=cursor_created_at)
+            | Q(created_at=cursor_created_at, pk__lt=cursor))
+
+    # Un hilo de más indica si hay otra página
+    roots = list(roots[:per_page + 1])
+    next_cursor = roots[per_page - 1].pk if len(roots) > per_page else None
+    roots = roots[:per_page]
+
+    prefetch_related_objects(roots, Prefetch(
+        'replies',
+        queryset=Comment.objects.select_related(
+            'author__profile').order_by('created_at', 'pk'),
+        to_attr='thread_replies'
+    ))
+    return roots, next_cursor
@@ -1,11 +1,13 @@
 from django.contrib import messages
+from django.db import transaction
 from django.shortcuts import render, get_object_or_404
 from django.views.decorators.http import require_POST
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.template.loader import render_to_string
 from constants.constant import student_assigned_to_program_required
-from programs.models import Program, Assignment, Session, Module, SessionCompletion, FinalFeedback, FeedbackQuestion, FeedbackResponse
+from programs.models import Program, Assignment, Session, ModuleProgress, FinalFeedback, FeedbackQuestion, FeedbackResponse
 from .forms import CommentForm
+from .utils import get_program_outline, find_outline_session, get_comment_threads
 from .models import Session, Comment
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
@@ -14,10 +16,11 @@ from django.views.decorators.http import require_http_methods
 def index(request):
     """
     Vista del dashboard personal del estudiante con sus programas asignados.
+    El progreso por módulo sale de una sola consulta a ModuleProgress.
     """
     from programs.models import Assignment
     assignments = Assignment.objects.select_related(
-        'program').filter(student=request.user, status__in=['active', 'completed', 'Activo']).order_by('-assigned_at')
+        'program').prefetch_related(ModuleProgress.prefetch()).filter(student=request.user, status__in=['active', 'completed', 'Activo']).order_by('-assigned_at')
     program_assignments = [
         {
             'program': assignment.program,
@@ -32,39 +35,87 @@ def index(request):
 def program_detail(request, programa_pk):
     """
     Vista del detalle de un programa y sus módulos para el estudiante.
+    Los módulos y sesiones salen del índice cacheado del programa.
     """
     program = get_object_or_404(Program, pk=programa_pk)
-    modules = Module.objects.filter(program=program).order_by('order')
-    return render(request, 'programs/program_detail.html', {'program': program, 'modules': modules})
+    outline = get_program_outline(program.pk)
+    return render(request, 'programs/program_detail.html', {'program': program, 'modules': outline['modules']})
 
 
 @student_assigned_to_program_required
 def session_detail(request, sesion_pk):
     """
     Vista del detalle de una sesión (lección) para el estudiante.
+    El contenido y la navegación entre sesiones salen del índice cacheado
+    del programa, así que solo se consulta a qué programa pertenece y el
+    sello del índice.
+    """
+    program_id = Session.objects.filter(pk=sesion_pk).values_list(
+        'module__program_id', flat=True).first()
+    if program_id is None:
+        raise Http404('La sesión no existe.')
+
+    position = find_outline_session(get_program_outline(program_id), sesion_pk)
+    if position is None:
+        raise Http404('La sesión no existe.')
+
+    root_comments, next_cursor = get_comment_threads(sesion_pk)
+    return render(request, 'programs/session_detail.html', {
+        'session': position['session'],
+        'module': position['module'],
+        'program_id': program_id,
+        'previous_session': position['previous'],
+        'next_session': position['next'],
+        'user': request.user,
+        'root_comments': root_comments,
+        'next_cursor': next_cursor,
+        **get_comment_permissions(request.user, program_id),
+    })
+
+
+def get_comment_permissions(user, program_id):
+    """
+    Flags de permisos sobre los comentarios de las sesiones de un programa.
     """
-    session = get_object_or_404(Session, pk=sesion_pk)
-    user = request.user
-    # Flags de permisos
     can_comment = False
-    can_reply = False
     can_delete = False
     if user.is_authenticated:
         if user.role == 'student':
             can_comment = Assignment.objects.filter(
-                student=user, program=session.module.program, status__in=['active', 'Activo']).exists()
-            can_reply = can_comment
+                student=user, program_id=program_id, status__in=['active', 'Activo']).exists()
         if user.role == 'manager':
             can_delete = True
-    root_comments = session.comments.filter(parent__isnull=True)
-    return render(request, 'programs/session_detail.html', {
-        'session': session,
+    return {
         'can_comment': can_comment,
-        'can_reply': can_reply,
+        'can_reply': can_comment,
         'can_delete': can_delete,
-        'user': user,
-        'root_comments': root_comments,
-    })
+    }
+
+
+@student_assigned_to_program_required
+def session_comments(request, sesion_pk):
+    """
+    Siguiente página de hilos de comentarios de una sesión, en JSON.
+    Recibe en ?cursor= el next_cursor de la página anterior.
+    """
+    try:
+        cursor = int(request.GET['cursor']) if request.GET.get('cursor') else None
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Cursor no válido.'}, status=400)
+
+    program_id = Session.objects.filter(pk=sesion_pk).values_list(
+        'module__program_id', flat=True).first()
+    root_comments, next_cursor = get_comment_threads(sesion_pk, cursor=cursor)
+    permissions = get_comment_permissions(request.user, program_id)
+    html = ''.join(
+        render_to_string(
+            'programs/components/comment.html',
+            {'comment': comment, 'user': request.user, **permissions},
+            request=request
+        )
+        for comment in root_comments
+    )
+    return JsonResponse({'success': True, 'html': html, 'next_cursor': next_cursor})
 
 
 @require_POST
@@ -100,40 +151,29 @@ def complete_session(request, sesion_pk):
     """
     Marca una sesión como completada para el estudiante actual.
     Devuelve el nuevo porcentaje de progreso y, si corresponde, el mensaje de felicitación del módulo.
+
+    Es idempotente: la asignación se bloquea mientras se registra la sesión
+    y repetir la petición (p. ej. un doble clic) no la cuenta dos veces.
+    El bloqueo es un select_for_update simple, sin of= ni joins, porque
+    MariaDB y MySQL anteriores a 8.0.1 no admiten FOR UPDATE OF; el
+    programa ya viene cargado con la sesión.
     """
     user = request.user
-    session = get_object_or_404(Session, pk=sesion_pk)
-    program = session.module.program
-    # Buscar la asignación activa
-    try:
-        assignment = Assignment.objects.get(
-            student=user, program=program, status__in=["active", "Activo"])
-    except Assignment.DoesNotExist:
-        return JsonResponse({"success": False, "error": "No tienes asignación activa para este programa."}, status=403)
-
-    # Verificar si ya está completada
-    already_completed = SessionCompletion.objects.filter(
-        assignment=assignment, session=session).exists()
-    if already_completed:
-        assignment.update_progress()
-        return JsonResponse({
-            "success": True,
-            "progress": assignment.progress_percentage,
-            "congratulation": None
-        })
+    session = get_object_or_404(
+        Session.objects.select_related('module__program'), pk=sesion_pk)
+    module = session.module
+
+    with transaction.atomic():
+        # Buscar la asignación activa
+        assignment = Assignment.objects.select_for_update().filter(
+            student=user, program=module.program, status__in=["active", "Activo"]).first()
+        if assignment is None:
+            return JsonResponse({"success": False, "error": "No tienes asignación activa para este programa."}, status=403)
+
+        assignment.program = module.program
+        module_completed = assignment.complete_session(session)
 
-    # Marcar como completada
-    SessionCompletion.objects.create(assignment=assignment, session=session)
-    assignment.update_progress()
-
-    # Verificar si todas las sesiones del módulo están completadas
-    module_sessions = session.module.sessions.all()
-    completed_sessions = SessionCompletion.objects.filter(
-        assignment=assignment,
-        session__in=module_sessions
-    ).count()
-    all_completed = completed_sessions == module_sessions.count()
-    congratulation = session.module.congratulation_message if all_completed and session.module.congratulation_message else None
+    congratulation = module.congratulation_message if module_completed and module.congratulation_message else None
 
     return JsonResponse({
         "success": True,
@@ -3,6 +3,8 @@ function commentSection() {
     content: '',
     parent: '',
     originalFormParent: null,
+    nextCursor: null,
+    loadingMore: false,
     submitComment() {
       const formData = new FormData(this.$refs.form);
       fetch(this.$refs.form.action, {
@@ -78,12 +80,41 @@ function commentSection() {
         }
       }
     },
+    // Cargar la siguiente página de hilos desde el cursor
+    loadMore() {
+      if (!this.nextCursor || this.loadingMore) {
+        return;
+      }
+      this.loadingMore = true;
+      const url = this.$el.dataset.moreUrl + '?cursor=' + encodeURIComponent(this.nextCursor);
+      fetch(url, {
+        headers: {
+          'X-Requested-With': 'XMLHttpRequest',
+        },
+      })
+      .then(response => response.json())
+      .then(data => {
+        if (data.success) {
+          document.getElementById('comments-list').insertAdjacentHTML('beforeend', data.html);
+          this.nextCursor = data.next_cursor;
+        }
+      })
+      .catch(() => {
+        if (window.ToastManager) {
+          window.ToastManager.createToast('Error de red al cargar los comentarios.', 'error');
+        }
+      })
+      .finally(() => {
+        this.loadingMore = false;
+      });
+    },
     cancelReply() {
       this.parent = '';
       this.moveFormToRoot();
     },
     // Escuchar evento de respuesta
     init() {
+      this.nextCursor = this.$el.dataset.nextCursor || null;
       this.moveFormToRoot();
       this.$el.addEventListener('reply', e => {
         this.parent = e.detail.parent;